@@ -1,6 +1,6 @@
 {
     'name': 'Sur Técnica - Comisiones de Vendedores',
-    'version': '17.0.1.0.0',
+    'version': '17.0.1.2.0',
     'category': 'Accounting',
     'summary': 'Cálculo automático de comisiones: 50% al facturar, 50% al cobrar',
     'description': """
@@ -18,13 +18,24 @@
     'data': [
         'security/ir.model.access.csv',
         'data/product_data.xml',
+        'data/ir_cron_data.xml',
         'views/commission_zone_views.xml',
         'views/res_partner_views.xml',
         'views/salesperson_commission_rule_views.xml',
         'views/salesperson_commission_views.xml',
+        'views/salesperson_commission_event_views.xml',
+        'views/salesperson_commission_archive_views.xml',
         'views/account_move_views.xml',
-        'views/menu_views.xml',
+        'views/sale_order_views.xml',
+        'views/res_config_settings_views.xml',
+        'views/commission_perf_sample_views.xml',
         'wizard/commission_create_vendor_bill_views.xml',
+        'wizard/commission_rule_simulation_views.xml',
+        'wizard/commission_rule_import_views.xml',
+        'wizard/commission_recompute_views.xml',
+        'report/salesperson_commission_report_views.xml',
+        'report/salesperson_commission_dashboard_views.xml',
+        'views/menu_views.xml',
     ],
     'installable': True,
     'application': False,
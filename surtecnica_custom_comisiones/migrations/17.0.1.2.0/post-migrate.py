@@ -0,0 +1,10 @@
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Rehace los snapshots y el análisis tras quitar comisiones duplicadas."""
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['salesperson.commission.snapshot']._cron_build_snapshots()
+    env['salesperson.commission.report']._refresh()
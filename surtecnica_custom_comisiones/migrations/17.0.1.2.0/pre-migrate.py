@@ -0,0 +1,88 @@
+import logging
+
+from odoo.tools.sql import table_exists
+
+_logger = logging.getLogger(__name__)
+
+
+def migrate(cr, version):
+    """Elimina comisiones duplicadas antes de crear el índice único.
+
+    Por qué: La constraint UNIQUE(move_id, rule_id, commission_percentage)
+    no frenaba duplicados con rule_id NULL, y las filas ya duplicadas harían
+    fallar la creación de salesperson_commission_move_rule_percentage_uniq.
+    Por cada (factura, regla, %) se conserva una fila, en la tabla activa o
+    en el archivo: primero la archivada (ya liquidada), después la vinculada
+    a un bill de proveedor, después la de menor id.
+    """
+    if not version:
+        return
+    # Por qué: La reemplaza el índice único que crea el init del modelo
+    cr.execute("""
+        ALTER TABLE salesperson_commission
+        DROP CONSTRAINT IF EXISTS salesperson_commission_unique_move_rule_percentage
+    """)
+    has_archive = table_exists(cr, 'salesperson_commission_archive')
+    archive_rows = """
+         UNION ALL
+        SELECT id, 'salesperson.commission.archive', move_id, rule_id,
+               commission_percentage, invoice_vendor_bill_id,
+               collection_vendor_bill_id, date
+          FROM salesperson_commission_archive
+    """ if has_archive else ''
+    cr.execute(f"""
+        WITH rows AS (
+            SELECT id, 'salesperson.commission' AS model, move_id, rule_id,
+                   commission_percentage, invoice_vendor_bill_id,
+                   collection_vendor_bill_id, date
+              FROM salesperson_commission
+            {archive_rows}
+        ), ranked AS (
+            SELECT id, model, date,
+                   invoice_vendor_bill_id IS NOT NULL
+                   OR collection_vendor_bill_id IS NOT NULL AS billed,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY move_id, COALESCE(rule_id, 0), commission_percentage
+                       ORDER BY model = 'salesperson.commission.archive' DESC,
+                                invoice_vendor_bill_id IS NOT NULL
+                                OR collection_vendor_bill_id IS NOT NULL DESC,
+                                id
+                   ) AS rank
+              FROM rows
+        )
+        SELECT id, model, date, billed FROM ranked WHERE rank > 1
+    """)
+    duplicates = cr.fetchall()
+    if not duplicates:
+        return
+
+    by_model = {}
+    for commission_id, model, _date, _billed in duplicates:
+        by_model.setdefault(model, []).append(commission_id)
+    tables = {
+        'salesperson.commission': 'salesperson_commission',
+        'salesperson.commission.archive': 'salesperson_commission_archive',
+    }
+    for model, ids in by_model.items():
+        cr.execute(f"DELETE FROM {tables[model]} WHERE id IN %s", (tuple(ids),))
+        # Por qué: Los eventos del duplicado sumaban un devengado que nunca
+        # correspondió; sin ellos el libro cuadra con las comisiones
+        if table_exists(cr, 'salesperson_commission_event'):
+            cr.execute("""
+                DELETE FROM salesperson_commission_event
+                 WHERE commission_model = %s AND commission_id IN %s
+            """, (model, tuple(ids)))
+
+    # Por qué: Los cierres desde la comisión duplicada más antigua incluían
+    # esos eventos; el post-migrate los rehace
+    if table_exists(cr, 'salesperson_commission_snapshot'):
+        cr.execute(
+            "DELETE FROM salesperson_commission_snapshot WHERE date >= %s",
+            (min(row[2] for row in duplicates),))
+
+    billed = [row[0] for row in duplicates if row[3]]
+    if billed:
+        _logger.warning(
+            'Comisiones duplicadas vinculadas a bills de proveedor eliminadas '
+            '(revisar los bills): %s', billed)
+    _logger.info('Comisiones duplicadas eliminadas: %s', len(duplicates))
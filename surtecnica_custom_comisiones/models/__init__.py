@@ -1,5 +1,14 @@
+from . import commission_perf_sample
 from . import commission_zone
+from . import commission_zone_zip_range
+from . import res_company
+from . import res_config_settings
 from . import res_partner
 from . import salesperson_commission_rule
 from . import salesperson_commission
+from . import salesperson_commission_archive
+from . import salesperson_commission_event
 from . import account_move
+from . import account_partial_reconcile
+from . import sale_order
+from . import sale_order_line
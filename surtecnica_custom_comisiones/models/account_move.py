@@ -1,6 +1,30 @@
+import logging
+import time
+
+import psycopg2.errors
+
 from odoo import models, fields, api
 from collections import defaultdict
 
+from .commission_perf_sample import instrumented
+
+_logger = logging.getLogger(__name__)
+
+# Por qué: 'in_payment' (pagada, pendiente de conciliar en banco) cuenta como cobrada
+PAID_STATES = ('paid', 'in_payment')
+
+# Por qué: Tras este número de intentos fallidos la factura queda en 'failed'
+# y el cron deja de reintentarla hasta que se reencole a mano.
+COMMISSION_QUEUE_MAX_ATTEMPTS = 3
+
+# Por qué: Errores de concurrencia — no son fallas de la factura; la
+# transacción entera se descarta y se reintenta, sin contar un intento.
+_CONCURRENCY_ERRORS = (
+    psycopg2.errors.SerializationFailure,
+    psycopg2.errors.DeadlockDetected,
+    psycopg2.errors.LockNotAvailable,
+)
+
 
 class AccountMove(models.Model):
     _inherit = 'account.move'
@@ -10,28 +34,129 @@ class AccountMove(models.Model):
     commission_count = fields.Integer(
         string='Comisiones', compute='_compute_commission_count')
 
+    # Por qué: Las comisiones liquidadas se mueven al archivo y dejan de estar
+    # en commission_ids y en los vínculos del bill → botón propio
+    commission_archived_count = fields.Integer(
+        string='Comisiones Archivadas', compute='_compute_commission_archived_count')
+
     @api.depends('commission_ids')
     def _compute_commission_count(self):
         for move in self:
             move.commission_count = len(move.commission_ids)
 
-    # --- Trigger de cobro ---
-    # Por qué: payment_state es un stored computed field. Los stored computed
-    # NO pasan por write() — Odoo los persiste directo a DB vía _write().
-    # Override _compute_payment_state es la forma correcta de interceptar
-    # el cambio de estado de pago.
-    @api.depends('amount_residual', 'move_type', 'state', 'company_id')
-    def _compute_payment_state(self):
-        super()._compute_payment_state()
-        # Por qué: Después del compute estándar, chequeamos si alguna factura
-        # pasó a 'paid'/'in_payment' y tiene comisiones de cobro pendientes.
+    def _compute_commission_archived_count(self):
+        counts = self.env['salesperson.commission.archive']._count_by_move(
+            self.filtered('id').ids)
         for move in self:
-            if (move.move_type == 'out_invoice'
-                    and move.payment_state in ('paid', 'in_payment')
-                    and move.commission_ids):
-                move.commission_ids.filtered(
-                    lambda c: c.collection_status == 'pending'
-                ).write({'collection_status': 'accrued'})
+            move.commission_archived_count = counts.get(move.id, 0)
+
+    # --- Cola de generación diferida ---
+    # Por qué: Con commission_deferred_generation activo en la compañía, _post
+    # solo encola la factura y el cron genera las comisiones en lotes.
+    # btree_not_null: solo se indexan las facturas que pasaron por la cola.
+    commission_queue_state = fields.Selection([
+        ('queued', 'En Cola'),
+        ('done', 'Procesada'),
+        ('failed', 'Error'),
+    ], string='Cola de Comisiones', copy=False, readonly=True,
+        index='btree_not_null')
+    commission_queue_attempts = fields.Integer(
+        string='Intentos', copy=False, readonly=True)
+    commission_queue_error = fields.Text(
+        string='Error de Comisiones', copy=False, readonly=True)
+
+    # --- Detalle de comisiones en facturas de proveedor ---
+    # Por qué: Con líneas agregadas, el detalle por comisión se consulta
+    # desde los vínculos invoice_vendor_bill_id / collection_vendor_bill_id.
+    commission_invoice_portion_ids = fields.One2many(
+        'salesperson.commission', 'invoice_vendor_bill_id',
+        string='Comisiones (Porción Facturación)')
+    commission_collection_portion_ids = fields.One2many(
+        'salesperson.commission', 'collection_vendor_bill_id',
+        string='Comisiones (Porción Cobro)')
+    commission_portion_count = fields.Integer(
+        string='Detalle Comisiones', compute='_compute_commission_portion_count')
+
+    @api.depends('commission_invoice_portion_ids', 'commission_collection_portion_ids')
+    def _compute_commission_portion_count(self):
+        for move in self:
+            move.commission_portion_count = len(
+                move.commission_invoice_portion_ids
+                | move.commission_collection_portion_ids)
+
+    # --- Trigger de cobro ---
+    # Por qué: El cambio de estado de pago lo dispara la conciliación
+    # (account.partial.reconcile create/unlink), no cada recompute de
+    # payment_state: ese compute corre ante muchos cambios de amount_residual
+    # que no afectan el cobro.
+    @instrumented('account.move._sync_commission_collection')
+    def _sync_commission_collection(self):
+        """Alinea el 50% de cobro con el estado de pago actual de las facturas.
+
+        - Factura pagada → devenga las comisiones de cobro pendientes
+        - Factura que dejó de estar pagada (desconciliación) → vuelve a
+          pendiente el cobro devengado que aún no se facturó al vendedor
+
+        Returns: (comisiones devengadas, comisiones revertidas)
+        """
+        invoices = self.filtered(lambda m: m.move_type == 'out_invoice')
+        paid = invoices.filtered(lambda m: m.payment_state in PAID_STATES)
+        accrued = paid._accrue_collection_commissions()
+        reverted = (invoices - paid)._revert_collection_commissions()
+        return accrued, reverted
+
+    def _sync_commission_payment_status(self):
+        """Propaga el payment_state de bills de comisión a las comisiones.
+
+        Por qué: Pagar (o desconciliar) un bill solo cambia el estado de pago
+        de las comisiones que cubre; se actualizan en bloque con SQL.
+        """
+        bills = self.filtered(lambda m: m.move_type == 'in_invoice')
+        return self.env['salesperson.commission']._sync_payment_status_from_bills(bills)
+
+    def _revert_collection_commissions(self):
+        """Vuelve a pendiente el 50% de cobro de facturas no pagadas.
+
+        Por qué: Solo porciones sin factura de proveedor — lo ya liquidado al
+        vendedor no se toca (se corrige con una NC si corresponde).
+        """
+        unpaid_moves = self.filtered(
+            lambda m: m.id
+            and m.move_type == 'out_invoice'
+            and m.payment_state not in PAID_STATES)
+        if not unpaid_moves:
+            return self.env['salesperson.commission']
+        commissions = self.env['salesperson.commission'].search([
+            ('move_id', 'in', unpaid_moves.ids),
+            ('collection_status', '=', 'accrued'),
+            ('collection_vendor_bill_id', '=', False),
+        ])
+        commissions.write({'collection_status': 'pending'})
+        self.env['salesperson.commission.event']._log(
+            commissions, 'collection', 'reset', sign=-1)
+        return commissions
+
+    def _accrue_collection_commissions(self):
+        """Devenga el 50% de cobro de las facturas pagadas del recordset.
+
+        Patrón: Set-based — un search + un write para todo el lote en vez de
+        un write por factura. El write del ORM mantiene cache y dependencias.
+        """
+        # Por qué: NewId (registros en memoria) no tienen comisiones en DB
+        paid_moves = self.filtered(
+            lambda m: m.id
+            and m.move_type == 'out_invoice'
+            and m.payment_state in PAID_STATES)
+        if not paid_moves:
+            return self.env['salesperson.commission']
+        commissions = self.env['salesperson.commission'].search([
+            ('move_id', 'in', paid_moves.ids),
+            ('collection_status', '=', 'pending'),
+        ])
+        commissions.write({'collection_status': 'accrued'})
+        self.env['salesperson.commission.event']._log(
+            commissions, 'collection', 'payment')
+        return commissions
 
     def action_view_commissions(self):
         """Acción del smart button para ver comisiones de esta factura."""
@@ -45,44 +170,511 @@ class AccountMove(models.Model):
             'context': {'default_move_id': self.id},
         }
 
+    def action_view_commission_portions(self):
+        """Smart button del bill: comisiones cuyas porciones cubre."""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Detalle de Comisiones',
+            'res_model': 'salesperson.commission',
+            'view_mode': 'tree,form',
+            'domain': ['|',
+                       ('invoice_vendor_bill_id', '=', self.id),
+                       ('collection_vendor_bill_id', '=', self.id)],
+        }
+
+    def action_view_archived_commissions(self):
+        """Smart button: comisiones archivadas de la factura o del bill."""
+        self.ensure_one()
+        return {
+            'type': 'ir.actions.act_window',
+            'name': 'Comisiones Archivadas',
+            'res_model': 'salesperson.commission.archive',
+            'view_mode': 'tree',
+            'domain': ['|', '|',
+                       ('move_id', '=', self.id),
+                       ('invoice_vendor_bill_id', '=', self.id),
+                       ('collection_vendor_bill_id', '=', self.id)],
+        }
+
     def _post(self, soft=True):
         """Override: al confirmar factura/NC, calcula comisiones automáticamente.
 
         Patrón: Herencia estándar Odoo — super() primero para que la factura
-        quede posted, luego generamos las comisiones.
+        quede posted, luego generamos las comisiones de todo el lote junto.
         """
         posted = super()._post(soft=soft)
-        for move in posted:
-            # Por qué: Solo facturas y NC de cliente generan comisiones
-            if move.move_type in ('out_invoice', 'out_refund'):
-                move._generate_commissions()
+        # Por qué: Solo facturas y NC de cliente generan comisiones
+        customer_moves = posted.filtered(
+            lambda m: m.move_type in ('out_invoice', 'out_refund'))
+        # Por qué: Compañías con generación diferida solo encolan → el posteo
+        # no paga el costo de reglas e inserts; lo hace el cron.
+        deferred = customer_moves.filtered(
+            lambda m: m.company_id.commission_deferred_generation)
+        if deferred:
+            deferred.write({
+                'commission_queue_state': 'queued',
+                'commission_queue_attempts': 0,
+                'commission_queue_error': False,
+            })
+            self.env.ref(
+                'surtecnica_custom_comisiones.ir_cron_commission_queue')._trigger()
+        immediate = customer_moves - deferred
+        immediate._generate_commissions()
+        # Por qué: Una factura puede quedar pagada al confirmarse (monto cero o
+        # conciliación automática) sin pasar por una conciliación posterior
+        immediate._accrue_collection_commissions()
         return posted
 
-    def _generate_commissions(self):
-        """Genera registros de comisión agrupados por regla/porcentaje.
+    @api.model
+    def _cron_process_commission_queue(self, batch_size=500):
+        """Cron: genera las comisiones de las facturas encoladas en lotes.
+
+        Patrón: Lote con savepoint — si el lote completo falla, se reintenta
+        factura por factura para aislar la que da error. Las fallidas suman un
+        intento y quedan en 'failed' con el mensaje; se reintentan hasta
+        COMMISSION_QUEUE_MAX_ATTEMPTS.
 
-        Por cada línea de producto:
-        1. Busca la regla más específica
-        2. Agrupa montos por regla
-        3. Crea un registro de comisión por grupo
+        Idempotencia: _generate_commissions omite facturas que ya tienen
+        comisiones, así que reprocesar una factura no duplica registros.
+
+        Concurrencia: un error de serialización o deadlock (otro worker
+        generando la misma factura, ver _lock_for_commissions) aborta la
+        corrida sin marcar nada; la próxima ejecución del cron la retoma.
         """
-        self.ensure_one()
-        # Por qué: Evita duplicar comisiones si se re-confirma
-        if self.commission_ids:
+        moves = self.search([
+            '|',
+            ('commission_queue_state', '=', 'queued'),
+            '&',
+            ('commission_queue_state', '=', 'failed'),
+            ('commission_queue_attempts', '<', COMMISSION_QUEUE_MAX_ATTEMPTS),
+        ], order='id', limit=batch_size)
+        if not moves:
             return
 
-        salesperson = self.invoice_user_id
-        if not salesperson:
+        # Por qué: Las reglas se resuelven con env.company → procesar por compañía
+        for company in moves.company_id:
+            company_moves = moves.filtered(lambda m: m.company_id == company)
+            company_moves.with_company(company)._process_commission_queue()
+
+        _logger.info('Cola de comisiones: %s facturas procesadas', len(moves))
+        if len(moves) == batch_size:
+            # Por qué: Quedan más en cola → reprograma el cron de inmediato
+            self.env.ref(
+                'surtecnica_custom_comisiones.ir_cron_commission_queue')._trigger()
+        else:
+            # Por qué: Cola vacía → el análisis refleja lo generado sin esperar
+            # al refresco horario (una vez por vaciado, no por lote)
+            self.env['salesperson.commission.report']._refresh()
+
+    def _process_commission_queue(self):
+        """Genera las comisiones del lote y actualiza el estado de la cola."""
+        try:
+            with self.env.cr.savepoint():
+                self._generate_commissions()
+                # Por qué: La factura pudo cobrarse mientras estaba en cola
+                self._accrue_collection_commissions()
+            self.write({
+                'commission_queue_state': 'done',
+                'commission_queue_error': False,
+            })
             return
+        except _CONCURRENCY_ERRORS:
+            raise
+        except Exception:
+            _logger.warning(
+                'Cola de comisiones: falló el lote de %s facturas, '
+                'reintentando una por una', len(self), exc_info=True)
 
-        partner = self.partner_id
+        for move in self:
+            try:
+                with self.env.cr.savepoint():
+                    move._generate_commissions()
+                    move._accrue_collection_commissions()
+                move.write({
+                    'commission_queue_state': 'done',
+                    'commission_queue_error': False,
+                })
+            except _CONCURRENCY_ERRORS:
+                raise
+            except Exception as e:
+                _logger.exception(
+                    'Cola de comisiones: error en la factura %s', move.display_name)
+                move.write({
+                    'commission_queue_state': 'failed',
+                    'commission_queue_attempts': move.commission_queue_attempts + 1,
+                    'commission_queue_error': str(e),
+                })
+
+    @api.model
+    def _backfill_commissions(self, chunk_size=500, limit=None, date_from=None, commit=True):
+        """Genera comisiones para facturas confirmadas que no tienen ninguna.
+
+        Caso de uso: facturas posteadas antes de instalar el módulo o antes de
+        cargar las reglas del vendedor. Entrada amigable para línea de comandos:
+
+            odoo shell -d <db> <<< "env['account.move']._backfill_commissions()"
+
+        Patrón: Keyset streaming — recorre las facturas por id en tandas de
+        chunk_size (una query liviana por tanda, sin OFFSET). Por tanda genera
+        las comisiones, devenga el 50% de cobro de las ya pagadas (igual que el
+        camino en vivo), hace commit y vacía el cache del environment para que
+        la memoria se mantenga constante.
+
+        Por qué: Cada factura procesada queda en commission_queue_state =
+        'done', también las que no generan ninguna comisión (sin regla
+        aplicable, base cero). Sin esa marca cada corrida las volvería a
+        recorrer y regenerar. Las facturas en 'failed' quedan para la cola
+        (action_requeue_commissions); si después se cargan reglas que aplican
+        a facturas ya procesadas, las genera el recálculo (commission.recompute).
+
+        Returns: dict con moves, commissions y seconds
+        """
+        query = """
+            SELECT m.id
+              FROM account_move m
+             WHERE m.state = 'posted'
+               AND m.move_type IN ('out_invoice', 'out_refund')
+               AND m.invoice_user_id IS NOT NULL
+               AND (m.commission_queue_state IS NULL
+                    OR m.commission_queue_state = 'queued')
+               AND m.id > %(last_id)s
+               AND (%(date_from)s IS NULL OR m.invoice_date >= %(date_from)s)
+               AND NOT EXISTS (
+                   SELECT 1 FROM salesperson_commission_all c WHERE c.move_id = m.id)
+          ORDER BY m.id
+             LIMIT %(limit)s
+        """
+        last_id = 0
+        total_moves = total_commissions = 0
+        start = time.monotonic()
+        while limit is None or total_moves < limit:
+            size = chunk_size if limit is None else min(chunk_size, limit - total_moves)
+            self.env.cr.execute(query, {
+                'last_id': last_id,
+                'date_from': date_from or None,
+                'limit': size,
+            })
+            move_ids = [row[0] for row in self.env.cr.fetchall()]
+            if not move_ids:
+                break
+            last_id = move_ids[-1]
+
+            moves = self.browse(move_ids)
+            for company in moves.company_id:
+                company_moves = moves.filtered(
+                    lambda m: m.company_id == company).with_company(company)
+                total_commissions += len(company_moves._generate_commissions())
+                company_moves._accrue_collection_commissions()
+            moves.write({
+                'commission_queue_state': 'done',
+                'commission_queue_error': False,
+            })
+            total_moves += len(move_ids)
+
+            if commit:
+                self.env.cr.commit()
+            # Por qué: Sin esto el cache crece con cada tanda procesada
+            self.env.invalidate_all()
+
+            elapsed = time.monotonic() - start
+            _logger.info(
+                'Backfill de comisiones: %s facturas, %s comisiones, '
+                '%.1f facturas/s (último id %s)',
+                total_moves, total_commissions,
+                total_moves / elapsed if elapsed else 0.0, last_id)
+
+        if total_moves:
+            self.env['salesperson.commission.report']._refresh()
+            if commit:
+                self.env.cr.commit()
+        elapsed = time.monotonic() - start
+        _logger.info(
+            'Backfill de comisiones terminado: %s facturas, %s comisiones en %.1fs',
+            total_moves, total_commissions, elapsed)
+        return {
+            'moves': total_moves,
+            'commissions': total_commissions,
+            'seconds': elapsed,
+        }
+
+    @api.model
+    def _recompute_commissions(self, date_from, date_to, salesperson_ids=None,
+                               rule_ids=None, chunk_size=500, commit=False,
+                               limit=None, start_after=0):
+        """Recalcula las comisiones existentes con las reglas actuales.
+
+        Caso de uso: se editó una regla y las comisiones ya generadas
+        conservan el porcentaje viejo. Con rule_ids se recalculan todas las
+        facturas de los vendedores de esas reglas (una regla nueva o editada
+        puede cambiar qué regla gana en cualquier línea del vendedor).
+
+            odoo shell -d <db> <<< "env['account.move']._recompute_commissions('2025-01-01', '2025-12-31', commit=True)"
+
+        Patrón: Keyset streaming + diff — recorre las facturas por id en
+        tandas de chunk_size, re-puntúa sus líneas en bloque y solo escribe
+        las comisiones cuya (regla, porcentaje, montos) cambió. Las facturas
+        con alguna porción ya facturada al vendedor no se tocan y se informan
+        aparte.
+
+        limit / start_after: procesa a lo sumo limit facturas con id mayor a
+        start_after, para repartir el recálculo en varias transacciones
+        (ver commission.recompute).
+
+        Returns: dict con moves, created, updated, removed, unchanged,
+        skipped_move_ids, last_id (última factura procesada) y done (no
+        quedan facturas)
+        """
+        salesperson_ids = set(salesperson_ids or [])
+        if rule_ids:
+            rules = self.env['salesperson.commission.rule'].with_context(
+                active_test=False).browse(rule_ids)
+            salesperson_ids |= set(rules.salesperson_id.ids)
+        query = """
+            SELECT m.id
+              FROM account_move m
+             WHERE m.state = 'posted'
+               AND m.move_type IN ('out_invoice', 'out_refund')
+               AND m.invoice_user_id IS NOT NULL
+               AND m.invoice_date >= %(date_from)s
+               AND m.invoice_date <= %(date_to)s
+               AND m.id > %(last_id)s
+        """
+        params = {'date_from': date_from, 'date_to': date_to}
+        if salesperson_ids:
+            query += " AND m.invoice_user_id IN %(salesperson_ids)s"
+            params['salesperson_ids'] = tuple(salesperson_ids)
+        query += " ORDER BY m.id LIMIT %(limit)s"
+
+        result = {'moves': 0, 'created': 0, 'updated': 0, 'removed': 0,
+                  'unchanged': 0, 'skipped_move_ids': [], 'done': False}
+        last_id = start_after
+        start = time.monotonic()
+        while limit is None or result['moves'] < limit:
+            size = chunk_size if limit is None else min(chunk_size, limit - result['moves'])
+            self.env.cr.execute(query, dict(params, last_id=last_id, limit=size))
+            move_ids = [row[0] for row in self.env.cr.fetchall()]
+            if len(move_ids) < size:
+                result['done'] = True
+            if not move_ids:
+                break
+            last_id = move_ids[-1]
+
+            moves = self.browse(move_ids)
+            for company in moves.company_id:
+                company_moves = moves.filtered(
+                    lambda m: m.company_id == company).with_company(company)
+                stats = company_moves._recompute_commission_chunk(date_from, date_to)
+                for key in ('created', 'updated', 'removed', 'unchanged'):
+                    result[key] += stats[key]
+                result['skipped_move_ids'] += stats['skipped'].ids
+            result['moves'] += len(move_ids)
+
+            if commit:
+                self.env.cr.commit()
+            # Por qué: Sin esto el cache crece con cada tanda procesada
+            self.env.invalidate_all()
+            if result['done']:
+                break
+
+        result['last_id'] = last_id
+        if result['created'] or result['updated'] or result['removed']:
+            self.env['salesperson.commission.report']._refresh()
+            if commit:
+                self.env.cr.commit()
+        _logger.info(
+            'Recálculo de comisiones: %s facturas, %s creadas, %s actualizadas, '
+            '%s eliminadas, %s sin cambios, %s facturas omitidas en %.1fs',
+            result['moves'], result['created'], result['updated'], result['removed'],
+            result['unchanged'], len(result['skipped_move_ids']),
+            time.monotonic() - start)
+        return result
+
+    def _recompute_commission_chunk(self, date_from, date_to):
+        """Aplica el diff entre las comisiones existentes y las re-puntuadas.
+
+        - Clave (factura, regla, %) nueva → se crea la comisión
+        - Clave que ya no aplica → se elimina
+        - Misma clave con otros montos → se actualizan los montos
+        Los estados de devengado se conservan; el libro registra la reversión
+        de lo devengado con el valor viejo y el devengado con el valor nuevo.
+
+        Returns: dict con created, updated, removed, unchanged y skipped
+        (facturas con comisiones ya facturadas al vendedor)
+        """
+        self._lock_for_commissions()
+        Commission = self.env['salesperson.commission']
         RuleModel = self.env['salesperson.commission.rule']
-        ZoneModel = self.env['commission.zone']
 
-        # Por qué: Resuelve zona una sola vez por factura (mismo partner)
+        existing = Commission.search([('move_id', 'in', self.ids)])
+        skipped = existing.filtered(
+            lambda c: c.invoice_vendor_bill_id or c.collection_vendor_bill_id).move_id
+        # Por qué: Las comisiones archivadas ya están liquidadas
+        skipped |= self.browse(
+            self.env['salesperson.commission.archive']._get_archived_move_ids(self.ids))
+        moves = self - skipped
+        existing = existing.filtered(lambda c: c.move_id not in skipped)
+
+        rows = self._read_commission_line_data(
+            date_from, date_to, move_ids=moves.ids) if moves else []
+        amounts, _move_info = self._score_commission_lines(
+            rows, RuleModel._get_rule_index)
+
+        current = {
+            (comm.move_id.id, comm.rule_id.id or False, comm.commission_percentage): comm
+            for comm in existing
+        }
+        removed = Commission.union(*(
+            comm for key, comm in current.items() if key not in amounts))
+        changed = {}
+        for key, comm in current.items():
+            if key not in amounts:
+                continue
+            base_amount, commission_amount = amounts[key]
+            currency = comm.currency_id
+            if (currency.compare_amounts(base_amount, comm.base_amount)
+                    or currency.compare_amounts(commission_amount, comm.commission_amount)):
+                changed[comm] = (base_amount, commission_amount)
+        updated = Commission.union(*changed)
+
+        # Por qué: Lo devengado con el valor viejo se revierte en el libro
+        (removed | updated)._log_accrued_events('recompute', sign=-1)
+        removed.unlink()
+        # Por qué: Un write por moneda y montos distintos (redondeados como
+        # los guarda el ORM), no uno por comisión — un cambio de % deja
+        # muchas comisiones con los mismos montos nuevos
+        by_amounts = defaultdict(list)
+        for comm, (base_amount, commission_amount) in changed.items():
+            currency = comm.currency_id
+            by_amounts[(
+                currency.id,
+                currency.round(base_amount),
+                currency.round(commission_amount),
+                currency.round(commission_amount / 2.0),
+            )].append(comm.id)
+        for key, commission_ids in by_amounts.items():
+            _currency_id, base_amount, commission_amount, half = key
+            Commission.browse(commission_ids).write({
+                'base_amount': base_amount,
+                'commission_amount': commission_amount,
+                'invoice_commission': half,
+                'collection_commission': half,
+            })
+        updated._log_accrued_events('recompute')
+
+        zones = self.env['commission.zone']._resolve_zones(moves.partner_id)
+        moves_by_id = {move.id: move for move in moves}
+        vals_list = []
+        for (move_id, rule_id, percentage), (base_amount, _amount) in amounts.items():
+            if (move_id, rule_id, percentage) in current:
+                continue
+            move = moves_by_id[move_id]
+            vals_list.append(move._build_commission_vals(
+                rule_id, percentage, base_amount, zones[move.partner_id.id]))
+        created = Commission.create(vals_list)
+        created._log_accrued_events('recompute')
+        # Por qué: Las nuevas comisiones de facturas ya cobradas devengan el cobro
+        created.move_id.filtered(
+            lambda m: m.payment_state in PAID_STATES)._accrue_collection_commissions()
+
+        return {
+            'created': len(created),
+            'updated': len(updated),
+            'removed': len(removed),
+            'unchanged': len(current) - len(removed) - len(updated),
+            'skipped': skipped,
+        }
+
+    def action_requeue_commissions(self):
+        """Vuelve a encolar facturas con error (reinicia los intentos)."""
+        self.filtered('commission_queue_state').write({
+            'commission_queue_state': 'queued',
+            'commission_queue_attempts': 0,
+            'commission_queue_error': False,
+        })
+        self.env.ref(
+            'surtecnica_custom_comisiones.ir_cron_commission_queue')._trigger()
+
+    @instrumented('account.move._generate_commissions', results=len)
+    def _generate_commissions(self):
+        """Genera registros de comisión agrupados por regla/porcentaje.
+
+        Patrón: Set-based — funciona igual para una factura o para un lote:
+        1. Resuelve la zona una vez por partner distinto
+        2. Por cada línea de producto busca la regla más específica
+           (índice de reglas cacheado por vendedor, sin SQL por línea)
+        3. Agrupa montos por (factura, regla, porcentaje)
+        4. Crea todas las comisiones en un único create() multi-vals
+
+        Concurrencia: ver _lock_for_commissions. Además, UNIQUE(move_id,
+        rule_id, commission_percentage) impide duplicados a nivel de base.
+        """
+        self._lock_for_commissions()
+        # Por qué: Evita duplicar comisiones si se re-confirma (incluidas las
+        # ya archivadas, que no están en commission_ids)
+        archived = self.env['salesperson.commission.archive']._get_archived_move_ids(
+            self.filtered('id').ids)
+        moves = self.filtered(
+            lambda m: not m.commission_ids and m.invoice_user_id
+            and m.id not in archived)
+        if not moves:
+            return self.env['salesperson.commission']
+
+        # Por qué: Precarga líneas/productos/categorías de todo el lote en bloque
+        moves.invoice_line_ids.product_id.categ_id
+
+        # Por qué: Resuelve zona una sola vez por partner distinto del lote
         # 1. commission_zone_id del partner (override manual, sub-zonas)
-        # 2. Búsqueda automática por state_id del partner (zona provincial)
-        zone = ZoneModel._resolve_zone(partner)
+        # 2. Mapa cacheado por state_id del partner (zona provincial)
+        zones = self.env['commission.zone']._resolve_zones(moves.partner_id)
+
+        vals_list = []
+        for move in moves:
+            vals_list.extend(move._prepare_commission_vals(zones[move.partner_id.id]))
+        commissions = self.env['salesperson.commission'].create(vals_list)
+
+        # Por qué: Libro de devengamiento — facturación al confirmar; las NC
+        # devengan ambas porciones al instante
+        Event = self.env['salesperson.commission.event']
+        refunds = commissions.filtered(lambda c: c.move_type == 'out_refund')
+        Event._log(commissions - refunds, 'invoice', 'post')
+        Event._log(refunds, 'invoice', 'refund')
+        Event._log(refunds, 'collection', 'refund')
+        return commissions
+
+    def _lock_for_commissions(self):
+        """Serializa la generación de comisiones de estas facturas entre workers.
+
+        Patrón: Row lock + update — bloquea las filas de account_move en orden
+        de id (sin deadlocks entre lotes superpuestos) y las actualiza. Si otro
+        worker ya generó comisiones para alguna y commiteó después de nuestro
+        snapshot, PostgreSQL aborta con error de serialización y Odoo reintenta
+        la transacción; en el reintento commission_ids ya no está vacío y la
+        factura se omite. Lotes sin facturas en común corren en paralelo.
+        """
+        move_ids = tuple(self.filtered('id').ids)
+        if not move_ids:
+            return
+        self.flush_recordset(['commission_queue_state'])
+        self.env.cr.execute("""
+            UPDATE account_move
+               SET commission_queue_state = commission_queue_state
+             WHERE id IN (
+                    SELECT id FROM account_move
+                     WHERE id IN %s
+                  ORDER BY id
+                       FOR NO KEY UPDATE)
+        """, (move_ids,))
+
+    def _prepare_commission_vals(self, zone):
+        """Valores de las comisiones de una factura, agrupadas por regla/%.
+
+        Returns: lista de dicts para salesperson.commission.create()
+        """
+        self.ensure_one()
+        salesperson = self.invoice_user_id
+        partner = self.partner_id
+        RuleModel = self.env['salesperson.commission.rule']
 
         # Por qué: Agrupa por regla para crear un registro por porcentaje distinto
         # key: (rule_id, percentage) → value: sum(price_subtotal)
@@ -107,31 +699,120 @@ class AccountMove(models.Model):
             grouped[(rule.id, percentage)] += line.price_subtotal
 
         is_refund = self.move_type == 'out_refund'
-        CommissionModel = self.env['salesperson.commission']
+        vals_list = []
 
         for (rule_id, percentage), base_amount in grouped.items():
             # Por qué: NC genera comisión negativa para revertir
             if is_refund:
                 base_amount = -abs(base_amount)
+            vals_list.append(
+                self._build_commission_vals(rule_id, percentage, base_amount, zone))
+        return vals_list
 
-            commission_amount = base_amount * percentage / 100.0
-            invoice_commission = commission_amount / 2.0
-            collection_commission = commission_amount / 2.0
+    def _build_commission_vals(self, rule_id, percentage, base_amount, zone):
+        """Valores de una comisión (base con el signo de NC ya aplicado)."""
+        self.ensure_one()
+        is_refund = self.move_type == 'out_refund'
+        commission_amount = base_amount * percentage / 100.0
+        return {
+            'move_id': self.id,
+            'salesperson_id': self.invoice_user_id.id,
+            'rule_id': rule_id or False,
+            'zone_id': zone.id,
+            'base_amount': base_amount,
+            'commission_percentage': percentage,
+            'commission_amount': commission_amount,
+            # Por qué: Split 50/50
+            'invoice_commission': commission_amount / 2.0,
+            'collection_commission': commission_amount / 2.0,
+            # Por qué: Al facturar, el 50% de facturación se devenga inmediato
+            'invoice_status': 'accrued',
+            # Por qué: NC devenga ambos 50% al instante (descuenta de una)
+            'collection_status': 'accrued' if is_refund else 'pending',
+        }
 
-            CommissionModel.create({
-                'move_id': self.id,
-                'salesperson_id': salesperson.id,
-                'rule_id': rule_id or False,
-                'base_amount': base_amount,
-                'commission_percentage': percentage,
-                'commission_amount': commission_amount,
-                'invoice_commission': invoice_commission,
-                'collection_commission': collection_commission,
-                # Por qué: Al facturar, el 50% de facturación se devenga inmediato
-                'invoice_status': 'accrued',
-                # Por qué: NC devenga ambos 50% al instante (descuenta de una)
-                'collection_status': 'accrued' if is_refund else 'pending',
-            })
+    @api.model
+    def _read_commission_line_data(self, date_from, date_to, salesperson_ids=None,
+                                   move_ids=None, company_id=None):
+        """Lee en bloque las líneas de producto de facturas/NC confirmadas.
+
+        Patrón: Una sola query SQL en vez de recorrer invoice_line_ids con el
+        ORM — los escenarios de simulación/recálculo cubren un año de líneas.
+
+        Returns: lista de tuplas (move_id, move_type, salesperson_id,
+        company_id, partner_id, commercial_partner_id, product_id, categ_id,
+        price_subtotal)
+        """
+        query = """
+            SELECT m.id, m.move_type, m.invoice_user_id, m.company_id,
+                   m.partner_id, p.commercial_partner_id,
+                   l.product_id, pt.categ_id, l.price_subtotal
+              FROM account_move_line l
+              JOIN account_move m ON m.id = l.move_id
+              JOIN res_partner p ON p.id = m.partner_id
+              JOIN product_product pp ON pp.id = l.product_id
+              JOIN product_template pt ON pt.id = pp.product_tmpl_id
+             WHERE m.state = 'posted'
+               AND m.move_type IN ('out_invoice', 'out_refund')
+               AND m.invoice_user_id IS NOT NULL
+               AND l.display_type = 'product'
+               AND m.invoice_date >= %(date_from)s
+               AND m.invoice_date <= %(date_to)s
+        """
+        params = {'date_from': date_from, 'date_to': date_to}
+        if salesperson_ids:
+            query += " AND m.invoice_user_id IN %(salesperson_ids)s"
+            params['salesperson_ids'] = tuple(salesperson_ids)
+        if move_ids:
+            query += " AND m.id IN %(move_ids)s"
+            params['move_ids'] = tuple(move_ids)
+        if company_id:
+            query += " AND m.company_id = %(company_id)s"
+            params['company_id'] = company_id
+        query += " ORDER BY m.id, l.sequence, l.id"
+        self.env['account.move.line'].flush_model(
+            ['move_id', 'product_id', 'display_type', 'price_subtotal', 'sequence'])
+        self.flush_model(
+            ['state', 'move_type', 'invoice_user_id', 'company_id',
+             'partner_id', 'invoice_date'])
+        self.env.cr.execute(query, params)
+        return self.env.cr.fetchall()
+
+    @api.model
+    def _score_commission_lines(self, rows, get_index):
+        """Asigna regla y porcentaje a cada línea y agrupa como _prepare_commission_vals.
+
+        rows: salida de _read_commission_line_data
+        get_index: callable(company_id, salesperson_id) → índice compilado
+            (ver salesperson.commission.rule._compile_rule_index)
+
+        Returns: dict {(move_id, rule_id, percentage): (base, commission)} con
+        el signo de NC ya aplicado, y dict {move_id: (move_type, salesperson_id)}
+        """
+        RuleModel = self.env['salesperson.commission.rule']
+        partners = self.env['res.partner'].browse({row[4] for row in rows})
+        zones = self.env['commission.zone']._resolve_zones(partners)
+
+        grouped = defaultdict(float)
+        move_info = {}
+        for (move_id, move_type, salesperson_id, company_id, partner_id,
+                commercial_partner_id, product_id, categ_id, subtotal) in rows:
+            move_info[move_id] = (move_type, salesperson_id)
+            rule_id, percentage = RuleModel._lookup_rule_index(
+                get_index(company_id, salesperson_id),
+                commercial_partner_id, zones[partner_id].id, product_id, categ_id)
+            if percentage <= 0:
+                continue
+            grouped[(move_id, rule_id, percentage)] += subtotal or 0.0
+
+        amounts = {}
+        for (move_id, rule_id, percentage), base_amount in grouped.items():
+            # Por qué: NC genera comisión negativa para revertir
+            if move_info[move_id][0] == 'out_refund':
+                base_amount = -abs(base_amount)
+            amounts[(move_id, rule_id, percentage)] = (
+                base_amount, base_amount * percentage / 100.0)
+        return amounts, move_info
 
     def button_draft(self):
         """Override: al pasar a borrador una factura de proveedor de comisiones,
@@ -143,14 +824,26 @@ class AccountMove(models.Model):
         # Por qué: Buscar comisiones vinculadas ANTES del super (el move aún tiene state)
         vendor_bills = self.filtered(lambda m: m.move_type == 'in_invoice')
         if vendor_bills:
-            Commission = self.env['salesperson.commission']
-            for bill in vendor_bills:
-                # Limpiar vínculos de facturación
-                Commission.search([
-                    ('invoice_vendor_bill_id', '=', bill.id)
-                ]).write({'invoice_vendor_bill_id': False})
-                # Limpiar vínculos de cobro
-                Commission.search([
-                    ('collection_vendor_bill_id', '=', bill.id)
-                ]).write({'collection_vendor_bill_id': False})
+            vendor_bills._unlink_commission_vendor_bills()
         return super().button_draft()
+
+    def _unlink_commission_vendor_bills(self):
+        """Limpia los vínculos de comisiones hacia estas facturas de proveedor.
+
+        Patrón: Set-based — un search y un write por porción para todos los
+        bills juntos (cantidad de queries constante, sin importar cuántos
+        bills o comisiones). El write del ORM dispara el recompute de
+        billing_status/billed_amount y payment_status.
+        """
+        Commission = self.env['salesperson.commission']
+        # Por qué: Las comisiones archivadas de estos bills vuelven a la tabla
+        # activa para que el search las encuentre
+        self.env['salesperson.commission.archive']._restore_for_bills(self)
+        # Limpiar vínculos de facturación
+        Commission.search([
+            ('invoice_vendor_bill_id', 'in', self.ids)
+        ]).write({'invoice_vendor_bill_id': False})
+        # Limpiar vínculos de cobro
+        Commission.search([
+            ('collection_vendor_bill_id', 'in', self.ids)
+        ]).write({'collection_vendor_bill_id': False})
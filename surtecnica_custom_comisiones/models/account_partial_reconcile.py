@@ -0,0 +1,34 @@
+from odoo import models, api
+
+
+class AccountPartialReconcile(models.Model):
+    _inherit = 'account.partial.reconcile'
+
+    # --- Trigger de cobro y de pago al vendedor ---
+    # Por qué: Crear/borrar una conciliación parcial es lo único que cambia si
+    # una factura está pagada. Solo se tocan las comisiones de las facturas
+    # involucradas, y la desconciliación revierte el devengado de cobro.
+    # Del lado proveedor, el pago del bill de comisiones actualiza su estado
+    # de pago.
+    @api.model_create_multi
+    def create(self, vals_list):
+        partials = super().create(vals_list)
+        partials._sync_commission_moves(partials._get_commission_moves())
+        return partials
+
+    def unlink(self):
+        # Por qué: Las facturas se leen ANTES del super (después no hay vínculo)
+        moves = self._get_commission_moves()
+        res = super().unlink()
+        self._sync_commission_moves(moves.exists())
+        return res
+
+    def _get_commission_moves(self):
+        """Facturas de cliente y bills de proveedor afectados por estas conciliaciones."""
+        moves = self.debit_move_id.move_id | self.credit_move_id.move_id
+        return moves.filtered(lambda m: m.move_type in ('out_invoice', 'in_invoice'))
+
+    @api.model
+    def _sync_commission_moves(self, moves):
+        moves._sync_commission_collection()
+        moves._sync_commission_payment_status()
@@ -0,0 +1,142 @@
+import functools
+import json
+import logging
+import threading
+import time
+
+from odoo import models, fields, api, tools
+
+_logger = logging.getLogger(__name__)
+
+INSTRUMENTATION_PARAM = 'surtecnica_custom_comisiones.instrumentation'
+
+# Por qué: Pila por thread de mediciones en curso. Las llamadas anidadas
+# (ej. _get_commission_percentage dentro de _generate_commissions) se suman
+# al desglose de la medición padre en vez de loguear una línea por llamada.
+_stack = threading.local()
+
+
+def instrumented(operation, records=None, results=None):
+    """Decorador: mide tiempo, queries SQL y volumen de una operación.
+
+    Se activa con el parámetro de sistema INSTRUMENTATION_PARAM:
+    - vacío/'off': sin medición (solo una lectura del parámetro en ormcache,
+      sin query)
+    - 'log': una línea de log estructurada por operación de primer nivel
+    - 'store': además guarda una muestra en salesperson.commission.perf.sample
+
+    records: callable(self, *args) → cantidad de registros de entrada
+    results: callable(result) → cantidad de registros producidos
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            frames = _stack.__dict__.setdefault('frames', [])
+            # Por qué: Las llamadas anidadas heredan el modo de la medición
+            # de primer nivel; solo esa consulta el parámetro
+            if frames:
+                mode = frames[0]['mode']
+            else:
+                mode = self.env['salesperson.commission.perf.sample']._get_instrumentation_mode()
+            if not mode or mode == 'off':
+                return method(self, *args, **kwargs)
+
+            frame = {'breakdown': {}, 'mode': mode}
+            frames.append(frame)
+            cr = self.env.cr
+            queries_before = cr.sql_log_count
+            start = time.perf_counter()
+            try:
+                result = method(self, *args, **kwargs)
+            finally:
+                frames.pop()
+            duration_ms = (time.perf_counter() - start) * 1000.0
+            query_count = cr.sql_log_count - queries_before
+
+            if frames:
+                # Llamada anidada: acumular en el desglose del padre
+                entry = frames[-1]['breakdown'].setdefault(
+                    operation, {'calls': 0, 'ms': 0.0, 'queries': 0})
+                entry['calls'] += 1
+                entry['ms'] += duration_ms
+                entry['queries'] += query_count
+                return result
+
+            sample = {
+                'operation': operation,
+                'duration_ms': round(duration_ms, 3),
+                'query_count': query_count,
+                'record_count': records(self, *args) if records else len(self),
+                'result_count': results(result) if results else 0,
+                'breakdown': {
+                    name: dict(entry, ms=round(entry['ms'], 3))
+                    for name, entry in frame['breakdown'].items()
+                },
+            }
+            _logger.info('commission_perf %s', json.dumps(sample))
+            if mode == 'store':
+                self.env['salesperson.commission.perf.sample']._store(sample)
+            return result
+        return wrapper
+    return decorator
+
+
+class SalespersonCommissionPerfSample(models.Model):
+    """Muestra de rendimiento de una operación de comisiones.
+
+    Por qué: Permite ver desde la interfaz cuánto tarda y cuántas queries hace
+    cada operación en producción (parámetro de instrumentación en 'store').
+    """
+    _name = 'salesperson.commission.perf.sample'
+    _description = 'Muestra de Rendimiento de Comisiones'
+    _order = 'create_date desc, id desc'
+
+    operation = fields.Char(string='Operación', required=True, readonly=True)
+    duration_ms = fields.Float(string='Duración (ms)', readonly=True, digits=(12, 3))
+    query_count = fields.Integer(string='Queries SQL', readonly=True)
+    record_count = fields.Integer(string='Registros Procesados', readonly=True)
+    result_count = fields.Integer(string='Registros Generados', readonly=True)
+    breakdown = fields.Text(string='Desglose', readonly=True)
+    user_id = fields.Many2one('res.users', string='Usuario', readonly=True)
+
+    @api.model
+    @tools.ormcache()
+    def _get_instrumentation_mode(self):
+        """Modo de instrumentación configurado ('off', 'log' o 'store').
+
+        Por qué: El decorador instrumented envuelve métodos que se llaman por
+        línea y por conciliación; leer ir.config_parameter en cada llamada es
+        una query (o un acceso al cache del ORM) en el camino caliente.
+        Patrón: ormcache — ir.config_parameter limpia el cache del registry al
+        cambiar cualquier parámetro.
+        """
+        return self.env['ir.config_parameter'].sudo().get_param(
+            INSTRUMENTATION_PARAM) or 'off'
+
+    @api.model
+    def _store(self, sample):
+        """Inserta la muestra con SQL directo.
+
+        Por qué: Se llama en medio de conciliaciones, posteos y flushes;
+        crear registros con el ORM ahí dispararía otro flush anidado.
+        """
+        self.env.cr.execute("""
+            INSERT INTO salesperson_commission_perf_sample
+                (operation, duration_ms, query_count, record_count, result_count,
+                 breakdown, user_id, create_uid, write_uid, create_date, write_date)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s,
+                    NOW() AT TIME ZONE 'UTC', NOW() AT TIME ZONE 'UTC')
+        """, (
+            sample['operation'], sample['duration_ms'], sample['query_count'],
+            sample['record_count'], sample['result_count'],
+            json.dumps(sample['breakdown']) if sample['breakdown'] else None,
+            self.env.uid, self.env.uid, self.env.uid,
+        ))
+
+    @api.autovacuum
+    def _gc_old_samples(self):
+        """Borra muestras de más de 30 días."""
+        self.env.cr.execute("""
+            DELETE FROM salesperson_commission_perf_sample
+             WHERE create_date < NOW() AT TIME ZONE 'UTC' - INTERVAL '30 days'
+        """)
@@ -1,12 +1,18 @@
-from odoo import models, fields, api
+from bisect import bisect_right
+
+from odoo import models, fields, api, tools
+
+from .commission_perf_sample import instrumented
+from .commission_zone_zip_range import zip_to_number
 
 
 class CommissionZone(models.Model):
     """Zona geográfica para reglas de comisión.
 
-    Dos niveles de uso:
+    Tres niveles de uso:
     - Zona provincial: state_id seteado → matchea automáticamente por provincia del partner
-    - Sub-zona: misma provincia, zona más específica → requiere asignación manual en el partner
+    - Sub-zona por CP: rangos de código postal → matchea automáticamente por CP del partner
+    - Sub-zona manual: sin rangos → requiere asignación manual en el partner
 
     Por qué: Odoo no tiene concepto de "zona comercial" nativo.
     Este modelo permite agrupar clientes geográficamente para aplicar
@@ -34,6 +40,129 @@ class CommissionZone(models.Model):
     company_id = fields.Many2one(
         'res.company', string='Compañía',
         default=lambda self: self.env.company)
+    zip_range_ids = fields.One2many(
+        'commission.zone.zip.range', 'zone_id', string='Rangos de CP')
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        # Por qué: El mapa (país, provincia) → zona queda obsoleto
+        self.env.registry.clear_cache()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        # Por qué: Incluye archivar/desarchivar (write de active)
+        self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
+
+    @api.model
+    @tools.ormcache()
+    def _get_state_zone_map(self):
+        """Mapa cacheado {(country_id, state_id): zone_id} de zonas activas.
+
+        Por qué: Replica el search(limit=1) por provincia — ante varias zonas
+        para la misma provincia gana la primera por nombre (orden del modelo).
+        Las zonas con rangos de CP también cuentan: el CP ya tiene prioridad
+        en _resolve_zones, y si la sub-zona es la única zona de su provincia
+        cubre al resto de la provincia. Ante una zona provincial sin rangos,
+        gana esa.
+        Patrón: ormcache — invalidado con registry.clear_cache() en create/write/unlink.
+        """
+        zones = self.sudo().with_context(active_test=True).search(
+            [('state_id', '!=', False)], order='name, id')
+        zone_map = {}
+        for zone in zones.sorted(lambda z: bool(z.zip_range_ids)):
+            zone_map.setdefault((zone.country_id.id, zone.state_id.id), zone.id)
+        return zone_map
+
+    @api.model
+    @tools.ormcache('country_id')
+    def _get_zip_index(self, country_id):
+        """Índice de intervalos de CP de un país, ordenado y sin solapamientos.
+
+        Patrón: Sorted interval index — los rangos se parten en segmentos
+        disjuntos; en cada segmento gana el rango más angosto (más específico)
+        y, a igual ancho, la primera zona por nombre. La búsqueda es un bisect,
+        O(log n) por partner.
+        Patrón: ormcache — invalidado con registry.clear_cache() en
+        create/write/unlink de zonas y rangos.
+
+        Returns: (starts, segments) — starts: tupla ordenada de inicios;
+        segments: tupla paralela de (inicio, fin, zone_id). No mutar.
+        """
+        ranges = self.env['commission.zone.zip.range'].sudo().search([
+            ('zone_id.country_id', '=', country_id),
+            ('zone_id.active', '=', True),
+        ])
+        intervals = []
+        for zip_range in ranges.sorted(lambda r: (r.zone_id.name, r.zone_id.id)):
+            start = zip_to_number(zip_range.zip_from)
+            end = zip_to_number(zip_range.zip_to)
+            if start is None or end is None or start > end:
+                continue
+            intervals.append((start, end, zip_range.zone_id.id))
+
+        # Por qué: Cortes en cada inicio y en cada fin+1 → segmentos donde el
+        # conjunto de rangos que los cubren no cambia
+        points = sorted({p for start, end, _zone in intervals for p in (start, end + 1)})
+        segments = []
+        for seg_start, next_start in zip(points, points[1:]):
+            seg_end = next_start - 1
+            best = None
+            for start, end, zone_id in intervals:
+                if start <= seg_start and seg_end <= end:
+                    if best is None or end - start < best[0]:
+                        best = (end - start, zone_id)
+            if not best:
+                continue
+            if segments and segments[-1][2] == best[1] and segments[-1][1] == seg_start - 1:
+                segments[-1] = (segments[-1][0], seg_end, best[1])
+            else:
+                segments.append((seg_start, seg_end, best[1]))
+        return tuple(s[0] for s in segments), tuple(segments)
+
+    @api.model
+    def _lookup_zip_zone(self, country_id, zip_code):
+        """Zona por CP vía bisect en el índice del país. Returns: zone_id o False"""
+        number = zip_to_number(zip_code)
+        if number is None or not country_id:
+            return False
+        starts, segments = self._get_zip_index(country_id)
+        position = bisect_right(starts, number) - 1
+        if position >= 0 and number <= segments[position][1]:
+            return segments[position][2]
+        return False
+
+    @api.model
+    @instrumented('commission.zone._resolve_zones',
+                  records=lambda self, partners: len(partners))
+    def _resolve_zones(self, partners):
+        """Resuelve la zona de comisión de varios partners de una vez.
+
+        Misma prioridad que _resolve_zone, sin queries por partner.
+
+        Returns: dict {partner_id: commission.zone record o browse vacío}
+        """
+        zone_map = self._get_state_zone_map()
+        result = {}
+        for partner in partners:
+            # Por qué: Override manual tiene prioridad → permite sub-zonas
+            if partner.commission_zone_id:
+                result[partner.id] = partner.commission_zone_id
+                continue
+            # Por qué: Rango de CP (sub-zona automática) antes que la provincia
+            zone_id = self._lookup_zip_zone(partner.country_id.id, partner.zip)
+            # Por qué: Búsqueda automática por provincia del partner
+            if not zone_id and partner.state_id:
+                zone_id = zone_map.get((partner.country_id.id, partner.state_id.id))
+            result[partner.id] = self.browse(zone_id or [])
+        return result
 
     @api.model
     def _resolve_zone(self, partner):
@@ -41,22 +170,10 @@ class CommissionZone(models.Model):
 
         Prioridad:
         1. commission_zone_id del partner (override manual, para sub-zonas)
-        2. Zona que matchee por state_id del partner (automática)
-        3. Sin zona
+        2. Zona con un rango de CP que contenga el CP del partner (automática)
+        3. Zona que matchee por state_id del partner (automática)
+        4. Sin zona
 
         Returns: commission.zone record o browse vacío
         """
-        # Por qué: Override manual tiene prioridad → permite sub-zonas
-        if partner.commission_zone_id:
-            return partner.commission_zone_id
-
-        # Por qué: Búsqueda automática por provincia del partner
-        if partner.state_id:
-            zone = self.search([
-                ('state_id', '=', partner.state_id.id),
-                ('country_id', '=', partner.country_id.id),
-            ], limit=1)
-            if zone:
-                return zone
-
-        return self.browse()
+        return self._resolve_zones(partner).get(partner.id, self.browse())
@@ -0,0 +1,62 @@
+import re
+
+from odoo import models, fields, api, _
+from odoo.exceptions import ValidationError
+
+_ZIP_DIGITS = re.compile(r'\d+')
+
+
+def zip_to_number(zip_code):
+    """Parte numérica de un código postal ('B1636ABC' → 1636, '1636' → 1636).
+
+    Returns: int o None si no tiene dígitos
+    """
+    match = _ZIP_DIGITS.search(zip_code or '')
+    return int(match.group()) if match else None
+
+
+class CommissionZoneZipRange(models.Model):
+    """Rango de códigos postales de una zona de comisión.
+
+    Por qué: Las sub-zonas (ej. "Norte Buenos Aires") no coinciden con una
+    provincia; con rangos de CP se resuelven automáticamente sin asignar la
+    zona a mano en cada contacto. Se compara la parte numérica del CP, así
+    un CPA (B1636ABC) y un CP viejo (1636) caen en el mismo rango.
+    """
+    _name = 'commission.zone.zip.range'
+    _description = 'Rango de Códigos Postales de Zona'
+    _order = 'zone_id, zip_from'
+
+    zone_id = fields.Many2one(
+        'commission.zone', string='Zona', required=True, ondelete='cascade', index=True)
+    zip_from = fields.Char(string='CP Desde', required=True)
+    zip_to = fields.Char(string='CP Hasta', required=True)
+
+    @api.constrains('zip_from', 'zip_to')
+    def _check_zip_range(self):
+        for zip_range in self:
+            start = zip_to_number(zip_range.zip_from)
+            end = zip_to_number(zip_range.zip_to)
+            if start is None or end is None:
+                raise ValidationError(_('Los códigos postales del rango deben contener números.'))
+            if start > end:
+                raise ValidationError(_(
+                    'El CP desde (%(start)s) no puede ser mayor que el CP hasta (%(end)s).',
+                    start=zip_range.zip_from, end=zip_range.zip_to))
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        # Por qué: El índice de rangos por país queda obsoleto
+        self.env.registry.clear_cache()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
@@ -0,0 +1,13 @@
+from odoo import models, fields
+
+
+class ResCompany(models.Model):
+    _inherit = 'res.company'
+
+    # Por qué: Opt-in por compañía. Activo → _post solo encola la factura y el
+    # cron de la cola genera las comisiones fuera del request del usuario.
+    commission_deferred_generation = fields.Boolean(
+        string='Generación Diferida de Comisiones',
+        help='Si está activo, al confirmar facturas las comisiones no se '
+             'calculan en el momento sino que se encolan y las procesa '
+             'una tarea programada en lotes.')
@@ -0,0 +1,19 @@
+from odoo import models, fields
+
+
+class ResConfigSettings(models.TransientModel):
+    _inherit = 'res.config.settings'
+
+    commission_deferred_generation = fields.Boolean(
+        related='company_id.commission_deferred_generation', readonly=False)
+    # Por qué: Parámetro de sistema leído (cacheado) por el decorador instrumented
+    commission_instrumentation = fields.Selection([
+        ('off', 'Desactivada'),
+        ('log', 'Solo log'),
+        ('store', 'Log + muestras'),
+    ], string='Instrumentación de Comisiones', default='off',
+        config_parameter='surtecnica_custom_comisiones.instrumentation')
+    # Por qué: 0 = sin archivo; las comisiones liquidadas quedan en la tabla activa
+    commission_archive_months = fields.Integer(
+        string='Archivar Comisiones Liquidadas (meses)', default=0,
+        config_parameter='surtecnica_custom_comisiones.archive_months')
@@ -0,0 +1,17 @@
+from odoo import models, fields, api
+
+
+class SaleOrder(models.Model):
+    _inherit = 'sale.order'
+
+    # Por qué: Vista previa no stored — el vendedor ve la comisión esperada
+    # antes de confirmar; la comisión real se genera al confirmar la factura
+    commission_preview_amount = fields.Monetary(
+        string='Comisión Estimada', currency_field='currency_id',
+        compute='_compute_commission_preview_amount')
+
+    @api.depends('order_line.commission_preview_amount')
+    def _compute_commission_preview_amount(self):
+        for order in self:
+            order.commission_preview_amount = sum(
+                order.order_line.mapped('commission_preview_amount'))
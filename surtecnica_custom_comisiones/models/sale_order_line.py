@@ -0,0 +1,62 @@
+from collections import defaultdict
+
+from odoo import models, fields, api
+
+
+class SaleOrderLine(models.Model):
+    _inherit = 'sale.order.line'
+
+    commission_percentage = fields.Float(
+        string='Comisión (%)', digits=(5, 2),
+        compute='_compute_commission_preview')
+    commission_preview_amount = fields.Monetary(
+        string='Comisión Estimada', currency_field='currency_id',
+        compute='_compute_commission_preview')
+
+    @api.depends('product_id', 'price_subtotal', 'display_type',
+                 'order_id.user_id', 'order_id.partner_invoice_id',
+                 'order_id.company_id')
+    def _compute_commission_preview(self):
+        """Comisión esperada por línea con las mismas reglas que la factura.
+
+        Patrón: Bulk resolution — zonas y reglas de todas las líneas se
+        resuelven de una pasada (ver _resolve_commission_percentages). Los
+        índices de reglas y zonas viven en ormcache, así que volver a
+        renderizar el pedido no consulta reglas ni zonas.
+        """
+        lines = self.filtered(
+            lambda l: not l.display_type and l.product_id and l.order_id.user_id)
+        (self - lines).update({
+            'commission_percentage': 0.0,
+            'commission_preview_amount': 0.0,
+        })
+        if not lines:
+            return
+
+        # Por qué: La factura sale a nombre de partner_invoice_id → misma zona
+        # y mismo partner comercial que usará _generate_commissions
+        partners = lines.order_id.partner_invoice_id
+        zones = self.env['commission.zone']._resolve_zones(partners)
+        Zone = self.env['commission.zone']
+
+        keys_by_company = defaultdict(dict)
+        for line in lines:
+            order = line.order_id
+            partner = order.partner_invoice_id
+            product = line.product_id
+            keys_by_company[order.company_id][line] = (
+                order.user_id.id,
+                partner.commercial_partner_id.id,
+                zones.get(partner.id, Zone).id,
+                product.id,
+                product.categ_id.id,
+            )
+
+        RuleModel = self.env['salesperson.commission.rule']
+        for company, line_keys in keys_by_company.items():
+            resolved = RuleModel._resolve_commission_percentages(
+                list(line_keys.values()), company)
+            for line, key in line_keys.items():
+                _rule_id, percentage = resolved[key]
+                line.commission_percentage = percentage
+                line.commission_preview_amount = line.price_subtotal * percentage / 100.0
@@ -1,4 +1,15 @@
-from odoo import models, fields, api
+import logging
+
+from odoo import models, fields, api, tools
+
+_logger = logging.getLogger(__name__)
+
+# Por qué: Campos que alteran los KPIs del tablero; escribirlos invalida su cache
+_KPI_FIELDS = {
+    'invoice_status', 'collection_status',
+    'invoice_vendor_bill_id', 'collection_vendor_bill_id',
+    'base_amount', 'commission_amount', 'invoice_commission', 'collection_commission',
+}
 
 
 class SalespersonCommission(models.Model):
@@ -21,6 +32,10 @@ class SalespersonCommission(models.Model):
         'res.users', string='Vendedor', required=True, index=True)
     rule_id = fields.Many2one(
         'salesperson.commission.rule', string='Regla Aplicada')
+    # Por qué: Zona resuelta al generar la comisión (la del partner puede
+    # cambiar después); permite agrupar reportes por zona sin recalcular.
+    zone_id = fields.Many2one(
+        'commission.zone', string='Zona', readonly=True)
     partner_id = fields.Many2one(
         related='move_id.partner_id', string='Cliente',
         store=True, readonly=True)
@@ -57,13 +72,14 @@ class SalespersonCommission(models.Model):
     # --- Facturación a proveedor ---
     # Por qué: Cada porción (50% facturación / 50% cobro) se factura por separado
     # al vendedor como proveedor. ondelete='set null' limpia el vínculo si se borra el bill.
+    # btree_not_null: button_draft busca por estos campos; la mayoría está vacío
     invoice_vendor_bill_id = fields.Many2one(
         'account.move', string='Fact. Prov. (Facturación)',
-        ondelete='set null', copy=False,
+        ondelete='set null', copy=False, index='btree_not_null',
         help='Factura de proveedor que cubre la porción de facturación (50%)')
     collection_vendor_bill_id = fields.Many2one(
         'account.move', string='Fact. Prov. (Cobro)',
-        ondelete='set null', copy=False,
+        ondelete='set null', copy=False, index='btree_not_null',
         help='Factura de proveedor que cubre la porción de cobro (50%)')
 
     # Por qué: Estado consolidado de facturación al proveedor
@@ -91,6 +107,51 @@ class SalespersonCommission(models.Model):
         string='Monto Pagado',
         compute='_compute_payment_status', store=True)
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['salesperson.commission.dashboard']._bump_stamp()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if _KPI_FIELDS.intersection(vals):
+            self.env['salesperson.commission.dashboard']._bump_stamp()
+        return res
+
+    def unlink(self):
+        # Por qué: commission_id del libro no tiene FK → se desvincula a mano
+        # (lo que hacía ON DELETE SET NULL); los eventos se conservan
+        if self.ids:
+            self.env['salesperson.commission.event'].flush_model()
+            self.env.cr.execute("""
+                UPDATE salesperson_commission_event
+                   SET commission_id = NULL
+                 WHERE commission_id IN %s
+                   AND commission_model = %s
+            """, (tuple(self.ids), self._name))
+        res = super().unlink()
+        self.env['salesperson.commission.dashboard']._bump_stamp()
+        return res
+
+    def init(self):
+        # Por qué: Índices parciales — solo las filas pendientes, que son las
+        # que consultan el devengado de cobro, "Cobro Pendiente" y
+        # "Sin Facturar Prov." (el histórico liquidado no entra al índice).
+        tools.create_index(
+            self.env.cr, 'salesperson_commission_collection_pending_idx',
+            self._table, ['move_id'], where="collection_status = 'pending'")
+        tools.create_index(
+            self.env.cr, 'salesperson_commission_billing_pending_idx',
+            self._table, ['salesperson_id', 'date'], where="billing_status = 'pending'")
+        # Por qué: Garantía a nivel de base contra comisiones duplicadas cuando
+        # dos workers generan las de la misma factura (ver _lock_for_commissions).
+        # Índice con COALESCE y no UNIQUE: para PostgreSQL dos rule_id NULL
+        # (regla borrada) son distintos y el duplicado pasaría.
+        tools.create_unique_index(
+            self.env.cr, 'salesperson_commission_move_rule_percentage_uniq',
+            self._table, ['move_id', 'COALESCE(rule_id, 0)', 'commission_percentage'])
+
     @api.depends('invoice_vendor_bill_id', 'collection_vendor_bill_id')
     def _compute_billing_status(self):
         """Calcula estado y monto facturado al proveedor.
@@ -115,15 +176,20 @@ class SalespersonCommission(models.Model):
             else:
                 rec.billing_status = 'pending'
 
-    @api.depends(
-        'invoice_vendor_bill_id.payment_state',
-        'collection_vendor_bill_id.payment_state',
-    )
+    # Por qué: Solo depende del vínculo. Los cambios de payment_state del bill
+    # se propagan con SQL en _sync_payment_status_from_bills — como dependencia
+    # del ORM, pagar un bill de 8.000 comisiones las recalculaba de a una.
+    @api.depends('invoice_vendor_bill_id', 'collection_vendor_bill_id')
     def _compute_payment_status(self):
         """Calcula estado y monto pagado al proveedor.
 
-        Por qué: Depende del payment_state de cada bill vinculado.
-        Solo suma la porción si el bill está paid/in_payment.
+        Por qué: Solo se dispara al vincular/desvincular un bill (incluye el
+        paso a borrador). Los cambios de pago los empuja únicamente
+        _sync_payment_status_from_bills, llamado desde los hooks create/unlink
+        de account.partial.reconcile: pagos, desconciliación y reversión con
+        NC. in_payment → paid no cambia el resultado (ambos cuentan como pago).
+        Solo suma la porción si el bill está paid/in_payment; debe coincidir
+        con _sync_payment_status_from_bills.
         """
         paid_states = ('paid', 'in_payment')
         for rec in self:
@@ -146,6 +212,124 @@ class SalespersonCommission(models.Model):
             else:
                 rec.payment_status = 'pending'
 
+    def _log_accrued_events(self, source, sign=1):
+        """Registra en el libro las porciones devengadas de estas comisiones."""
+        Event = self.env['salesperson.commission.event']
+        Event._log(self.filtered(lambda c: c.invoice_status == 'accrued'),
+                   'invoice', source, sign=sign)
+        Event._log(self.filtered(lambda c: c.collection_status == 'accrued'),
+                   'collection', source, sign=sign)
+
+    @api.model
+    def _sync_payment_status_from_bills(self, bills):
+        """Recalcula paid_amount/payment_status de las comisiones de estos bills.
+
+        Patrón: Set-based — un solo UPDATE para todas las comisiones vinculadas
+        a los bills (por cualquiera de las dos porciones), con el mismo
+        resultado que _compute_payment_status. Solo escribe las filas cuyo
+        estado o monto cambió.
+
+        Returns: salesperson.commission actualizadas
+        """
+        bill_ids = tuple(bills.ids)
+        if not bill_ids:
+            return self.browse()
+        self.env['account.move'].flush_model(['payment_state'])
+        self.flush_model([
+            'invoice_vendor_bill_id', 'collection_vendor_bill_id',
+            'invoice_commission', 'collection_commission',
+            'payment_status', 'paid_amount',
+        ])
+        self.env.cr.execute("""
+            UPDATE salesperson_commission c
+               SET paid_amount = s.paid_amount,
+                   payment_status = s.payment_status
+              FROM (
+                    SELECT c2.id,
+                           CASE WHEN s2.inv_paid THEN COALESCE(c2.invoice_commission, 0) ELSE 0 END
+                         + CASE WHEN s2.col_paid THEN COALESCE(c2.collection_commission, 0) ELSE 0 END
+                               AS paid_amount,
+                           CASE WHEN s2.inv_paid AND s2.col_paid THEN 'paid'
+                                WHEN s2.inv_paid OR s2.col_paid THEN 'partial'
+                                ELSE 'pending' END AS payment_status
+                      FROM salesperson_commission c2
+                 LEFT JOIN account_move ib ON ib.id = c2.invoice_vendor_bill_id
+                 LEFT JOIN account_move cb ON cb.id = c2.collection_vendor_bill_id
+                 CROSS JOIN LATERAL (
+                        SELECT COALESCE(ib.payment_state IN %(paid)s, FALSE) AS inv_paid,
+                               COALESCE(cb.payment_state IN %(paid)s, FALSE) AS col_paid
+                    ) s2
+                     WHERE c2.invoice_vendor_bill_id IN %(bills)s
+                        OR c2.collection_vendor_bill_id IN %(bills)s
+                   ) s
+             WHERE c.id = s.id
+               AND (c.paid_amount IS DISTINCT FROM s.paid_amount
+                    OR c.payment_status IS DISTINCT FROM s.payment_status)
+         RETURNING c.id
+        """, {'paid': ('paid', 'in_payment'), 'bills': bill_ids})
+        commissions = self.browse(row[0] for row in self.env.cr.fetchall())
+        # Por qué: El UPDATE no pasa por el ORM → invalidar el cache de las filas
+        # tocadas y los KPIs del tablero
+        commissions.invalidate_recordset(['paid_amount', 'payment_status'])
+        if commissions:
+            self.env['salesperson.commission.dashboard']._bump_stamp()
+        return commissions
+
+    @api.model
+    def _backfill_zone_ids(self, chunk_size=5000):
+        """Completa zone_id de las comisiones generadas antes de guardarlo.
+
+        Por qué: Sin zona, el análisis agrupa esas comisiones como "sin zona".
+        Se usa la zona actual del cliente (la del momento de la factura no
+        quedó registrada). Corre en la migración a 17.0.1.1.0; desde línea de
+        comandos:
+
+            odoo shell -d <db> <<< "env['salesperson.commission']._backfill_zone_ids(); env.cr.commit()"
+
+        Patrón: Una query trae los clientes distintos sin zona (activas y
+        archivadas); se resuelven con _resolve_zones en tandas de chunk_size
+        y cada tanda se aplica con un UPDATE ... FROM (VALUES ...) por tabla.
+
+        Returns: cantidad de comisiones actualizadas
+        """
+        self.flush_model(['zone_id', 'partner_id'])
+        cr = self.env.cr
+        cr.execute("""
+            SELECT DISTINCT partner_id
+              FROM salesperson_commission_all
+             WHERE zone_id IS NULL AND partner_id IS NOT NULL
+        """)
+        partner_ids = [row[0] for row in cr.fetchall()]
+        Zone = self.env['commission.zone']
+
+        total = 0
+        for start in range(0, len(partner_ids), chunk_size):
+            partners = self.env['res.partner'].browse(partner_ids[start:start + chunk_size])
+            values = [
+                (partner_id, zone.id)
+                for partner_id, zone in Zone._resolve_zones(partners).items() if zone
+            ]
+            if not values:
+                continue
+            for table in ('salesperson_commission', 'salesperson_commission_archive'):
+                cr.execute(f"""
+                    UPDATE {table} c
+                       SET zone_id = v.zone_id
+                      FROM (VALUES {', '.join(['%s'] * len(values))}) AS v(partner_id, zone_id)
+                     WHERE c.partner_id = v.partner_id
+                       AND c.zone_id IS NULL
+                """, values)
+                total += cr.rowcount
+            # Por qué: Sin esto el cache crece con cada tanda de clientes
+            partners.invalidate_recordset()
+
+        if total:
+            # Por qué: El UPDATE no pasa por el ORM
+            self.invalidate_model(['zone_id'])
+            self.env['salesperson.commission.report']._refresh()
+        _logger.info('Zonas de comisiones completadas: %s comisiones', total)
+        return total
+
     def action_view_vendor_bills(self):
         """Smart button: muestra las facturas de proveedor vinculadas."""
         self.ensure_one()
@@ -0,0 +1,323 @@
+import logging
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import models, fields, api
+from odoo.tools.sql import add_foreign_key, create_unique_index, get_foreign_keys
+
+_logger = logging.getLogger(__name__)
+
+ARCHIVE_MONTHS_PARAM = 'surtecnica_custom_comisiones.archive_months'
+
+# Por qué: Columnas que se mueven entre la tabla activa y el archivo. Lista
+# explícita (no SELECT *) para que la vista unificada no dependa de columnas
+# que otros módulos agreguen a salesperson_commission.
+_ARCHIVE_COLUMNS = (
+    ('id', 'integer NOT NULL'),
+    ('move_id', 'integer'),
+    ('salesperson_id', 'integer'),
+    ('rule_id', 'integer'),
+    ('zone_id', 'integer'),
+    ('partner_id', 'integer'),
+    ('base_amount', 'numeric'),
+    ('commission_percentage', 'numeric'),
+    ('commission_amount', 'numeric'),
+    ('invoice_commission', 'numeric'),
+    ('collection_commission', 'numeric'),
+    ('invoice_status', 'varchar'),
+    ('collection_status', 'varchar'),
+    ('currency_id', 'integer'),
+    ('date', 'date NOT NULL'),
+    ('company_id', 'integer'),
+    ('move_type', 'varchar'),
+    ('invoice_vendor_bill_id', 'integer'),
+    ('collection_vendor_bill_id', 'integer'),
+    ('billing_status', 'varchar'),
+    ('payment_status', 'varchar'),
+    ('billed_amount', 'numeric'),
+    ('paid_amount', 'numeric'),
+    ('create_uid', 'integer'),
+    ('create_date', 'timestamp'),
+    ('write_uid', 'integer'),
+    ('write_date', 'timestamp'),
+)
+_COLUMN_NAMES = ', '.join(name for name, _type in _ARCHIVE_COLUMNS)
+
+# Por qué: Mismas FK y ondelete que la tabla activa → borrar una regla, zona
+# o bill no deja ids colgando en los Many2one del archivo
+_ARCHIVE_FOREIGN_KEYS = (
+    ('move_id', 'account_move', 'cascade'),
+    ('salesperson_id', 'res_users', 'restrict'),
+    ('rule_id', 'salesperson_commission_rule', 'set null'),
+    ('zone_id', 'commission_zone', 'set null'),
+    ('partner_id', 'res_partner', 'set null'),
+    ('currency_id', 'res_currency', 'set null'),
+    ('company_id', 'res_company', 'set null'),
+    ('invoice_vendor_bill_id', 'account_move', 'set null'),
+    ('collection_vendor_bill_id', 'account_move', 'set null'),
+)
+
+# Por qué: Liquidada = ambas porciones devengadas, facturadas y pagadas al
+# vendedor. Nada en el flujo diario vuelve a tocar estas filas.
+_SETTLED_WHERE = """
+    invoice_status = 'accrued' AND collection_status = 'accrued'
+    AND billing_status = 'billed' AND payment_status = 'paid'
+    AND date < %(cutoff)s
+"""
+
+
+class SalespersonCommissionArchive(models.Model):
+    """Comisiones liquidadas movidas fuera de la tabla activa.
+
+    Patrón: Tabla particionada por año (PARTITION BY RANGE date) + vista
+    unificada salesperson_commission_all (activa UNION ALL archivo). El
+    trabajo diario (devengados pendientes, "Sin Facturar Prov.", wizard)
+    solo lee la tabla activa, que junto con sus índices queda chica; los
+    reportes leen la vista unificada.
+
+    Los ids se conservan al archivar/restaurar. Solo lectura desde el ORM.
+    """
+    _name = 'salesperson.commission.archive'
+    _description = 'Comisión Archivada'
+    _auto = False
+    _table = 'salesperson_commission_archive'
+    _order = 'date desc, id desc'
+
+    move_id = fields.Many2one('account.move', string='Factura', readonly=True)
+    salesperson_id = fields.Many2one('res.users', string='Vendedor', readonly=True)
+    rule_id = fields.Many2one(
+        'salesperson.commission.rule', string='Regla Aplicada', readonly=True)
+    zone_id = fields.Many2one('commission.zone', string='Zona', readonly=True)
+    partner_id = fields.Many2one('res.partner', string='Cliente', readonly=True)
+    base_amount = fields.Monetary(string='Monto Base (sin IVA)', readonly=True)
+    commission_percentage = fields.Float(
+        string='Comisión (%)', digits=(5, 2), readonly=True)
+    commission_amount = fields.Monetary(string='Comisión Total (100%)', readonly=True)
+    invoice_commission = fields.Monetary(
+        string='Comisión Facturación (50%)', readonly=True)
+    collection_commission = fields.Monetary(
+        string='Comisión Cobro (50%)', readonly=True)
+    currency_id = fields.Many2one('res.currency', string='Moneda', readonly=True)
+    date = fields.Date(string='Fecha', readonly=True)
+    company_id = fields.Many2one('res.company', string='Compañía', readonly=True)
+    move_type = fields.Selection([
+        ('out_invoice', 'Factura'),
+        ('out_refund', 'Nota de Crédito'),
+    ], string='Tipo', readonly=True)
+    invoice_vendor_bill_id = fields.Many2one(
+        'account.move', string='Fact. Prov. (Facturación)', readonly=True)
+    collection_vendor_bill_id = fields.Many2one(
+        'account.move', string='Fact. Prov. (Cobro)', readonly=True)
+    billed_amount = fields.Monetary(string='Monto Facturado', readonly=True)
+    paid_amount = fields.Monetary(string='Monto Pagado', readonly=True)
+    archive_date = fields.Date(string='Fecha de Archivo', readonly=True)
+
+    def init(self):
+        cr = self.env.cr
+        columns = ',\n'.join(f'{name} {sql_type}' for name, sql_type in _ARCHIVE_COLUMNS)
+        cr.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self._table} (
+                {columns},
+                archive_date date,
+                PRIMARY KEY (id, date)
+            ) PARTITION BY RANGE (date)
+        """)
+        # Por qué: Índices en la tabla padre → se crean en cada partición.
+        # move_id: chequeo de facturas con comisiones archivadas; bills:
+        # restaurar al pasar a borrador una factura de proveedor.
+        for column in ('move_id', 'invoice_vendor_bill_id', 'collection_vendor_bill_id'):
+            cr.execute(
+                f"CREATE INDEX IF NOT EXISTS {self._table}_{column}_idx "
+                f"ON {self._table} ({column})")
+        cr.execute(
+            f"CREATE INDEX IF NOT EXISTS {self._table}_salesperson_date_idx "
+            f"ON {self._table} (salesperson_id, date)")
+        # Por qué: Misma clave única que la tabla activa; un índice único de
+        # una tabla particionada tiene que incluir la columna de partición
+        # (date, que es la misma para todas las comisiones de una factura)
+        create_unique_index(
+            cr, f'{self._table}_move_rule_percentage_uniq', self._table,
+            ['move_id', 'COALESCE(rule_id, 0)', 'commission_percentage', 'date'])
+        self._init_foreign_keys()
+        # Por qué: Sin CASCADE — la vista materializada del análisis depende
+        # de la unificada; se borra explícitamente y se recrea acá, así
+        # ninguna otra vista dependiente desaparece sin aviso
+        Report = self.env['salesperson.commission.report']
+        cr.execute(f"DROP MATERIALIZED VIEW IF EXISTS {Report._table}")
+        cr.execute("DROP VIEW IF EXISTS salesperson_commission_all")
+        cr.execute(f"""
+            CREATE VIEW salesperson_commission_all AS (
+                SELECT {_COLUMN_NAMES} FROM salesperson_commission
+                 UNION ALL
+                SELECT {_COLUMN_NAMES} FROM {self._table}
+            )
+        """)
+        Report._create_view()
+
+    def _init_foreign_keys(self):
+        """Agrega las FK del archivo que falten (tablas creadas sin ellas).
+
+        Por qué: Las filas archivadas antes de tener FK pueden apuntar a
+        registros ya borrados; se limpian como lo habría hecho la FK.
+        """
+        cr = self.env.cr
+        for column, foreign_table, ondelete in _ARCHIVE_FOREIGN_KEYS:
+            if get_foreign_keys(cr, self._table, column, foreign_table, 'id', ondelete):
+                continue
+            dangling = f"""
+                {column} IS NOT NULL AND NOT EXISTS (
+                    SELECT 1 FROM {foreign_table} f WHERE f.id = {self._table}.{column})
+            """
+            if ondelete == 'cascade':
+                cr.execute(f"DELETE FROM {self._table} WHERE {dangling}")
+            else:
+                cr.execute(f"UPDATE {self._table} SET {column} = NULL WHERE {dangling}")
+            add_foreign_key(cr, self._table, column, foreign_table, 'id', ondelete)
+
+    @api.model
+    def _count_by_move(self, move_ids):
+        """Comisiones archivadas por factura de cliente o bill de proveedor.
+
+        Returns: dict {move_id: cantidad} — para un bill cuenta las comisiones
+        con alguna porción en él.
+        """
+        if not move_ids:
+            return {}
+        self.env.cr.execute(f"""
+            SELECT m.id, COUNT(*)
+              FROM unnest(%s) AS m(id)
+              JOIN {self._table} a
+                ON a.move_id = m.id
+                OR a.invoice_vendor_bill_id = m.id
+                OR a.collection_vendor_bill_id = m.id
+          GROUP BY m.id
+        """, (list(move_ids),))
+        return dict(self.env.cr.fetchall())
+
+    @api.model
+    def _ensure_partitions(self, years):
+        """Crea (si faltan) las particiones anuales del archivo."""
+        for year in sorted(years):
+            self.env.cr.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self._table}_{int(year)}
+                PARTITION OF {self._table}
+                FOR VALUES FROM ('{int(year)}-01-01') TO ('{int(year) + 1}-01-01')
+            """)
+
+    @api.model
+    def _cron_archive_settled(self):
+        """Cron diario: archiva con commit por tanda."""
+        return self._archive_settled(commit=True)
+
+    @api.model
+    def _archive_settled(self, months=None, batch_size=5000, commit=False):
+        """Mueve comisiones liquidadas y antiguas de la tabla activa al archivo.
+
+        months: antigüedad mínima; por defecto el parámetro ARCHIVE_MONTHS_PARAM
+        (0 o vacío = desactivado).
+
+        Patrón: DELETE ... RETURNING + INSERT en una sola sentencia por tanda
+        de batch_size filas (FOR UPDATE SKIP LOCKED: no espera filas que otra
+        transacción esté usando). La misma sentencia apunta los eventos del
+        libro de esas comisiones al archivo.
+
+        Returns: cantidad de comisiones archivadas
+        """
+        if months is None:
+            months = int(self.env['ir.config_parameter'].sudo().get_param(
+                ARCHIVE_MONTHS_PARAM) or 0)
+        if months <= 0:
+            return 0
+        today = fields.Date.context_today(self)
+        params = {'cutoff': today - relativedelta(months=months), 'today': today}
+
+        self.env['salesperson.commission'].flush_model()
+        self.env['salesperson.commission.event'].flush_model()
+        cr = self.env.cr
+        cr.execute(f"""
+            SELECT DISTINCT EXTRACT(YEAR FROM date)::int
+              FROM salesperson_commission
+             WHERE {_SETTLED_WHERE}
+        """, params)
+        self._ensure_partitions(row[0] for row in cr.fetchall())
+
+        total = 0
+        while True:
+            cr.execute(f"""
+                WITH moved AS (
+                    DELETE FROM salesperson_commission
+                     WHERE id IN (
+                            SELECT id FROM salesperson_commission
+                             WHERE {_SETTLED_WHERE}
+                          ORDER BY id
+                             LIMIT %(limit)s
+                               FOR UPDATE SKIP LOCKED)
+                 RETURNING {_COLUMN_NAMES}
+                ), archived AS (
+                    INSERT INTO {self._table} ({_COLUMN_NAMES}, archive_date)
+                    SELECT {_COLUMN_NAMES}, %(today)s FROM moved
+                 RETURNING id
+                ), relinked AS (
+                    UPDATE salesperson_commission_event e
+                       SET commission_model = %(model)s
+                      FROM archived
+                     WHERE e.commission_id = archived.id
+                       AND e.commission_model = 'salesperson.commission'
+                )
+                SELECT COUNT(*) FROM archived
+            """, dict(params, limit=batch_size, model=self._name))
+            count = cr.fetchone()[0]
+            if not count:
+                break
+            total += count
+            if commit:
+                cr.commit()
+        # Por qué: El SQL directo no pasa por el ORM (ej. account.move.commission_ids)
+        self.env.invalidate_all()
+        _logger.info('Archivo de comisiones: %s comisiones liquidadas archivadas', total)
+        return total
+
+    @api.model
+    def _restore_for_bills(self, bills):
+        """Devuelve a la tabla activa las comisiones archivadas de estos bills.
+
+        Por qué: Si un bill de comisiones pagado vuelve a borrador, sus
+        comisiones dejan de estar liquidadas y deben poder refacturarse.
+        Sus eventos del libro vuelven a apuntar a la tabla activa.
+        """
+        if not bills:
+            return 0
+        self.env['salesperson.commission.event'].flush_model()
+        self.env.cr.execute(f"""
+            WITH moved AS (
+                DELETE FROM {self._table}
+                 WHERE invoice_vendor_bill_id IN %(bills)s
+                    OR collection_vendor_bill_id IN %(bills)s
+             RETURNING {_COLUMN_NAMES}
+            ), restored AS (
+                INSERT INTO salesperson_commission ({_COLUMN_NAMES})
+                SELECT {_COLUMN_NAMES} FROM moved
+             RETURNING id
+            ), relinked AS (
+                UPDATE salesperson_commission_event e
+                   SET commission_model = 'salesperson.commission'
+                  FROM restored
+                 WHERE e.commission_id = restored.id
+                   AND e.commission_model = %(model)s
+            )
+            SELECT COUNT(*) FROM restored
+        """, {'bills': tuple(bills.ids), 'model': self._name})
+        count = self.env.cr.fetchone()[0]
+        if count:
+            self.env.invalidate_all()
+        return count
+
+    @api.model
+    def _get_archived_move_ids(self, move_ids):
+        """Facturas (de move_ids) que tienen comisiones archivadas."""
+        if not move_ids:
+            return set()
+        self.env.cr.execute(
+            f"SELECT DISTINCT move_id FROM {self._table} WHERE move_id IN %s",
+            (tuple(move_ids),))
+        return {row[0] for row in self.env.cr.fetchall()}
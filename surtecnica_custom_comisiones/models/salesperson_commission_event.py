@@ -0,0 +1,354 @@
+import logging
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+# Por qué: Comisiones activas y archivadas con el modelo que las referencia
+# desde el libro (commission_model)
+_COMMISSIONS_WITH_MODEL = """
+    SELECT id, 'salesperson.commission' AS model, move_id, salesperson_id,
+           company_id, currency_id, move_type, date, invoice_status,
+           collection_status, invoice_commission, collection_commission
+      FROM salesperson_commission
+     UNION ALL
+    SELECT id, 'salesperson.commission.archive', move_id, salesperson_id,
+           company_id, currency_id, move_type, date, invoice_status,
+           collection_status, invoice_commission, collection_commission
+      FROM salesperson_commission_archive
+"""
+
+
+class SalespersonCommissionEvent(models.Model):
+    """Libro append-only de devengamientos de comisión.
+
+    Un evento por cada cambio de estado de una porción (50% facturación /
+    50% cobro): al confirmar, al cobrar, por NC y al revertir un cobro.
+    Nunca se edita ni se borra: el saldo a una fecha es la suma de eventos.
+
+    Por qué: invoice_status/collection_status se pisan en el lugar; sin este
+    libro no se puede reconstruir cuánto tenía devengado un vendedor a una
+    fecha pasada.
+
+    La fecha es la de registro del evento (nunca retroactiva), así los
+    snapshots de meses cerrados no cambian. Única excepción: los eventos de
+    saldo inicial (ver _log_opening_balances).
+    """
+    _name = 'salesperson.commission.event'
+    _description = 'Evento de Devengamiento de Comisión'
+    _order = 'date desc, id desc'
+
+    # Por qué: Referencia sin FK — la comisión puede vivir en la tabla activa
+    # o en el archivo (salesperson.commission.archive) y conserva su id al
+    # moverse; una FK a salesperson_commission perdería el vínculo al archivar.
+    commission_model = fields.Char(
+        string='Modelo de Comisión', default='salesperson.commission',
+        readonly=True)
+    commission_id = fields.Many2oneReference(
+        string='Comisión', model_field='commission_model',
+        index='btree_not_null', readonly=True)
+    move_id = fields.Many2one(
+        'account.move', string='Factura', ondelete='set null', readonly=True)
+    salesperson_id = fields.Many2one(
+        'res.users', string='Vendedor', required=True, readonly=True)
+    company_id = fields.Many2one(
+        'res.company', string='Compañía', readonly=True)
+    currency_id = fields.Many2one(
+        'res.currency', string='Moneda', readonly=True)
+    portion = fields.Selection([
+        ('invoice', 'Facturación (50%)'),
+        ('collection', 'Cobro (50%)'),
+    ], string='Porción', required=True, readonly=True)
+    amount = fields.Monetary(string='Monto', readonly=True)
+    date = fields.Date(string='Fecha', required=True, readonly=True)
+    source = fields.Selection([
+        ('post', 'Confirmación'),
+        ('payment', 'Cobro'),
+        ('refund', 'Nota de Crédito'),
+        ('reset', 'Reversión'),
+        ('recompute', 'Recálculo'),
+        ('opening', 'Saldo Inicial'),
+    ], string='Origen', required=True, readonly=True)
+
+    def init(self):
+        cr = self.env.cr
+        # Por qué: Saldo a fecha = rango indexado por vendedor/compañía/fecha
+        tools.create_index(
+            cr, 'salesperson_commission_event_balance_idx',
+            self._table, ['salesperson_id', 'company_id', 'date'])
+        # Por qué: commission_id era Many2one; su FK (ON DELETE SET NULL)
+        # borraba el vínculo al archivar y el ORM no la quita sola
+        cr.execute(f"""
+            ALTER TABLE {self._table}
+            DROP CONSTRAINT IF EXISTS {self._table}_commission_id_fkey
+        """)
+        # Por qué: Re-vincula los eventos que esa FK dejó sin comisión, cuando
+        # la factura tiene una sola comisión archivada (sin ambigüedad)
+        cr.execute(f"""
+            UPDATE {self._table} e
+               SET commission_id = a.id,
+                   commission_model = 'salesperson.commission.archive'
+              FROM salesperson_commission_archive a
+             WHERE e.commission_id IS NULL
+               AND a.move_id = e.move_id
+               AND NOT EXISTS (
+                    SELECT 1 FROM salesperson_commission_archive a2
+                     WHERE a2.move_id = a.move_id AND a2.id <> a.id)
+               AND NOT EXISTS (
+                    SELECT 1 FROM salesperson_commission c WHERE c.move_id = e.move_id)
+        """)
+        self._log_opening_balances()
+
+    def _log_opening_balances(self):
+        """Registra el saldo inicial de lo devengado antes de existir el libro.
+
+        Por qué: Las comisiones generadas antes de instalar el libro no tienen
+        eventos; sin esto su devengado no aparece en los saldos a fecha.
+
+        Patrón: Un INSERT ... SELECT por (comisión, porción) cuyo devengado
+        actual difiere de la suma de sus eventos. Idempotente: corre en cada
+        actualización del módulo y una porción con saldo inicial no recibe
+        otro. La fecha es la del devengado original (factura; último pago
+        para el cobro) → se rehacen, en la misma transacción, solo los
+        snapshots desde la fecha del evento más antiguo.
+
+        Returns: cantidad de eventos registrados
+        """
+        cr = self.env.cr
+        cr.execute(f"""
+            WITH expected AS (
+                SELECT c.*, p.portion,
+                       CASE WHEN p.portion = 'invoice' THEN
+                                CASE WHEN c.invoice_status = 'accrued'
+                                     THEN c.invoice_commission ELSE 0 END
+                            ELSE
+                                CASE WHEN c.collection_status = 'accrued'
+                                     THEN c.collection_commission ELSE 0 END
+                       END AS accrued
+                  FROM ({_COMMISSIONS_WITH_MODEL}) c
+            CROSS JOIN (VALUES ('invoice'), ('collection')) AS p(portion)
+                 WHERE c.salesperson_id IS NOT NULL
+            ), logged AS (
+                SELECT commission_id, commission_model, portion,
+                       SUM(amount) AS amount,
+                       BOOL_OR(source = 'opening') AS has_opening
+                  FROM {self._table}
+                 WHERE commission_id IS NOT NULL
+              GROUP BY commission_id, commission_model, portion
+            ), inserted AS (
+            INSERT INTO {self._table}
+                (commission_id, commission_model, move_id, salesperson_id,
+                 company_id, currency_id, portion, amount, date, source,
+                 create_uid, write_uid, create_date, write_date)
+            SELECT x.id, x.model, x.move_id, x.salesperson_id,
+                   x.company_id, x.currency_id, x.portion,
+                   x.accrued - COALESCE(l.amount, 0),
+                   COALESCE(CASE WHEN x.portion = 'collection' AND x.move_type = 'out_invoice'
+                                 THEN (SELECT MAX(apr.max_date)
+                                         FROM account_move_line aml
+                                         JOIN account_partial_reconcile apr
+                                           ON aml.id IN (apr.debit_move_id, apr.credit_move_id)
+                                        WHERE aml.move_id = x.move_id)
+                            END, x.date, CURRENT_DATE),
+                   'opening',
+                   %(uid)s, %(uid)s, NOW() AT TIME ZONE 'UTC', NOW() AT TIME ZONE 'UTC'
+              FROM expected x
+         LEFT JOIN logged l
+                ON l.commission_id = x.id
+               AND l.commission_model = x.model
+               AND l.portion = x.portion
+             WHERE NOT COALESCE(l.has_opening, FALSE)
+               AND ABS(x.accrued - COALESCE(l.amount, 0)) >= 0.005
+         RETURNING date
+            )
+            SELECT COUNT(*), MIN(date) FROM inserted
+        """, {'uid': self.env.uid})
+        count, first_date = cr.fetchone()
+        if count:
+            _logger.info('Libro de comisiones: %s eventos de saldo inicial', count)
+            self.env['salesperson.commission.snapshot']._rebuild_snapshots_from(first_date)
+        return count
+
+    def write(self, vals):
+        raise UserError(_('Los eventos de devengamiento no se pueden modificar.'))
+
+    def unlink(self):
+        raise UserError(_('Los eventos de devengamiento no se pueden borrar.'))
+
+    @api.model
+    def _log(self, commissions, portion, source, sign=1):
+        """Registra un evento por comisión para la porción indicada.
+
+        Patrón: Un único create() multi-vals por lote de comisiones.
+        sign=-1 para reversiones (el monto se resta del saldo).
+        """
+        if not commissions:
+            return self
+        amount_field = 'invoice_commission' if portion == 'invoice' else 'collection_commission'
+        today = fields.Date.context_today(self)
+        # Por qué: sudo — el libro lo escribe el sistema, no el usuario que postea
+        return self.sudo().create([{
+            'commission_id': comm.id,
+            'move_id': comm.move_id.id,
+            'salesperson_id': comm.salesperson_id.id,
+            'company_id': comm.company_id.id,
+            'currency_id': comm.currency_id.id,
+            'portion': portion,
+            'amount': sign * comm[amount_field],
+            'date': today,
+            'source': source,
+        } for comm in commissions])
+
+    @api.model
+    def _get_balance_as_of(self, salesperson, date, company=None):
+        """Saldo devengado de un vendedor a una fecha.
+
+        Patrón: Último snapshot mensual <= fecha + eventos posteriores hasta la
+        fecha (a lo sumo un mes de eventos, rango indexado).
+
+        Returns: dict {'invoice': monto, 'collection': monto, 'total': monto}
+        """
+        company = company or self.env.company
+        date = fields.Date.to_date(date)
+        self.flush_model()
+        cr = self.env.cr
+        cr.execute("""
+            SELECT date, invoice_balance, collection_balance
+              FROM salesperson_commission_snapshot
+             WHERE salesperson_id = %s AND company_id = %s AND date <= %s
+          ORDER BY date DESC
+             LIMIT 1
+        """, (salesperson.id, company.id, date))
+        row = cr.fetchone()
+        snapshot_date, invoice_balance, collection_balance = row or (None, 0.0, 0.0)
+
+        cr.execute("""
+            SELECT portion, SUM(amount)
+              FROM salesperson_commission_event
+             WHERE salesperson_id = %s AND company_id = %s
+               AND date <= %s AND (%s IS NULL OR date > %s)
+          GROUP BY portion
+        """, (salesperson.id, company.id, date, snapshot_date, snapshot_date))
+        for portion, amount in cr.fetchall():
+            if portion == 'invoice':
+                invoice_balance += amount
+            else:
+                collection_balance += amount
+        return {
+            'invoice': invoice_balance,
+            'collection': collection_balance,
+            'total': invoice_balance + collection_balance,
+        }
+
+
+class SalespersonCommissionSnapshot(models.Model):
+    """Saldo devengado acumulado por vendedor al cierre de cada mes.
+
+    Por qué: Evita sumar todo el libro para un saldo a fecha — se parte del
+    snapshot del último cierre y solo se suman los eventos posteriores.
+    """
+    _name = 'salesperson.commission.snapshot'
+    _description = 'Snapshot de Devengamiento de Comisiones'
+    _order = 'date desc, salesperson_id'
+
+    salesperson_id = fields.Many2one(
+        'res.users', string='Vendedor', required=True, readonly=True)
+    company_id = fields.Many2one(
+        'res.company', string='Compañía', readonly=True)
+    currency_id = fields.Many2one(
+        related='company_id.currency_id', string='Moneda')
+    date = fields.Date(string='Cierre', required=True, readonly=True)
+    invoice_balance = fields.Monetary(
+        string='Acumulado Facturación', readonly=True)
+    collection_balance = fields.Monetary(
+        string='Acumulado Cobro', readonly=True)
+
+    _sql_constraints = [
+        ('unique_snapshot',
+         'UNIQUE(salesperson_id, company_id, date)',
+         'Ya existe un snapshot para este vendedor y fecha.'),
+    ]
+
+    @api.model
+    def _rebuild_snapshots_from(self, date):
+        """Rehace los snapshots con cierre en o después de date.
+
+        Por qué: Un evento con fecha pasada solo desactualiza los cierres
+        desde esa fecha; los anteriores siguen valiendo y no se recalculan.
+        Borrado y reconstrucción en la misma transacción → nunca se lee un
+        hueco en los saldos.
+        """
+        # Por qué: Al instalar, el libro se inicializa antes de crear la
+        # tabla de snapshots; el cron los arma cuando exista
+        if not tools.table_exists(self.env.cr, self._table):
+            return
+        self.env.cr.execute(
+            f"DELETE FROM {self._table} WHERE date >= %s", (date,))
+        self._cron_build_snapshots()
+
+    @api.model
+    def _cron_build_snapshots(self):
+        """Cron: crea los snapshots de los meses cerrados que falten.
+
+        Cada snapshot = snapshot del mes anterior + eventos del mes, con un
+        INSERT ... SELECT por mes. Los vendedores sin eventos en el mes
+        arrastran el saldo anterior.
+        """
+        self.env['salesperson.commission.event'].flush_model()
+        cr = self.env.cr
+        last_closed = fields.Date.context_today(self).replace(day=1) - relativedelta(days=1)
+
+        cr.execute("SELECT MAX(date) FROM salesperson_commission_snapshot")
+        previous = cr.fetchone()[0]
+        if previous:
+            period_end = previous + relativedelta(day=31, months=1)
+        else:
+            cr.execute("SELECT MIN(date) FROM salesperson_commission_event")
+            first_event = cr.fetchone()[0]
+            if not first_event:
+                return
+            period_end = first_event + relativedelta(day=31)
+
+        while period_end <= last_closed:
+            cr.execute("""
+                INSERT INTO salesperson_commission_snapshot
+                    (salesperson_id, company_id, date, invoice_balance,
+                     collection_balance, create_uid, write_uid, create_date, write_date)
+                SELECT k.salesperson_id, k.company_id, %(date)s,
+                       COALESCE(p.invoice_balance, 0) + COALESCE(e.invoice_amount, 0),
+                       COALESCE(p.collection_balance, 0) + COALESCE(e.collection_amount, 0),
+                       %(uid)s, %(uid)s, NOW() AT TIME ZONE 'UTC', NOW() AT TIME ZONE 'UTC'
+                  FROM (
+                        SELECT salesperson_id, company_id
+                          FROM salesperson_commission_snapshot WHERE date = %(prev)s
+                         UNION
+                        SELECT salesperson_id, company_id
+                          FROM salesperson_commission_event
+                         WHERE date > %(prev_or_min)s AND date <= %(date)s
+                       ) k
+             LEFT JOIN salesperson_commission_snapshot p
+                    ON p.salesperson_id = k.salesperson_id
+                   AND p.company_id IS NOT DISTINCT FROM k.company_id
+                   AND p.date = %(prev)s
+             LEFT JOIN (
+                        SELECT salesperson_id, company_id,
+                               SUM(CASE WHEN portion = 'invoice' THEN amount ELSE 0 END) AS invoice_amount,
+                               SUM(CASE WHEN portion = 'collection' THEN amount ELSE 0 END) AS collection_amount
+                          FROM salesperson_commission_event
+                         WHERE date > %(prev_or_min)s AND date <= %(date)s
+                      GROUP BY salesperson_id, company_id
+                       ) e
+                    ON e.salesperson_id = k.salesperson_id
+                   AND e.company_id IS NOT DISTINCT FROM k.company_id
+            """, {
+                'date': period_end,
+                'prev': previous,
+                'prev_or_min': previous or fields.Date.to_date('1900-01-01'),
+                'uid': self.env.uid,
+            })
+            previous = period_end
+            period_end = period_end + relativedelta(day=31, months=1)
+        self.invalidate_model()
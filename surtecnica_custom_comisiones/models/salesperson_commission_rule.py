@@ -1,4 +1,11 @@
-from odoo import models, fields, api
+from odoo import models, fields, api, tools
+
+from .commission_perf_sample import instrumented
+
+# Por qué: Orden de prueba de combinaciones (partner, zona, producto, categoría).
+# Recorrer las 16 máscaras de bits de mayor a menor equivale a ordenar por
+# puntaje de especificidad (8/4/2/1): la primera clave que existe gana.
+_SPECIFICITY_MASKS = tuple(range(15, -1, -1))
 
 
 class SalespersonCommissionRule(models.Model):
@@ -10,7 +17,8 @@ class SalespersonCommissionRule(models.Model):
       product_id presente          → +2 puntos
       product_category_id presente → +1 punto
 
-    Una sola query con ORDER BY campos DESC resuelve la prioridad.
+    Las reglas de cada (compañía, vendedor) se compilan en un índice en
+    memoria cacheado en el registry; la búsqueda no ejecuta SQL.
     """
     _name = 'salesperson.commission.rule'
     _description = 'Regla de Comisión de Vendedor'
@@ -51,6 +59,13 @@ class SalespersonCommissionRule(models.Model):
          'Ya existe una regla para esta combinación.'),
     ]
 
+    def init(self):
+        # Por qué: La carga del índice de reglas filtra por vendedor + compañía
+        # (o global) y solo reglas activas
+        tools.create_index(
+            self.env.cr, 'salesperson_commission_rule_salesperson_company_idx',
+            self._table, ['salesperson_id', 'company_id'], where='active')
+
     @api.onchange('zone_country_id')
     def _onchange_zone_country_id(self):
         # Por qué: Al cambiar país, provincia y zona previas ya no son válidas
@@ -69,13 +84,132 @@ class SalespersonCommissionRule(models.Model):
             self.zone_country_id = self.zone_id.country_id
             self.zone_state_id = self.zone_id.state_id
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        # Por qué: El índice compilado queda obsoleto con cualquier cambio de reglas
+        self.env.registry.clear_cache()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        # Por qué: Incluye archivar/desarchivar (write de active)
+        self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env.registry.clear_cache()
+        return res
+
     @api.model
+    def _compile_rule_index(self, rows):
+        """Compila filas de reglas en un dict {clave: (rule_id, porcentaje)}.
+
+        Cada fila es (rule_id, company_id, partner_id, zone_id, product_id,
+        category_id, percentage) con False en los campos vacíos (comodín).
+        La clave es (partner_id, zone_id, product_id, category_id).
+
+        Por qué: Si una regla de la compañía y una global comparten clave,
+        gana la de la compañía (más específica).
+        """
+        index = {}
+        # Por qué: Globales primero → las de compañía pisan la misma clave
+        for row in sorted(rows, key=lambda r: (bool(r[1]), r[0])):
+            rule_id, _company_id, partner_id, zone_id, product_id, categ_id, pct = row
+            index[(partner_id, zone_id, product_id, categ_id)] = (rule_id, pct)
+        return index
+
+    @api.model
+    def _get_rule_index_domain(self, company_id, salesperson_id):
+        """Dominio de las reglas que entran al índice de un vendedor.
+
+        Por qué: Separado para que el test de planes de ejecución analice
+        exactamente la query que arma el ORM.
+        """
+        return [
+            ('salesperson_id', '=', salesperson_id),
+            ('company_id', 'in', [company_id, False]),
+        ]
+
+    @api.model
+    @tools.ormcache('company_id', 'salesperson_id')
+    def _get_rule_index(self, company_id, salesperson_id):
+        """Índice compilado de reglas activas de un vendedor en una compañía.
+
+        Patrón: ormcache — el cache vive en el registry y se invalida en todos
+        los workers con registry.clear_cache() (create/write/unlink).
+
+        Returns: dict {(partner, zone, product, category): (rule_id, %)}.
+        No mutar: es compartido entre llamadas.
+        """
+        rules = self.sudo().with_context(active_test=True).search(
+            self._get_rule_index_domain(company_id, salesperson_id))
+        rows = [
+            (r.id, r.company_id.id, r.partner_id.id, r.zone_id.id,
+             r.product_id.id, r.product_category_id.id, r.commission_percentage)
+            for r in rules
+        ]
+        return self._compile_rule_index(rows)
+
+    @api.model
+    def _lookup_rule_index(self, index, partner_id, zone_id, product_id, categ_id):
+        """Resuelve la regla más específica dentro de un índice compilado.
+
+        Prueba las 16 combinaciones valor/comodín en orden de puntaje
+        (partner 8 > zona 4 > producto 2 > categoría 1).
+
+        Returns: (rule_id, percentage) o (False, 0.0)
+        """
+        if not index:
+            return False, 0.0
+        values = (partner_id or False, zone_id or False,
+                  product_id or False, categ_id or False)
+        for mask in _SPECIFICITY_MASKS:
+            key = (
+                values[0] if mask & 8 else False,
+                values[1] if mask & 4 else False,
+                values[2] if mask & 2 else False,
+                values[3] if mask & 1 else False,
+            )
+            hit = index.get(key)
+            if hit:
+                return hit
+        return False, 0.0
+
+    @api.model
+    @instrumented('salesperson.commission.rule._resolve_commission_percentages',
+                  records=lambda self, keys, company=None: len(keys))
+    def _resolve_commission_percentages(self, keys, company=None):
+        """Resuelve muchas combinaciones de una sola pasada.
+
+        Cada clave es (salesperson_id, commercial_partner_id, zone_id,
+        product_id, category_id) con False en los campos vacíos. Se carga el
+        índice compilado de cada vendedor una sola vez (cacheado en el
+        registry) y las claves repetidas se resuelven una sola vez.
+
+        Returns: dict {clave: (rule_id, percentage)}
+        """
+        company_id = (company or self.env.company).id
+        indexes = {}
+        result = {}
+        for key in set(keys):
+            salesperson_id = key[0]
+            if salesperson_id not in indexes:
+                indexes[salesperson_id] = (
+                    self._get_rule_index(company_id, salesperson_id)
+                    if salesperson_id else {})
+            result[key] = self._lookup_rule_index(indexes[salesperson_id], *key[1:])
+        return result
+
+    @api.model
+    @instrumented('salesperson.commission.rule._get_commission_percentage',
+                  records=lambda self, *args: 1)
     def _get_commission_percentage(self, salesperson, partner, product, category, zone=None):
-        """Busca la regla más específica con una sola query ordenada por puntaje.
+        """Busca la regla más específica en el índice compilado del vendedor.
 
-        Patrón: Single-query specificity lookup — en vez de N búsquedas
-        secuenciales, usa domain con OR por campo y ordena por campos NOT NULL.
-        La regla más específica queda primera.
+        Patrón: Compiled rule index — las reglas del vendedor se cargan una vez
+        (ver _get_rule_index) y cada línea se resuelve en Python, sin SQL.
 
         Puntaje implícito por campo poblado:
           partner_id presente          → +8
@@ -87,25 +221,15 @@ class SalespersonCommissionRule(models.Model):
         """
         # Por qué: El commercial_partner_id agrupa contactos hijos bajo el partner comercial
         commercial_partner = partner.commercial_partner_id
-        zone_id = zone.id if zone else False
-        product_id = product.id if product else False
-
-        domain = [
-            ('salesperson_id', '=', salesperson.id),
-            ('company_id', 'in', [self.env.company.id, False]),
-            # Por qué: Cada OR permite matchear el valor exacto o vacío (wildcard)
-            '|', ('partner_id', '=', commercial_partner.id), ('partner_id', '=', False),
-            '|', ('zone_id', '=', zone_id), ('zone_id', '=', False),
-            '|', ('product_id', '=', product_id), ('product_id', '=', False),
-            '|', ('product_category_id', '=', category.id), ('product_category_id', '=', False),
-        ]
-        # Por qué: ORDER DESC pone los campos NOT NULL primero → más específica gana
-        rule = self.search(
-            domain,
-            order='partner_id DESC, zone_id DESC, product_id DESC, product_category_id DESC',
-            limit=1,
+        index = self._get_rule_index(self.env.company.id, salesperson.id)
+        rule_id, percentage = self._lookup_rule_index(
+            index,
+            commercial_partner.id,
+            zone.id if zone else False,
+            product.id if product else False,
+            category.id if category else False,
         )
-        if rule:
-            return rule, rule.commission_percentage
+        if rule_id:
+            return self.browse(rule_id), percentage
 
         return self.browse(), 0.0
@@ -0,0 +1,2 @@
+from . import salesperson_commission_report
+from . import salesperson_commission_dashboard
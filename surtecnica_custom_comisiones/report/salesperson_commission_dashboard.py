@@ -0,0 +1,153 @@
+import time
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import models, fields, api, tools, _
+
+# Por qué: Techo de antigüedad del cache. El sello se incrementa antes del
+# commit de quien cambia comisiones; otro worker podría cachear datos previos
+# con el sello nuevo, y el TTL acota ese desfase.
+KPI_CACHE_TTL = 300
+KPI_STAMP_SEQUENCE = 'salesperson_commission_kpi_seq'
+
+
+class SalespersonCommissionDashboard(models.TransientModel):
+    """Tablero de KPIs de comisiones por vendedor y mes.
+
+    Patrón: Cached aggregate — una sola query agrupada calcula pendiente,
+    devengado, facturado y pagado por (vendedor, mes) y el resultado queda en
+    ormcache. La clave incluye un sello (secuencia PostgreSQL incrementada al
+    crear comisiones o cambiar su estado) y un balde de tiempo de
+    KPI_CACHE_TTL segundos: reabrir el tablero sin cambios no recalcula.
+
+    Los registros son transitorios: se crean al abrir el tablero a partir
+    del resultado cacheado, marcados con la clave del cache (kpi_key). Mientras
+    la clave no cambie, reabrir el tablero reutiliza las mismas filas.
+    """
+    _name = 'salesperson.commission.dashboard'
+    _description = 'Tablero de Comisiones'
+    _order = 'date desc, salesperson_id'
+
+    salesperson_id = fields.Many2one('res.users', string='Vendedor', readonly=True)
+    date = fields.Date(string='Mes', readonly=True)
+    company_id = fields.Many2one('res.company', string='Compañía', readonly=True)
+    currency_id = fields.Many2one('res.currency', string='Moneda', readonly=True)
+    commission_count = fields.Integer(string='Comisiones', readonly=True)
+    pending_amount = fields.Monetary(string='Pendiente de Devengar', readonly=True)
+    accrued_amount = fields.Monetary(string='Devengado', readonly=True)
+    billed_amount = fields.Monetary(string='Facturado Prov.', readonly=True)
+    paid_amount = fields.Monetary(string='Pagado Prov.', readonly=True)
+    kpi_key = fields.Char(string='Clave de KPIs', readonly=True, index=True)
+
+    def init(self):
+        self.env.cr.execute(f"CREATE SEQUENCE IF NOT EXISTS {KPI_STAMP_SEQUENCE}")
+
+    @api.model
+    def _bump_stamp(self):
+        """Invalida los KPIs cacheados en todos los workers (una query)."""
+        self.env.cr.execute(f"SELECT nextval('{KPI_STAMP_SEQUENCE}')")
+
+    @api.model
+    def _get_kpi_key(self, months=12):
+        """Clave del cache de KPIs: (company_ids, date_from, stamp, bucket)."""
+        self.env['salesperson.commission'].flush_model()
+        self.env.cr.execute(f"SELECT last_value FROM {KPI_STAMP_SEQUENCE}")
+        stamp = self.env.cr.fetchone()[0]
+        bucket = int(time.time() // KPI_CACHE_TTL)
+        date_from = fields.Date.context_today(self).replace(day=1) - relativedelta(
+            months=months - 1)
+        return tuple(sorted(self.env.companies.ids)), date_from, stamp, bucket
+
+    @api.model
+    def _get_kpis(self, months=12):
+        """KPIs de los últimos `months` meses para las compañías activas.
+
+        Returns: tupla de tuplas (salesperson_id, month, company_id,
+        currency_id, count, pending, accrued, billed, paid)
+        """
+        return self._read_kpis(*self._get_kpi_key(months))
+
+    @api.model
+    @tools.ormcache('company_ids', 'date_from', 'stamp', 'bucket')
+    def _read_kpis(self, company_ids, date_from, stamp, bucket):
+        """Una query agrupada sobre comisiones activas y archivadas.
+
+        stamp/bucket solo forman parte de la clave del cache.
+        """
+        self.env.cr.execute("""
+            SELECT c.salesperson_id,
+                   date_trunc('month', c.date)::date,
+                   c.company_id,
+                   c.currency_id,
+                   COUNT(*),
+                   SUM(CASE WHEN c.invoice_status = 'pending'
+                            THEN c.invoice_commission ELSE 0 END
+                     + CASE WHEN c.collection_status = 'pending'
+                            THEN c.collection_commission ELSE 0 END),
+                   SUM(CASE WHEN c.invoice_status = 'accrued'
+                            THEN c.invoice_commission ELSE 0 END
+                     + CASE WHEN c.collection_status = 'accrued'
+                            THEN c.collection_commission ELSE 0 END),
+                   SUM(c.billed_amount),
+                   SUM(c.paid_amount)
+              FROM salesperson_commission_all c
+             WHERE c.company_id IN %s
+               AND c.date >= %s
+          GROUP BY c.salesperson_id, date_trunc('month', c.date),
+                   c.company_id, c.currency_id
+        """, (company_ids, date_from))
+        return tuple(self.env.cr.fetchall())
+
+    @api.model
+    def _get_rows(self, kpi_key):
+        """Filas del tablero ya creadas por este usuario para la clave.
+
+        Por qué: Dos aperturas simultáneas pueden crear dos juegos de filas
+        con la misma clave; se toma una fila por (vendedor, mes, compañía,
+        moneda) para no mostrar tarjetas repetidas.
+        """
+        self.env.cr.execute(f"""
+            SELECT MIN(id)
+              FROM {self._table}
+             WHERE kpi_key = %s AND create_uid = %s
+          GROUP BY salesperson_id, date, company_id, currency_id
+        """, (kpi_key, self.env.uid))
+        return self.browse(row[0] for row in self.env.cr.fetchall())
+
+    @api.model
+    def action_open_dashboard(self):
+        """Abre el tablero; crea sus filas desde el cache solo si cambió la clave.
+
+        Por qué: Crear 12 meses × vendedores filas transitorias en cada
+        apertura escribe en la base aunque los KPIs no hayan cambiado.
+        """
+        key = self._get_kpi_key()
+        kpi_key = repr(key)
+        records = self._get_rows(kpi_key)
+        if not records:
+            records = self._create_rows(kpi_key, self._read_kpis(*key))
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Tablero de Comisiones'),
+            'res_model': self._name,
+            'view_mode': 'kanban,tree,pivot',
+            'domain': [('id', 'in', records.ids)],
+            'context': {'search_default_group_salesperson': 1},
+        }
+
+    @api.model
+    def _create_rows(self, kpi_key, kpis):
+        """Crea una fila por tupla de _read_kpis, marcada con la clave."""
+        return self.create([{
+            'salesperson_id': salesperson_id,
+            'date': month,
+            'company_id': company_id,
+            'currency_id': currency_id,
+            'commission_count': count,
+            'pending_amount': pending,
+            'accrued_amount': accrued,
+            'billed_amount': billed,
+            'paid_amount': paid,
+            'kpi_key': kpi_key,
+        } for (salesperson_id, month, company_id, currency_id,
+               count, pending, accrued, billed, paid) in kpis])
@@ -0,0 +1,130 @@
+from odoo import models, fields, api, _
+from odoo.tools import format_datetime
+
+
+class SalespersonCommissionReport(models.Model):
+    """Análisis de comisiones pre-agregado por vendedor/cliente/zona/regla/mes.
+
+    Patrón: Materialized view (_auto = False) — pivot y gráfico leen filas ya
+    agregadas en vez de hacer read_group sobre salesperson.commission.
+    Se refresca con el cron horario, al terminar los procesos masivos
+    (backfill, recálculo, cola diferida vacía) o a demanda (REFRESH
+    CONCURRENTLY, no bloquea lecturas). Lee la vista unificada
+    salesperson_commission_all (comisiones activas + archivadas).
+    """
+    _name = 'salesperson.commission.report'
+    _description = 'Análisis de Comisiones'
+    _auto = False
+    _order = 'date desc, salesperson_id'
+
+    date = fields.Date(string='Mes', readonly=True)
+    salesperson_id = fields.Many2one('res.users', string='Vendedor', readonly=True)
+    partner_id = fields.Many2one('res.partner', string='Cliente', readonly=True)
+    zone_id = fields.Many2one('commission.zone', string='Zona', readonly=True)
+    rule_id = fields.Many2one(
+        'salesperson.commission.rule', string='Regla Aplicada', readonly=True)
+    company_id = fields.Many2one('res.company', string='Compañía', readonly=True)
+    currency_id = fields.Many2one('res.currency', string='Moneda', readonly=True)
+    move_type = fields.Selection([
+        ('out_invoice', 'Factura'),
+        ('out_refund', 'Nota de Crédito'),
+    ], string='Tipo', readonly=True)
+    commission_count = fields.Integer(string='Comisiones', readonly=True)
+    base_amount = fields.Monetary(string='Monto Base (sin IVA)', readonly=True)
+    commission_amount = fields.Monetary(string='Comisión Total (100%)', readonly=True)
+    invoice_accrued_amount = fields.Monetary(
+        string='Devengado Facturación', readonly=True)
+    collection_accrued_amount = fields.Monetary(
+        string='Devengado Cobro', readonly=True)
+    billed_amount = fields.Monetary(string='Monto Facturado', readonly=True)
+    paid_amount = fields.Monetary(string='Monto Pagado', readonly=True)
+
+    def _query(self):
+        """SELECT agregado que alimenta la vista materializada."""
+        return """
+            SELECT MIN(c.id) AS id,
+                   date_trunc('month', c.date)::date AS date,
+                   c.salesperson_id,
+                   c.partner_id,
+                   c.zone_id,
+                   c.rule_id,
+                   c.company_id,
+                   c.currency_id,
+                   c.move_type,
+                   COUNT(*) AS commission_count,
+                   SUM(c.base_amount) AS base_amount,
+                   SUM(c.commission_amount) AS commission_amount,
+                   SUM(CASE WHEN c.invoice_status = 'accrued'
+                            THEN c.invoice_commission ELSE 0 END) AS invoice_accrued_amount,
+                   SUM(CASE WHEN c.collection_status = 'accrued'
+                            THEN c.collection_commission ELSE 0 END) AS collection_accrued_amount,
+                   SUM(c.billed_amount) AS billed_amount,
+                   SUM(c.paid_amount) AS paid_amount,
+                   -- Por qué: Momento del refresco, para mostrarlo en la interfaz
+                   (now() AT TIME ZONE 'UTC') AS refreshed_at
+              FROM salesperson_commission_all c
+          GROUP BY date_trunc('month', c.date), c.salesperson_id, c.partner_id,
+                   c.zone_id, c.rule_id, c.company_id, c.currency_id, c.move_type
+        """
+
+    def init(self):
+        # Por qué: La arma salesperson.commission.archive al recrear la vista
+        # unificada de la que depende (ver _create_view); acá solo se cubre
+        # el caso de que todavía no exista
+        self.env.cr.execute(
+            "SELECT 1 FROM pg_matviews WHERE matviewname = %s", (self._table,))
+        if not self.env.cr.fetchone():
+            self._create_view()
+
+    @api.model
+    def _create_view(self):
+        """(Re)crea la vista materializada y sus índices.
+
+        Por qué: Depende de salesperson_commission_all; quien recrea esa vista
+        borra antes esta explícitamente y después llama a este método.
+        """
+        self.env.cr.execute(f"DROP MATERIALIZED VIEW IF EXISTS {self._table}")
+        self.env.cr.execute(
+            f"CREATE MATERIALIZED VIEW {self._table} AS ({self._query()})")
+        # Por qué: REFRESH CONCURRENTLY requiere un índice único
+        self.env.cr.execute(
+            f"CREATE UNIQUE INDEX {self._table}_id_idx ON {self._table} (id)")
+        self.env.cr.execute(
+            f"CREATE INDEX {self._table}_salesperson_date_idx "
+            f"ON {self._table} (salesperson_id, date)")
+
+    @api.model
+    def _refresh(self):
+        """Refresca la vista materializada sin bloquear lecturas."""
+        self.env['salesperson.commission'].flush_model()
+        self.env.cr.execute(
+            f"REFRESH MATERIALIZED VIEW CONCURRENTLY {self._table}")
+        self.invalidate_model()
+
+    @api.model
+    def _get_refreshed_at(self):
+        """Fecha/hora (UTC) del último refresco, o None si no hay datos."""
+        self.env.cr.execute(f"SELECT refreshed_at FROM {self._table} LIMIT 1")
+        row = self.env.cr.fetchone()
+        return row[0] if row else None
+
+    @api.model
+    def action_open_report(self):
+        """Abre el análisis con la fecha de los datos en el título.
+
+        Por qué: La vista materializada puede estar hasta una hora atrasada;
+        el usuario tiene que saber de cuándo son los totales que ve.
+        """
+        action = self.env['ir.actions.act_window']._for_xml_id(
+            'surtecnica_custom_comisiones.salesperson_commission_report_action')
+        refreshed_at = self._get_refreshed_at()
+        if refreshed_at:
+            action['name'] = _(
+                'Análisis de Comisiones (datos al %s)',
+                format_datetime(self.env, refreshed_at, dt_format='short'))
+        return action
+
+    def action_refresh(self):
+        """Acción manual para refrescar el análisis."""
+        self._refresh()
+        return {'type': 'ir.actions.client', 'tag': 'reload'}
@@ -0,0 +1,20 @@
+from . import test_commission_benchmark
+from . import test_commission_query_count
+from . import test_commission_query_plans
+from . import test_commission_concurrency
+from . import test_commission_archive
+from . import test_commission_ledger
+from . import test_commission_zone
+from . import test_commission_recompute
+from . import test_commission_vendor_bill
+from . import test_commission_rule_index
+from . import test_commission_generation
+from . import test_commission_queue
+from . import test_commission_backfill
+from . import test_commission_rule_simulation
+from . import test_commission_report
+from . import test_commission_collection
+from . import test_commission_sale_preview
+from . import test_commission_rule_import
+from . import test_commission_payment_status
+from . import test_commission_dashboard
@@ -0,0 +1,134 @@
+import logging
+import time
+from contextlib import contextmanager
+
+from odoo import fields
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+_logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def measure(env, results, name, records=0):
+    """Registra segundos y queries SQL del bloque en results[name]."""
+    cr = env.cr
+    env.flush_all()
+    queries_before = cr.sql_log_count
+    start = time.perf_counter()
+    stats = {'records': records}
+    yield stats
+    env.flush_all()
+    stats['seconds'] = round(time.perf_counter() - start, 4)
+    stats['queries'] = cr.sql_log_count - queries_before
+    results[name] = stats
+    _logger.info('Comisiones %s: %s', name, stats)
+
+
+class CommissionTestCommon(AccountTestInvoicingCommon):
+    """Base de los tests de comisiones: datos sintéticos sobre la compañía de
+    prueba (con plan de cuentas).
+
+    Genera vendedores, zonas, reglas (cliente/zona/producto/categoría),
+    clientes repartidos en provincias y facturas con K líneas.
+    """
+
+    @classmethod
+    def _generate_catalog(cls, rng, n_salespeople, n_partners):
+        """Crea vendedores, zonas, categorías, productos, clientes y reglas."""
+        env = cls.env
+        company = env.company
+        country = company.country_id or env.ref('base.ar')
+        states = env['res.country.state'].search(
+            [('country_id', '=', country.id)], limit=24)
+
+        users = env['res.users'].with_context(no_reset_password=True).create([{
+            'name': f'Test Vendedor {i}',
+            'login': f'test_commission_sp_{i}_{rng.random()}',
+            'company_id': company.id,
+            'company_ids': [(6, 0, company.ids)],
+        } for i in range(n_salespeople)])
+
+        zones = env['commission.zone'].create([{
+            'name': f'Test Zona {state.code}',
+            'country_id': country.id,
+            'state_id': state.id,
+        } for state in states])
+
+        categories = env['product.category'].create([
+            {'name': f'Test Categoría {i}'} for i in range(10)])
+        products = env['product.product'].create([{
+            'name': f'Test Producto {i}',
+            'categ_id': rng.choice(categories).id,
+            'list_price': 100.0,
+            'taxes_id': [(5, 0, 0)],
+        } for i in range(50)])
+
+        partners = env['res.partner'].create([{
+            'name': f'Test Cliente {i}',
+            'country_id': country.id,
+            'state_id': rng.choice(states).id if states else False,
+        } for i in range(n_partners)])
+
+        rule_vals = []
+        for user in users:
+            rule_vals.append({'salesperson_id': user.id, 'commission_percentage': 2.0})
+            for zone in zones[:5]:
+                rule_vals.append({'salesperson_id': user.id, 'zone_id': zone.id,
+                                  'commission_percentage': 4.0})
+            for categ in categories[:3]:
+                rule_vals.append({'salesperson_id': user.id,
+                                  'product_category_id': categ.id,
+                                  'commission_percentage': 2.5})
+            for product in products[:5]:
+                rule_vals.append({'salesperson_id': user.id, 'product_id': product.id,
+                                  'commission_percentage': 3.0})
+            for partner in partners[:5]:
+                rule_vals.append({'salesperson_id': user.id, 'partner_id': partner.id,
+                                  'commission_percentage': 6.0})
+        env['salesperson.commission.rule'].create(rule_vals)
+
+        return {
+            'users': users,
+            'partners': partners,
+            'products': products,
+            'purchase_journal': cls.company_data['default_journal_purchase'],
+        }
+
+    @classmethod
+    def _create_invoices(cls, rng, catalog, n_invoices, n_lines):
+        """Facturas de cliente en borrador con n_lines líneas sin impuestos."""
+        return cls.env['account.move'].create([{
+            'move_type': 'out_invoice',
+            'partner_id': rng.choice(catalog['partners']).id,
+            'invoice_user_id': rng.choice(catalog['users']).id,
+            'invoice_date': fields.Date.today(),
+            'invoice_line_ids': [(0, 0, {
+                'product_id': rng.choice(catalog['products']).id,
+                'quantity': 1,
+                'price_unit': 100.0,
+                'tax_ids': [(5, 0, 0)],
+            }) for _line in range(n_lines)],
+        } for _inv in range(n_invoices)])
+
+    @classmethod
+    def _generate_data(cls, rng, n_salespeople, n_partners, n_invoices, n_lines):
+        """Catálogo completo + facturas en borrador."""
+        data = cls._generate_catalog(rng, n_salespeople, n_partners)
+        data['invoices'] = cls._create_invoices(rng, data, n_invoices, n_lines)
+        return data
+
+    @classmethod
+    def _register_payment(cls, moves, group_payment=False):
+        """Paga por completo las facturas (de cliente o de proveedor)."""
+        return cls.env['account.payment.register'].with_context(
+            active_model='account.move', active_ids=moves.ids,
+        ).create({'group_payment': group_payment}).action_create_payments()
+
+    @classmethod
+    def _create_bill_wizard(cls, commissions, journal, line_grouping='detail'):
+        return cls.env['commission.create.vendor.bill'].with_context(
+            active_ids=commissions.ids).create({
+                'journal_id': journal.id,
+                'line_grouping': line_grouping,
+                'max_portions': 0,
+            })
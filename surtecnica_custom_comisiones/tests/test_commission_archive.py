@@ -0,0 +1,106 @@
+import random
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import CommissionTestCommon
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionArchive(CommissionTestCommon):
+    """Archivo de comisiones liquidadas: vínculos del libro, FK y totales."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = random.Random(0)
+        catalog = cls._generate_catalog(rng, 1, 5)
+        cls.invoice = cls._create_invoices(rng, catalog, 1, 3)
+        cls.invoice.invoice_date = fields.Date.today() - relativedelta(years=2)
+        cls.invoice.action_post()
+        cls.purchase_journal = catalog['purchase_journal']
+
+    def _settle(self):
+        """Cobra la factura, factura ambas porciones al vendedor y paga el bill."""
+        self._register_payment(self.invoice)
+        commissions = self.invoice.commission_ids
+        self._create_bill_wizard(commissions, self.purchase_journal).action_create_bills()
+        bills = commissions.invoice_vendor_bill_id | commissions.collection_vendor_bill_id
+        bills.action_post()
+        self._register_payment(bills)
+        self.assertEqual(set(commissions.mapped('payment_status')), {'paid'})
+        return commissions, bills
+
+    def _events(self, commission_ids):
+        return self.env['salesperson.commission.event'].search(
+            [('move_id', '=', self.invoice.id), ('commission_id', 'in', commission_ids)])
+
+    def test_archive_keeps_ledger_links(self):
+        commissions, bills = self._settle()
+        commission_ids = commissions.ids
+        Archive = self.env['salesperson.commission.archive']
+
+        self.assertEqual(Archive._archive_settled(months=1), len(commission_ids))
+        self.assertFalse(self.invoice.commission_ids)
+        events = self._events(commission_ids)
+        self.assertTrue(events)
+        self.assertEqual(set(events.mapped('commission_model')), {Archive._name})
+
+        bills.button_draft()
+        self.assertEqual(self.invoice.commission_ids.ids, commission_ids)
+        self.assertEqual(
+            set(self._events(commission_ids).mapped('commission_model')),
+            {'salesperson.commission'})
+
+    def test_simulation_includes_archived(self):
+        commissions, _bills = self._settle()
+        expected = sum(commissions.mapped('commission_amount'))
+        self.env['salesperson.commission.archive']._archive_settled(months=1)
+
+        simulation = self.env['commission.rule.simulation'].create({
+            'date_from': self.invoice.invoice_date,
+            'date_to': self.invoice.invoice_date,
+        })
+        by_salesperson, _by_rule = simulation._get_current_totals()
+        key = (self.invoice.invoice_user_id.id, self.invoice.currency_id.id)
+        self.assertAlmostEqual(by_salesperson[key], expected, places=2)
+
+    def test_deleted_rule_is_cleared_in_archive(self):
+        commissions, _bills = self._settle()
+        rules = commissions.rule_id
+        self.env['salesperson.commission.archive']._archive_settled(months=1)
+
+        rules.unlink()
+        self.env.cr.execute(
+            "SELECT COUNT(*) FROM salesperson_commission_archive "
+            "WHERE move_id = %s AND rule_id IS NOT NULL", (self.invoice.id,))
+        self.assertEqual(self.env.cr.fetchone()[0], 0)
+
+    def test_smart_buttons_include_archived(self):
+        commissions, bills = self._settle()
+        count = len(commissions)
+        Archive = self.env['salesperson.commission.archive']
+        Archive._archive_settled(months=1)
+        self.env.invalidate_all()
+
+        self.assertEqual(self.invoice.commission_count, 0)
+        for move in self.invoice | bills:
+            with self.subTest(move=move.display_name):
+                self.assertEqual(move.commission_archived_count, count)
+                action = move.action_view_archived_commissions()
+                self.assertEqual(action['res_model'], Archive._name)
+                self.assertEqual(Archive.search_count(action['domain']), count)
+
+    def test_archive_init_recreates_report_view(self):
+        self._settle()
+        Archive = self.env['salesperson.commission.archive']
+        Archive._archive_settled(months=1)
+        # Por qué: Recrear la vista unificada no debe perder el análisis
+        Archive.init()
+        Report = self.env['salesperson.commission.report']
+        self.env.cr.execute(
+            "SELECT 1 FROM pg_matviews WHERE matviewname = %s", (Report._table,))
+        self.assertTrue(self.env.cr.fetchone())
+        self.assertTrue(Report.search([('salesperson_id', '=', self.invoice.invoice_user_id.id)]))
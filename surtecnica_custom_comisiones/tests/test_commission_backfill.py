@@ -0,0 +1,86 @@
+import random
+
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import CommissionTestCommon
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionBackfill(CommissionTestCommon):
+    """Backfill de facturas confirmadas sin comisiones."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = random.Random(0)
+        catalog = cls._generate_catalog(rng, 2, 5)
+        without_rules = cls.env['res.users'].with_context(no_reset_password=True).create({
+            'name': 'Test Vendedor Sin Reglas',
+            'login': 'test_commission_backfill_no_rules',
+            'company_id': cls.env.company.id,
+            'company_ids': [(6, 0, cls.env.company.ids)],
+        })
+        invoices = cls._create_invoices(rng, catalog, 4, 2)
+        # Por qué: Factura que legítimamente no genera comisión
+        empty = cls.env['account.move'].create({
+            'move_type': 'out_invoice',
+            'partner_id': catalog['partners'][0].id,
+            'invoice_user_id': without_rules.id,
+            'invoice_date': fields.Date.today(),
+            'invoice_line_ids': [(0, 0, {
+                'product_id': catalog['products'][0].id,
+                'quantity': 1,
+                'price_unit': 100.0,
+                'tax_ids': [(5, 0, 0)],
+            })],
+        })
+        cls.invoices = invoices
+        cls.empty = empty
+        cls.moves = invoices | empty
+
+        # Por qué: Simula facturas confirmadas antes de instalar el módulo
+        cls.env.company.commission_deferred_generation = True
+        cls.moves.action_post()
+        cls.env.company.commission_deferred_generation = False
+        cls.env.flush_all()
+        cls.env.cr.execute(
+            "UPDATE account_move SET commission_queue_state = NULL WHERE id IN %s",
+            (tuple(cls.moves.ids),))
+        cls.env.invalidate_all()
+        cls._register_payment(cls.invoices[:1])
+
+    def _backfill(self, **kwargs):
+        return self.env['account.move']._backfill_commissions(
+            chunk_size=2, commit=False, **kwargs)
+
+    def test_backfill_generates_and_marks_processed(self):
+        self.assertFalse(self.moves.commission_ids)
+        result = self._backfill()
+
+        self.assertGreaterEqual(result['moves'], len(self.moves))
+        self.assertEqual(self.invoices.commission_ids.move_id, self.invoices)
+        self.assertFalse(self.empty.commission_ids)
+        self.assertEqual(set(self.moves.mapped('commission_queue_state')), {'done'})
+        paid = self.invoices[:1].commission_ids
+        self.assertEqual(set(paid.mapped('collection_status')), {'accrued'})
+
+        # Por qué: Las que no generan comisión no se vuelven a recorrer
+        commissions = self.moves.commission_ids
+        self.assertEqual(self._backfill()['moves'], 0)
+        self.assertEqual(self.moves.commission_ids, commissions)
+
+    def test_backfill_resumes_after_limit(self):
+        first = self._backfill(limit=3)
+        self.assertEqual(first['moves'], 3)
+        rest = self._backfill()
+        self.assertGreaterEqual(first['moves'] + rest['moves'], len(self.moves))
+        self.assertEqual(set(self.moves.mapped('commission_queue_state')), {'done'})
+        self.assertEqual(self._backfill()['moves'], 0)
+
+    def test_failed_moves_are_left_to_the_queue(self):
+        failed = self.invoices[-1]
+        failed.commission_queue_state = 'failed'
+        self._backfill()
+        self.assertEqual(failed.commission_queue_state, 'failed')
+        self.assertFalse(failed.commission_ids)
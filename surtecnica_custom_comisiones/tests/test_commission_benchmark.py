@@ -0,0 +1,95 @@
+import json
+import os
+import random
+import tempfile
+
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import CommissionTestCommon, measure
+
+
+def _env_param(name, default):
+    """Parámetro del benchmark desde COMMISSION_BENCHMARK_<NAME> (entero)."""
+    return int(os.environ.get(f'COMMISSION_BENCHMARK_{name.upper()}', default))
+
+
+@tagged('post_install', '-at_install', 'benchmark')
+class TestCommissionBenchmark(CommissionTestCommon):
+    """Benchmark de los caminos críticos de comisiones con datos sintéticos.
+
+    Mide tiempo y cantidad de queries de cada operación y escribe el
+    resultado en JSON para comparar entre versiones. Corre como test: los
+    datos se revierten con la transacción del test.
+
+        COMMISSION_BENCHMARK_INVOICES=200 COMMISSION_BENCHMARK_LINES=20 \\
+        COMMISSION_BENCHMARK_OUTPUT=/tmp/commission_bench.json \\
+        odoo-bin -d <db> --test-tags /surtecnica_custom_comisiones:TestCommissionBenchmark \\
+            --stop-after-init
+    """
+
+    def test_benchmark(self):
+        params = {
+            'salespeople': _env_param('salespeople', 5),
+            'partners': _env_param('partners', 200),
+            'invoices': _env_param('invoices', 100),
+            'lines': _env_param('lines', 10),
+            'seed': _env_param('seed', 42),
+            'group_payment': bool(_env_param('group_payment', 0)),
+        }
+        output = os.environ.get('COMMISSION_BENCHMARK_OUTPUT') or os.path.join(
+            tempfile.gettempdir(), 'commission_benchmark.json')
+        result = {
+            'params': params,
+            'date': fields.Datetime.now().isoformat(),
+            'operations': {},
+        }
+
+        data = self._generate_data(
+            random.Random(params['seed']), params['salespeople'],
+            params['partners'], params['invoices'], params['lines'])
+        self._run_operations(data, result['operations'], params['group_payment'])
+
+        with open(output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+        operations = result['operations']
+        self.assertEqual(
+            set(operations),
+            {'post', 'payment', 'vendor_bill_wizard', 'vendor_bill_payment',
+             'vendor_bill_draft'})
+        self.assertTrue(operations['post']['commissions'])
+
+    def _run_operations(self, data, operations, group_payment=False):
+        """Ejecuta y mide las operaciones sobre los datos generados.
+
+        - post: action_post → _post → _generate_commissions
+        - payment: registro de pagos y conciliación (_sync_commission_collection)
+        - vendor_bill_wizard: commission.create.vendor.bill.action_create_bills
+        - vendor_bill_payment: pago de las facturas de proveedor
+          (_sync_commission_payment_status)
+        - vendor_bill_draft: button_draft de las facturas de proveedor
+        """
+        env = self.env
+        invoices = data['invoices']
+
+        with measure(env, operations, 'post', len(invoices)) as stats:
+            invoices.action_post()
+        stats['commissions'] = len(invoices.commission_ids)
+
+        with measure(env, operations, 'payment', len(invoices)):
+            self._register_payment(invoices, group_payment)
+
+        commissions = invoices.commission_ids
+        wizard = self._create_bill_wizard(commissions, data['purchase_journal'])
+        with measure(env, operations, 'vendor_bill_wizard', len(commissions)):
+            wizard.action_create_bills()
+        bills = wizard.bill_ids or (
+            commissions.invoice_vendor_bill_id | commissions.collection_vendor_bill_id)
+
+        bills.action_post()
+        with measure(env, operations, 'vendor_bill_payment', len(commissions)):
+            self._register_payment(bills, group_payment)
+
+        with measure(env, operations, 'vendor_bill_draft', len(bills)):
+            bills.button_draft()
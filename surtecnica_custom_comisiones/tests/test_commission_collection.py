@@ -0,0 +1,105 @@
+import random
+
+from odoo.tests import tagged
+
+from .common import CommissionTestCommon
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionCollection(CommissionTestCommon):
+    """Devengado y reversión del 50% de cobro desde account.partial.reconcile."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.rng = random.Random(0)
+        cls.catalog = cls._generate_catalog(cls.rng, 1, 5)
+
+    def _post_invoice(self, **vals):
+        invoice = self._create_invoices(self.rng, self.catalog, 1, 2)
+        if vals:
+            invoice.write(vals)
+        invoice.action_post()
+        self.assertTrue(invoice.commission_ids)
+        return invoice
+
+    def _pay(self, invoice, **vals):
+        self.env['account.payment.register'].with_context(
+            active_model='account.move', active_ids=invoice.ids,
+        ).create(vals).action_create_payments()
+
+    def _unreconcile(self, invoice):
+        invoice.line_ids.filtered(
+            lambda l: l.account_type == 'asset_receivable').remove_move_reconcile()
+
+    def _events(self, invoice, source):
+        return self.env['salesperson.commission.event'].search([
+            ('move_id', '=', invoice.id),
+            ('portion', '=', 'collection'),
+            ('source', '=', source),
+        ])
+
+    def _assert_collection(self, invoice, status, payment_events, reset_events):
+        commissions = invoice.commission_ids
+        self.assertEqual(set(commissions.mapped('collection_status')), {status})
+        self.assertEqual(len(self._events(invoice, 'payment')), payment_events)
+        self.assertEqual(len(self._events(invoice, 'reset')), reset_events)
+
+    def test_payment_accrues_collection(self):
+        invoice = self._post_invoice()
+        self._assert_collection(invoice, 'pending', 0, 0)
+
+        self._pay(invoice)
+        commissions = invoice.commission_ids
+        self._assert_collection(invoice, 'accrued', len(commissions), 0)
+        self.assertAlmostEqual(
+            sum(self._events(invoice, 'payment').mapped('amount')),
+            sum(commissions.mapped('collection_commission')))
+
+    def test_unreconcile_resets_collection(self):
+        invoice = self._post_invoice()
+        self._pay(invoice)
+        commissions = invoice.commission_ids
+
+        self._unreconcile(invoice)
+        self.assertEqual(invoice.payment_state, 'not_paid')
+        self._assert_collection(invoice, 'pending', len(commissions), len(commissions))
+        # Por qué: El evento de reversión anula el devengado en el libro
+        for commission in commissions:
+            reset = self._events(invoice, 'reset').filtered(
+                lambda e: e.commission_id == commission.id)
+            self.assertAlmostEqual(reset.amount, -commission.collection_commission)
+
+        # Por qué: Volver a pagar devenga de nuevo
+        self._pay(invoice)
+        self._assert_collection(invoice, 'accrued', 2 * len(commissions), len(commissions))
+
+    def test_unreconcile_after_billing_keeps_collection(self):
+        invoice = self._post_invoice()
+        self._pay(invoice)
+        commissions = invoice.commission_ids
+        self._create_bill_wizard(
+            commissions, self.catalog['purchase_journal']).action_create_bills()
+        self.assertTrue(all(commissions.mapped('collection_vendor_bill_id')))
+
+        # Por qué: Lo ya liquidado al vendedor no se revierte
+        self._unreconcile(invoice)
+        self._assert_collection(invoice, 'accrued', len(commissions), 0)
+
+    def test_exchange_difference_partial(self):
+        currency = self.currency_data['currency']
+        # Por qué: Factura a tasa 2017 pagada con fecha 2016 → la diferencia
+        # de cambio se concilia con una segunda conciliación parcial
+        invoice = self._post_invoice(currency_id=currency.id, invoice_date='2017-01-01')
+        self._pay(invoice, payment_date='2016-01-01')
+        receivable = invoice.line_ids.filtered(
+            lambda l: l.account_type == 'asset_receivable')
+        partials = receivable.matched_credit_ids
+        self.assertGreater(len(partials), 1)
+
+        commissions = invoice.commission_ids
+        # Por qué: Cada conciliación dispara el hook; el cobro se devenga una vez
+        self._assert_collection(invoice, 'accrued', len(commissions), 0)
+
+        self._unreconcile(invoice)
+        self._assert_collection(invoice, 'pending', len(commissions), len(commissions))
@@ -0,0 +1,223 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2.errors
+
+import odoo
+from odoo import api, fields, SUPERUSER_ID
+from odoo.service.model import retrying
+from odoo.tests import tagged
+from odoo.tests.common import BaseCase, get_db_name
+from odoo.tools import mute_logger
+
+THREAD_TIMEOUT = 60
+
+
+@contextmanager
+def environment():
+    """Environment sobre un cursor propio, con commit al salir.
+
+    Por qué: Los workers concurrentes usan conexiones distintas; solo ven
+    datos commiteados, así que el test no puede vivir en la transacción de
+    un TransactionCase.
+    """
+    registry = odoo.registry(get_db_name())
+    with registry.cursor() as cr:
+        yield api.Environment(cr, SUPERUSER_ID, {})
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionConcurrency(BaseCase):
+    """Generación de comisiones desde workers concurrentes con lotes superpuestos.
+
+    Cada hilo usa su propio cursor del registry. Se verifica que no haya
+    comisiones duplicadas ni deadlocks, y que el touch-UPDATE de
+    _lock_for_commissions convierta la carrera en un error de serialización
+    que Odoo reintenta.
+
+    Los datos se commitean en setUp y se borran al terminar cada test. Las
+    facturas quedan en borrador: _generate_commissions no depende del estado
+    y así los hilos no compiten por la numeración de Odoo.
+    """
+
+    N_INVOICES = 12
+
+    def setUp(self):
+        super().setUp()
+        with environment() as env:
+            journal = env['account.journal'].search([
+                ('type', '=', 'sale'),
+                ('company_id', '=', env.company.id),
+            ], limit=1)
+            if not journal:
+                self.skipTest('La compañía principal no tiene plan de cuentas')
+            user = env['res.users'].with_context(no_reset_password=True).create({
+                'name': 'Test Vendedor Concurrencia',
+                'login': f'test_commission_concurrency_{time.time()}',
+                'company_id': env.company.id,
+                'company_ids': [(6, 0, env.company.ids)],
+            })
+            partner = env['res.partner'].create({'name': 'Test Cliente Concurrencia'})
+            product = env['product.product'].create({
+                'name': 'Test Producto Concurrencia',
+                'taxes_id': [(5, 0, 0)],
+            })
+            rule = env['salesperson.commission.rule'].create({
+                'salesperson_id': user.id,
+                'commission_percentage': 5.0,
+            })
+            invoices = env['account.move'].create([{
+                'move_type': 'out_invoice',
+                'journal_id': journal.id,
+                'partner_id': partner.id,
+                'invoice_user_id': user.id,
+                'invoice_date': fields.Date.today(),
+                'invoice_line_ids': [(0, 0, {
+                    'product_id': product.id,
+                    'quantity': 1,
+                    'price_unit': 100.0,
+                    'tax_ids': [(5, 0, 0)],
+                })],
+            } for _i in range(self.N_INVOICES)])
+            self.invoice_ids = invoices.ids
+            self.record_ids = {
+                'salesperson.commission.rule': rule.ids,
+                'product.product': product.ids,
+                'res.users': user.ids,
+                'res.partner': (partner | user.partner_id).ids,
+            }
+        self.addCleanup(self._cleanup)
+
+    def _cleanup(self):
+        with environment() as env:
+            # Por qué: El libro es append-only para el ORM → se borra por SQL
+            env.cr.execute(
+                "DELETE FROM salesperson_commission_event WHERE move_id IN %s",
+                (tuple(self.invoice_ids),))
+            env.cr.execute(
+                "DELETE FROM salesperson_commission WHERE move_id IN %s",
+                (tuple(self.invoice_ids),))
+            env.invalidate_all()
+            env['account.move'].browse(self.invoice_ids).unlink()
+            for model, ids in self.record_ids.items():
+                env[model].browse(ids).unlink()
+
+    def _generate(self, env, move_ids, deadlocks=None):
+        """Genera comisiones con el manejo de concurrencia de Odoo (retrying)."""
+        def generate():
+            try:
+                env['account.move'].browse(move_ids)._generate_commissions()
+                env.flush_all()
+            except psycopg2.errors.DeadlockDetected as e:
+                # Por qué: retrying también reintenta deadlocks → se anotan
+                # antes de que los absorba
+                if deadlocks is not None:
+                    deadlocks.append(e)
+                raise
+        return retrying(generate, env)
+
+    def _wait_until_blocked(self, pid):
+        """Espera a que la sesión pid quede bloqueada esperando un lock."""
+        with environment() as env:
+            deadline = time.monotonic() + THREAD_TIMEOUT
+            while time.monotonic() < deadline:
+                env.cr.execute(
+                    "SELECT wait_event_type FROM pg_stat_activity WHERE pid = %s", (pid,))
+                row = env.cr.fetchone()
+                if row and row[0] == 'Lock':
+                    return
+                # Por qué: pg_stat_activity se congela dentro de una transacción
+                env.cr.rollback()
+                time.sleep(0.05)
+        self.fail('El segundo worker nunca esperó el lock de las facturas')
+
+    def _assert_generated_once(self):
+        with environment() as env:
+            ids = tuple(self.invoice_ids)
+            env.cr.execute("""
+                SELECT move_id, rule_id, commission_percentage
+                  FROM salesperson_commission
+                 WHERE move_id IN %s
+              GROUP BY move_id, rule_id, commission_percentage
+                HAVING COUNT(*) > 1
+            """, (ids,))
+            self.assertFalse(env.cr.fetchall(), 'Comisiones duplicadas')
+            env.cr.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT move_id) FROM salesperson_commission "
+                "WHERE move_id IN %s", (ids,))
+            self.assertEqual(env.cr.fetchone(), (len(ids), len(ids)))
+            # Por qué: El reintento no debe volver a registrar el devengado
+            env.cr.execute(
+                "SELECT COUNT(*) FROM salesperson_commission_event "
+                "WHERE move_id IN %s AND source = 'post'", (ids,))
+            self.assertEqual(env.cr.fetchone()[0], len(ids))
+
+    def test_touch_update_raises_serialization_failure(self):
+        """Lote superpuesto que espera el lock → error de serialización reintentable."""
+        batch_a = self.invoice_ids[:8]
+        batch_b = self.invoice_ids[4:]
+        registry = odoo.registry(get_db_name())
+        errors = []
+        with registry.cursor() as cr_a, registry.cursor() as cr_b:
+            env_a = api.Environment(cr_a, SUPERUSER_ID, {})
+            env_b = api.Environment(cr_b, SUPERUSER_ID, {})
+            # Por qué: Primera sentencia de B → fija su snapshot (REPEATABLE
+            # READ) antes de que A commitee
+            cr_b.execute("SELECT pg_backend_pid()")
+            pid_b = cr_b.fetchone()[0]
+
+            env_a['account.move'].browse(batch_a)._generate_commissions()
+            env_a.flush_all()
+
+            def generate_b():
+                try:
+                    env_b['account.move'].browse(batch_b)._generate_commissions()
+                    env_b.flush_all()
+                except Exception as e:
+                    errors.append(e)
+
+            with mute_logger('odoo.sql_db'):
+                thread = threading.Thread(target=generate_b)
+                thread.start()
+                self._wait_until_blocked(pid_b)
+                cr_a.commit()
+                thread.join(THREAD_TIMEOUT)
+            self.assertFalse(thread.is_alive(), 'El segundo worker quedó bloqueado')
+            self.assertEqual(len(errors), 1)
+            self.assertIsInstance(errors[0], psycopg2.errors.SerializationFailure)
+
+            # Reintento como lo hace Odoo: rollback + nuevo snapshot
+            cr_b.rollback()
+            env_b.reset()
+            self._generate(env_b, batch_b)
+        self._assert_generated_once()
+
+    def test_overlapping_batches_from_threads(self):
+        """Varios workers con lotes superpuestos (en distinto orden) a la vez."""
+        ids = self.invoice_ids
+        batches = [ids[0:6], ids[3:9], ids[6:12], ids[9:12] + ids[0:3]]
+        barrier = threading.Barrier(len(batches))
+        errors = []
+        deadlocks = []
+
+        def worker(batch):
+            try:
+                barrier.wait(THREAD_TIMEOUT)
+                with environment() as env:
+                    self._generate(env, batch, deadlocks)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(batch,)) for batch in batches]
+        with mute_logger('odoo.sql_db'):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(THREAD_TIMEOUT)
+        self.assertFalse(
+            [thread for thread in threads if thread.is_alive()],
+            'Algún worker quedó bloqueado')
+        self.assertFalse(deadlocks)
+        self.assertFalse(errors)
+        self._assert_generated_once()
@@ -0,0 +1,56 @@
+import random
+from unittest.mock import patch
+
+from odoo.tests import tagged
+
+from .common import CommissionTestCommon
+
+_TIME = 'odoo.addons.surtecnica_custom_comisiones.report.salesperson_commission_dashboard.time'
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionDashboard(CommissionTestCommon):
+    """Tablero: KPIs cacheados, filas reutilizadas e invalidación por sello."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.rng = random.Random(0)
+        cls.catalog = cls._generate_catalog(cls.rng, 2, 5)
+        cls._create_invoices(cls.rng, cls.catalog, 3, 2).action_post()
+
+    def _open(self):
+        Dashboard = self.env['salesperson.commission.dashboard']
+        action = Dashboard.action_open_dashboard()
+        return Dashboard.search(action['domain'])
+
+    def _total(self, rows):
+        return sum(rows.filtered(
+            lambda r: r.salesperson_id in self.catalog['users']).mapped('commission_count'))
+
+    def test_reopen_reuses_rows_until_stamp_changes(self):
+        Dashboard = self.env['salesperson.commission.dashboard']
+        # Por qué: Tiempo fijo → el balde del TTL no cambia entre aperturas
+        with patch(_TIME) as mock_time:
+            mock_time.time.return_value = 1_000_000.0
+            rows = self._open()
+            self.assertTrue(rows)
+            count = Dashboard.search_count([])
+            total = self._total(rows)
+
+            self.assertEqual(self._open(), rows)
+            self.assertEqual(Dashboard.search_count([]), count)
+
+            # Por qué: Crear comisiones incrementa el sello → KPIs y filas nuevas
+            self._create_invoices(self.rng, self.catalog, 2, 2).action_post()
+            new_rows = self._open()
+            self.assertFalse(new_rows & rows)
+            self.assertGreater(self._total(new_rows), total)
+            self.assertEqual(self._open(), new_rows)
+
+    def test_ttl_bucket_refreshes_rows(self):
+        with patch(_TIME) as mock_time:
+            mock_time.time.return_value = 1_000_000.0
+            rows = self._open()
+            mock_time.time.return_value = 1_000_000.0 + 600
+            self.assertFalse(self._open() & rows)
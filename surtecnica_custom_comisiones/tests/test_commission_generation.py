@@ -0,0 +1,124 @@
+import random
+
+import psycopg2.errors
+
+from odoo import fields
+from odoo.tests import tagged
+from odoo.tools import mute_logger
+
+from .common import CommissionTestCommon
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionGeneration(CommissionTestCommon):
+    """Generación en lote: las mismas comisiones que factura por factura."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.catalog = cls._generate_catalog(random.Random(0), 3, 10)
+        # Por qué: Vendedor con una sola regla por producto → el resto de sus
+        # líneas no tiene regla y no genera comisión
+        cls.narrow_salesperson = cls.env['res.users'].with_context(
+            no_reset_password=True).create({
+                'name': 'Test Vendedor Sin Regla General',
+                'login': 'test_commission_generation_narrow',
+                'company_id': cls.env.company.id,
+                'company_ids': [(6, 0, cls.env.company.ids)],
+            })
+        cls.narrow_product = cls.catalog['products'][0]
+        cls.env['salesperson.commission.rule'].create({
+            'salesperson_id': cls.narrow_salesperson.id,
+            'product_id': cls.narrow_product.id,
+            'commission_percentage': 7.0,
+        })
+
+    def _move_vals(self):
+        """Facturas y NC de varios vendedores, con un cliente compartido."""
+        rng = random.Random(1)
+        partners = self.catalog['partners']
+        products = self.catalog['products']
+        salespeople = self.catalog['users'] | self.narrow_salesperson
+        vals_list = []
+        for i in range(12):
+            line_products = [self.narrow_product] + [rng.choice(products) for _j in range(3)]
+            vals_list.append({
+                'move_type': 'out_refund' if i % 4 == 3 else 'out_invoice',
+                'partner_id': (partners[0] if i % 3 == 0 else rng.choice(partners)).id,
+                'invoice_user_id': salespeople[i % len(salespeople)].id,
+                'invoice_date': fields.Date.today(),
+                'invoice_line_ids': [(0, 0, {
+                    'product_id': product.id,
+                    'quantity': 1,
+                    'price_unit': rng.choice((50.0, 100.0, 250.0)),
+                    'tax_ids': [(5, 0, 0)],
+                }) for product in line_products],
+            })
+        return vals_list
+
+    def _commission_rows(self, moves):
+        """Por factura: comisiones y eventos del libro, comparables entre lotes."""
+        Event = self.env['salesperson.commission.event']
+        rows = []
+        for move in moves:
+            commissions = sorted(
+                (c.salesperson_id.id, c.rule_id.id, c.zone_id.id,
+                 c.commission_percentage, c.base_amount, c.commission_amount,
+                 c.invoice_commission, c.collection_commission,
+                 c.invoice_status, c.collection_status)
+                for c in move.commission_ids)
+            events = sorted(
+                (e.portion, e.source, e.amount)
+                for e in Event.search([('move_id', '=', move.id)]))
+            rows.append((commissions, events))
+        return rows
+
+    def test_batch_matches_per_move(self):
+        vals_list = self._move_vals()
+        batch = self.env['account.move'].create(vals_list)
+        single = self.env['account.move'].create(vals_list)
+
+        batch.action_post()
+        for move in single:
+            move.action_post()
+
+        batch_rows = self._commission_rows(batch)
+        self.assertEqual(batch_rows, self._commission_rows(single))
+        self.assertTrue(all(commissions for commissions, _events in batch_rows))
+
+        narrow = batch.filtered(lambda m: m.invoice_user_id == self.narrow_salesperson)
+        self.assertTrue(narrow)
+        for move in narrow:
+            line = move.invoice_line_ids.filtered(
+                lambda l: l.product_id == self.narrow_product)
+            self.assertEqual(move.commission_ids.commission_percentage, 7.0)
+            self.assertAlmostEqual(
+                abs(move.commission_ids.base_amount), sum(line.mapped('price_subtotal')))
+        refunds = batch.filtered(lambda m: m.move_type == 'out_refund')
+        self.assertTrue(refunds)
+        self.assertTrue(all(c.base_amount < 0 for c in refunds.commission_ids))
+
+    def test_unique_index_covers_commissions_without_rule(self):
+        move = self.env['account.move'].create(self._move_vals()[0])
+        move.action_post()
+        commission = move.commission_ids[:1]
+        self.env.flush_all()
+        copy_query = """
+            INSERT INTO salesperson_commission
+                (move_id, salesperson_id, rule_id, commission_percentage, date,
+                 invoice_status, collection_status)
+            SELECT move_id, salesperson_id, rule_id, commission_percentage, date,
+                   invoice_status, collection_status
+              FROM salesperson_commission WHERE id = %s
+        """
+        with self.assertRaises(psycopg2.errors.UniqueViolation), \
+                mute_logger('odoo.sql_db'), self.env.cr.savepoint():
+            self.env.cr.execute(copy_query, (commission.id,))
+
+        # Por qué: Regla borrada → rule_id NULL; un UNIQUE común no lo frena
+        self.env.cr.execute(
+            "UPDATE salesperson_commission SET rule_id = NULL WHERE id = %s",
+            (commission.id,))
+        with self.assertRaises(psycopg2.errors.UniqueViolation), \
+                mute_logger('odoo.sql_db'), self.env.cr.savepoint():
+            self.env.cr.execute(copy_query, (commission.id,))
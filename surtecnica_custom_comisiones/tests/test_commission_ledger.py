@@ -0,0 +1,104 @@
+import random
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import CommissionTestCommon
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionLedger(CommissionTestCommon):
+    """Saldo inicial del libro para comisiones devengadas sin eventos."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = random.Random(0)
+        catalog = cls._generate_catalog(rng, 1, 5)
+        cls.invoices = cls._create_invoices(rng, catalog, 2, 3)
+        cls.invoices.action_post()
+        cls._register_payment(cls.invoices[0])
+
+    def _assert_balance_equal(self, balance, expected):
+        for key in ('invoice', 'collection', 'total'):
+            self.assertAlmostEqual(balance[key], expected[key], places=2)
+
+    def test_opening_balances(self):
+        Event = self.env['salesperson.commission.event']
+        salesperson = self.invoices.invoice_user_id
+        date = self.invoices[0].invoice_date
+        balance = Event._get_balance_as_of(salesperson, date)
+        self.assertTrue(balance['collection'])
+
+        # Por qué: Simula comisiones generadas antes de existir el libro
+        Event.flush_model()
+        self.env.cr.execute(
+            "DELETE FROM salesperson_commission_event WHERE move_id IN %s",
+            (tuple(self.invoices.ids),))
+        Event.invalidate_model()
+        self._assert_balance_equal(
+            Event._get_balance_as_of(salesperson, date),
+            {'invoice': 0.0, 'collection': 0.0, 'total': 0.0})
+
+        Event._log_opening_balances()
+        commissions = self.invoices.commission_ids
+        paid = commissions.filtered(lambda c: c.collection_status == 'accrued')
+        opening = Event.search([('move_id', 'in', self.invoices.ids)])
+        self.assertEqual(set(opening.mapped('source')), {'opening'})
+        self.assertEqual(len(opening), len(commissions) + len(paid))
+        self._assert_balance_equal(Event._get_balance_as_of(salesperson, date), balance)
+
+        # Por qué: Idempotente — una segunda corrida no agrega eventos
+        Event._log_opening_balances()
+        self.assertEqual(
+            Event.search_count([('move_id', 'in', self.invoices.ids)]), len(opening))
+
+    def _drop_events(self, moves, date=None):
+        """Simula comisiones previas al libro, opcionalmente con otra fecha."""
+        Event = self.env['salesperson.commission.event']
+        self.env.flush_all()
+        if date:
+            self.env.cr.execute(
+                "UPDATE salesperson_commission SET date = %s WHERE move_id IN %s",
+                (date, tuple(moves.ids)))
+        self.env.cr.execute(
+            "DELETE FROM salesperson_commission_event WHERE move_id IN %s",
+            (tuple(moves.ids),))
+        self.env.invalidate_all()
+        return Event
+
+    def test_opening_balances_rebuild_snapshots_from_first_date(self):
+        Snapshot = self.env['salesperson.commission.snapshot']
+        salesperson = self.invoices.invoice_user_id
+        first_day = fields.Date.today().replace(day=1)
+        old, recent = self.invoices
+        old_date = first_day - relativedelta(months=5)
+        recent_date = first_day - relativedelta(months=2)
+        self._drop_events(old, old_date)
+        Event = self._drop_events(recent, recent_date)
+        Event._log_opening_balances()
+
+        snapshots = Snapshot.search([('salesperson_id', 'in', salesperson.ids)])
+        self.assertEqual(
+            min(snapshots.mapped('date')), old_date + relativedelta(day=31))
+        earlier = snapshots.filtered(lambda s: s.date < recent_date)
+        later = snapshots - earlier
+        self.assertTrue(earlier)
+        self.assertTrue(later)
+        earlier_balances = [(s.id, s.invoice_balance) for s in earlier]
+
+        # Por qué: Un saldo inicial nuevo con fecha de hace dos meses solo
+        # rehace los cierres desde ese mes, en la misma transacción
+        Event = self._drop_events(recent)
+        self.assertEqual(Event._log_opening_balances(), len(recent.commission_ids))
+        self.assertEqual(
+            [(s.id, s.invoice_balance) for s in earlier.exists()], earlier_balances)
+        self.assertFalse(later.exists())
+        rebuilt = Snapshot.search([
+            ('salesperson_id', 'in', salesperson.ids), ('date', '>=', recent_date)])
+        self.assertEqual(rebuilt.mapped('date'), later.mapped('date'))
+        self.assertAlmostEqual(
+            max(rebuilt, key=lambda s: s.date).invoice_balance,
+            sum(self.invoices.commission_ids.mapped('invoice_commission')), places=2)
@@ -0,0 +1,118 @@
+import random
+
+from odoo.tests import tagged
+
+from ..models.account_move import PAID_STATES
+from .common import CommissionTestCommon
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionPaymentStatus(CommissionTestCommon):
+    """El UPDATE de _sync_payment_status_from_bills coincide con el compute.
+
+    Las comisiones tienen la porción de facturación y la de cobro en bills
+    distintos. Después de cada cambio de estado de pago del bill se compara
+    lo que dejó el SQL con lo que calcula _compute_payment_status.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.rng = random.Random(0)
+        cls.catalog = cls._generate_catalog(cls.rng, 1, 5)
+
+    def _billed_commissions(self):
+        """Comisiones con la porción de facturación y la de cobro en bills distintos."""
+        invoices = self._create_invoices(self.rng, self.catalog, 2, 2)
+        invoices.action_post()
+        commissions = invoices.commission_ids
+        journal = self.catalog['purchase_journal']
+        self._create_bill_wizard(commissions, journal).action_create_bills()
+        self._register_payment(invoices)
+        self._create_bill_wizard(commissions, journal).action_create_bills()
+        invoice_bill = commissions.invoice_vendor_bill_id
+        collection_bill = commissions.collection_vendor_bill_id
+        self.assertEqual(len(invoice_bill), 1)
+        self.assertEqual(len(collection_bill), 1)
+        self.assertNotEqual(invoice_bill, collection_bill)
+        (invoice_bill | collection_bill).action_post()
+        return commissions, invoice_bill, collection_bill
+
+    def _pay_bill(self, bill, amount=None):
+        vals = {'amount': amount} if amount else {}
+        self.env['account.payment.register'].with_context(
+            active_model='account.move', active_ids=bill.ids,
+        ).create(vals).action_create_payments()
+
+    def _unreconcile(self, bill):
+        bill.line_ids.filtered(
+            lambda l: l.account_type == 'liability_payable').remove_move_reconcile()
+
+    def _assert_sql_matches_compute(self, commissions, status):
+        """Estado que dejó el SQL == estado que calcula el ORM; devuelve el estado."""
+        self.env.flush_all()
+        self.env.invalidate_all()
+        from_sql = {c.id: (c.payment_status, c.paid_amount) for c in commissions}
+        Commission = self.env['salesperson.commission']
+        for name in ('payment_status', 'paid_amount'):
+            self.env.add_to_compute(Commission._fields[name], commissions)
+        from_compute = {c.id: (c.payment_status, c.paid_amount) for c in commissions}
+        self.assertEqual(from_sql, from_compute)
+        self.assertEqual(set(commissions.mapped('payment_status')), {status})
+
+    def test_payment_changes(self):
+        commissions, invoice_bill, collection_bill = self._billed_commissions()
+        self._assert_sql_matches_compute(commissions, 'pending')
+
+        self._pay_bill(invoice_bill, invoice_bill.amount_total / 2)
+        self.assertEqual(invoice_bill.payment_state, 'partial')
+        self._assert_sql_matches_compute(commissions, 'pending')
+
+        self._pay_bill(invoice_bill)
+        self.assertIn(invoice_bill.payment_state, PAID_STATES)
+        self._assert_sql_matches_compute(commissions, 'partial')
+        self.assertEqual(
+            commissions.mapped('paid_amount'), commissions.mapped('invoice_commission'))
+
+        self._pay_bill(collection_bill)
+        self._assert_sql_matches_compute(commissions, 'paid')
+
+        self._unreconcile(invoice_bill)
+        self.assertEqual(invoice_bill.payment_state, 'not_paid')
+        self._assert_sql_matches_compute(commissions, 'partial')
+        self.assertEqual(
+            commissions.mapped('paid_amount'), commissions.mapped('collection_commission'))
+
+    def test_in_payment_to_paid(self):
+        commissions, invoice_bill, collection_bill = self._billed_commissions()
+        self._pay_bill(invoice_bill | collection_bill)
+        self._assert_sql_matches_compute(commissions, 'paid')
+
+        # Por qué: in_payment → paid lo dispara la conciliación bancaria del
+        # pago, que no toca el bill ni sus conciliaciones; ambos estados
+        # cuentan como pagado, así que las comisiones no cambian
+        for bill in invoice_bill | collection_bill:
+            other = 'paid' if bill.payment_state == 'in_payment' else 'in_payment'
+            self.env.cr.execute(
+                "UPDATE account_move SET payment_state = %s WHERE id = %s", (other, bill.id))
+        self.env.invalidate_all()
+        synced = self.env['salesperson.commission']._sync_payment_status_from_bills(
+            invoice_bill | collection_bill)
+        self.assertFalse(synced)
+        self._assert_sql_matches_compute(commissions, 'paid')
+
+    def test_reversed_and_draft_bills(self):
+        commissions, invoice_bill, collection_bill = self._billed_commissions()
+        self._pay_bill(invoice_bill | collection_bill)
+
+        # Por qué: Revertir un bill lo concilia con su NC → hook de conciliación
+        self._unreconcile(collection_bill)
+        collection_bill._reverse_moves(cancel=True)
+        self.assertEqual(collection_bill.payment_state, 'reversed')
+        self._assert_sql_matches_compute(commissions, 'partial')
+
+        # Por qué: Pasar a borrador desvincula las comisiones → compute del ORM
+        self._unreconcile(invoice_bill)
+        invoice_bill.button_draft()
+        self.assertFalse(commissions.invoice_vendor_bill_id)
+        self._assert_sql_matches_compute(commissions, 'pending')
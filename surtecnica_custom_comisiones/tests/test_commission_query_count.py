@@ -0,0 +1,121 @@
+import random
+
+from odoo.tests import tagged
+
+from ..models.commission_perf_sample import INSTRUMENTATION_PARAM
+from .common import CommissionTestCommon, measure
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionQueryCount(CommissionTestCommon):
+    """La cantidad de queries de cada camino no crece con líneas ni comisiones.
+
+    Patrón: Cada test corre la operación tres veces sobre datos nuevos: una
+    de calentamiento (índices de reglas y mapa de zonas cacheados), una chica
+    que fija la cota y una FACTOR× más grande que debe respetarla con
+    assertQueryCount. Se mide la parte del módulo de cada camino, no el
+    posteo/pago de Odoo que la rodea.
+    """
+
+    FACTOR = 4
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.rng = random.Random(0)
+        cls.catalog = cls._generate_catalog(cls.rng, 3, 20)
+
+    def _assert_query_count_stable(self, prepare, operation, size):
+        """operation(prepare(size × FACTOR)) no hace más queries que con size."""
+        operation(prepare(size))
+        results = {}
+        small = prepare(size)
+        with measure(self.env, results, 'small'):
+            operation(small)
+        large = prepare(size * self.FACTOR)
+        with self.assertQueryCount(results['small']['queries']):
+            operation(large)
+
+    def _post_invoices(self, n_invoices, n_lines=3):
+        invoices = self._create_invoices(self.rng, self.catalog, n_invoices, n_lines)
+        invoices.action_post()
+        return invoices
+
+    def test_post_many_lines(self):
+        """Generación de comisiones del posteo: mismas facturas, más líneas."""
+        # Por qué: Con generación diferida action_post solo encola; el test
+        # mide exactamente lo que _post ejecuta tras super()
+        self.env.company.commission_deferred_generation = True
+
+        def operation(invoices):
+            invoices._generate_commissions()
+            invoices._accrue_collection_commissions()
+
+        self._assert_query_count_stable(
+            lambda lines: self._post_invoices(3, n_lines=lines), operation, 5)
+
+    def test_pay_many_invoices(self):
+        """Devengado de cobro al conciliar muchas facturas pagadas."""
+        def prepare(n_invoices):
+            invoices = self._post_invoices(n_invoices)
+            self._register_payment(invoices, group_payment=True)
+            # Por qué: El pago ya devengó el cobro → se vuelve a pendiente
+            # para medir el devengado en sí
+            invoices.commission_ids.write({'collection_status': 'pending'})
+            return invoices
+
+        def operation(invoices):
+            accrued, _reverted = invoices._sync_commission_collection()
+            self.assertTrue(accrued)
+
+        self._assert_query_count_stable(prepare, operation, 3)
+
+    def test_button_draft_many_bills(self):
+        """Limpieza de vínculos al pasar muchos bills de comisión a borrador."""
+        def prepare(n_invoices):
+            invoices = self._post_invoices(n_invoices)
+            bills = self.env['account.move']
+            # Por qué: Un asistente por factura → un bill por factura
+            for invoice in invoices:
+                self._create_bill_wizard(
+                    invoice.commission_ids, self.catalog['purchase_journal'],
+                ).action_create_bills()
+                bills |= invoice.commission_ids.invoice_vendor_bill_id
+            bills.action_post()
+            return bills
+
+        def operation(bills):
+            bills._sync_commission_payment_status()
+            bills._unlink_commission_vendor_bills()
+            self.assertFalse(bills.commission_invoice_portion_ids)
+
+        self._assert_query_count_stable(prepare, operation, 3)
+
+    def test_vendor_bill_wizard(self):
+        """Asistente de facturación con muchas comisiones de los mismos vendedores."""
+        def prepare(n_invoices):
+            invoices = self._post_invoices(n_invoices)
+            # Por qué: Líneas agrupadas por % → la cantidad de líneas del bill
+            # no depende de la cantidad de comisiones
+            return self._create_bill_wizard(
+                invoices.commission_ids, self.catalog['purchase_journal'],
+                line_grouping='percentage')
+
+        def operation(wizard):
+            wizard.action_create_bills()
+            self.assertFalse(
+                wizard.commission_ids.filtered(lambda c: not c.invoice_vendor_bill_id))
+
+        self._assert_query_count_stable(prepare, operation, 3)
+
+    def test_instrumentation_mode_is_cached(self):
+        """El decorador instrumented no consulta el parámetro en cada llamada."""
+        Sample = self.env['salesperson.commission.perf.sample']
+        Param = self.env['ir.config_parameter'].sudo()
+        Param.set_param(INSTRUMENTATION_PARAM, 'log')
+        self.assertEqual(Sample._get_instrumentation_mode(), 'log')
+        with self.assertQueryCount(0):
+            Sample._get_instrumentation_mode()
+        # Por qué: Cambiar el parámetro invalida el cache
+        Param.set_param(INSTRUMENTATION_PARAM, 'off')
+        self.assertEqual(Sample._get_instrumentation_mode(), 'off')
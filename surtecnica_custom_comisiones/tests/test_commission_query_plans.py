@@ -0,0 +1,85 @@
+import random
+
+from odoo.tests import tagged
+
+from .common import CommissionTestCommon
+
+# Por qué: Solo se controlan las tablas del módulo; las de Odoo tienen sus
+# propios índices y no dependen de este módulo
+_TABLES = ('salesperson_commission', 'salesperson_commission_rule')
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionQueryPlans(CommissionTestCommon):
+    """Las queries principales del módulo tienen un índice utilizable.
+
+    Siembra datos sintéticos, ejecuta ANALYZE y corre EXPLAIN con
+    enable_seqscan = off: si aun así el plan hace un Seq Scan sobre una tabla
+    del módulo, no hay índice que sirva.
+    """
+
+    def test_query_plans_use_indexes(self):
+        data = self._generate_data(random.Random(0), 5, 200, 100, 10)
+        data['invoices'].action_post()
+        self.env.flush_all()
+        cr = self.env.cr
+        for table in _TABLES:
+            cr.execute(f'ANALYZE {table}')
+        cr.execute('SET LOCAL enable_seqscan = off')
+
+        for name, query, params in self._get_plan_queries(data):
+            with self.subTest(query=name):
+                cr.execute(f'EXPLAIN (FORMAT JSON) {query}', params)
+                nodes = list(self._iter_plan_nodes(cr.fetchone()[0][0]['Plan']))
+                seq_scans = [
+                    node['Relation Name'] for node in nodes
+                    if node['Node Type'] == 'Seq Scan'
+                    and node.get('Relation Name') in _TABLES
+                ]
+                self.assertFalse(
+                    seq_scans, f"{name}: Seq Scan on {', '.join(seq_scans)}")
+
+    def _get_plan_queries(self, data):
+        """Queries principales del módulo, con parámetros de los datos sembrados."""
+        move_ids = tuple(data['invoices'].ids)
+        salesperson_id = data['users'][:1].id
+        company_id = self.env.company.id
+        return [
+            ('button_draft_invoice_link',
+             "SELECT id FROM salesperson_commission WHERE invoice_vendor_bill_id IN %s",
+             (move_ids,)),
+            ('button_draft_collection_link',
+             "SELECT id FROM salesperson_commission WHERE collection_vendor_bill_id IN %s",
+             (move_ids,)),
+            ('accrue_collection',
+             "SELECT id FROM salesperson_commission"
+             " WHERE move_id IN %s AND collection_status = 'pending'",
+             (move_ids,)),
+            ('filter_collection_pending',
+             "SELECT id FROM salesperson_commission WHERE collection_status = 'pending'"
+             " ORDER BY date DESC, id DESC LIMIT 80",
+             ()),
+            ('filter_billing_pending',
+             "SELECT id FROM salesperson_commission WHERE billing_status = 'pending'"
+             " ORDER BY date DESC, id DESC LIMIT 80",
+             ()),
+            ('commissions_by_move',
+             "SELECT id FROM salesperson_commission WHERE move_id IN %s",
+             (move_ids,)),
+            ('rule_index_load', *self._get_rule_index_query(company_id, salesperson_id)),
+        ]
+
+    def _get_rule_index_query(self, company_id, salesperson_id):
+        """La query que arma el ORM en _get_rule_index, no una reescrita a mano.
+
+        Por qué: Si cambia el dominio o el ORM lo traduce distinto (ej. el
+        filtro de active), el test analiza la query nueva.
+        """
+        Rule = self.env['salesperson.commission.rule'].sudo().with_context(active_test=True)
+        sql = Rule._search(Rule._get_rule_index_domain(company_id, salesperson_id)).select()
+        return sql.code, sql.params
+
+    def _iter_plan_nodes(self, plan):
+        yield plan
+        for child in plan.get('Plans', []):
+            yield from self._iter_plan_nodes(child)
@@ -0,0 +1,127 @@
+import random
+from contextlib import contextmanager
+from unittest.mock import patch
+
+import psycopg2.errors
+
+from odoo.tests import tagged
+
+from ..models.account_move import COMMISSION_QUEUE_MAX_ATTEMPTS
+from .common import CommissionTestCommon
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionQueue(CommissionTestCommon):
+    """Generación diferida: cola, cron, reintentos y reencolado."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.rng = random.Random(0)
+        cls.catalog = cls._generate_catalog(cls.rng, 2, 5)
+        cls.env.company.commission_deferred_generation = True
+
+    def _post_queued(self, n_invoices=2):
+        invoices = self._create_invoices(self.rng, self.catalog, n_invoices, 2)
+        invoices.action_post()
+        return invoices
+
+    def _run_cron(self):
+        self.env['account.move']._cron_process_commission_queue()
+
+    def _events(self, invoices, source):
+        return self.env['salesperson.commission.event'].search([
+            ('move_id', 'in', invoices.ids), ('source', '=', source)])
+
+    @contextmanager
+    def _failing_generation(self, moves, error=None):
+        """_generate_commissions falla para cualquier lote que incluya moves."""
+        Move = self.registry['account.move']
+        original = Move._generate_commissions
+        failing_ids = set(moves.ids)
+
+        def _generate_commissions(records):
+            if failing_ids & set(records.ids):
+                raise error or ValueError('Error de prueba')
+            return original(records)
+
+        with patch.object(Move, '_generate_commissions', _generate_commissions):
+            yield
+
+    def test_post_queues_instead_of_generating(self):
+        invoices = self._post_queued()
+        self.assertEqual(set(invoices.mapped('commission_queue_state')), {'queued'})
+        self.assertFalse(invoices.commission_ids)
+
+        self._run_cron()
+        self.assertEqual(set(invoices.mapped('commission_queue_state')), {'done'})
+        self.assertEqual(invoices.commission_ids.move_id, invoices)
+        self.assertEqual(
+            len(self._events(invoices, 'post')), len(invoices.commission_ids))
+
+    def test_failure_counts_attempts_until_max(self):
+        invoices = self._post_queued()
+        bad, good = invoices[0], invoices[1]
+
+        with self._failing_generation(bad):
+            for _attempt in range(COMMISSION_QUEUE_MAX_ATTEMPTS + 1):
+                self._run_cron()
+
+        self.assertEqual(good.commission_queue_state, 'done')
+        self.assertTrue(good.commission_ids)
+        self.assertEqual(bad.commission_queue_state, 'failed')
+        # Por qué: Tras el máximo el cron deja de tomarla
+        self.assertEqual(bad.commission_queue_attempts, COMMISSION_QUEUE_MAX_ATTEMPTS)
+        self.assertIn('Error de prueba', bad.commission_queue_error)
+        self.assertFalse(bad.commission_ids)
+
+        bad.action_requeue_commissions()
+        self.assertEqual(bad.commission_queue_state, 'queued')
+        self.assertEqual(bad.commission_queue_attempts, 0)
+        self._run_cron()
+        self.assertEqual(bad.commission_queue_state, 'done')
+        self.assertFalse(bad.commission_queue_error)
+        self.assertTrue(bad.commission_ids)
+
+    def test_paid_while_queued_accrues_collection(self):
+        invoices = self._post_queued()
+        self._register_payment(invoices)
+        self.assertFalse(invoices.commission_ids)
+
+        self._run_cron()
+        commissions = invoices.commission_ids
+        self.assertTrue(commissions)
+        self.assertEqual(set(commissions.mapped('collection_status')), {'accrued'})
+        self.assertEqual(len(self._events(invoices, 'payment')), len(commissions))
+
+    def test_reprocessing_is_idempotent(self):
+        invoices = self._post_queued()
+        self._register_payment(invoices[:1])
+        self._run_cron()
+        commissions = invoices.commission_ids
+        events = self.env['salesperson.commission.event'].search(
+            [('move_id', 'in', invoices.ids)])
+
+        invoices.action_requeue_commissions()
+        self._run_cron()
+        self.assertEqual(set(invoices.mapped('commission_queue_state')), {'done'})
+        self.assertEqual(invoices.commission_ids, commissions)
+        self.assertEqual(
+            self.env['salesperson.commission.event'].search(
+                [('move_id', 'in', invoices.ids)]),
+            events)
+
+    def test_concurrency_error_is_not_counted(self):
+        invoices = self._post_queued()
+        # Por qué: Otro worker generando la misma factura → la corrida se
+        # aborta para que Odoo/el cron la reintente, sin marcarla fallida
+        with self._failing_generation(
+                invoices[:1], psycopg2.errors.SerializationFailure('Error de prueba')):
+            with self.assertRaises(psycopg2.errors.SerializationFailure):
+                self._run_cron()
+        self.assertEqual(set(invoices.mapped('commission_queue_state')), {'queued'})
+        self.assertEqual(set(invoices.mapped('commission_queue_attempts')), {0})
+        self.assertFalse(invoices.commission_ids)
+
+        self._run_cron()
+        self.assertEqual(set(invoices.mapped('commission_queue_state')), {'done'})
@@ -0,0 +1,69 @@
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import CommissionTestCommon
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionRecompute(CommissionTestCommon):
+    """Recálculo tras cambiar reglas, en tandas reanudables."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.salesperson = cls.env['res.users'].with_context(no_reset_password=True).create({
+            'name': 'Test Vendedor Recálculo',
+            'login': 'test_commission_recompute',
+            'company_id': cls.env.company.id,
+            'company_ids': [(6, 0, cls.env.company.ids)],
+        })
+        cls.partner = cls.env['res.partner'].create({'name': 'Test Cliente Recálculo'})
+        cls.product_a, cls.product_b = cls.env['product.product'].create([
+            {'name': 'Test Producto A', 'taxes_id': [(5, 0, 0)]},
+            {'name': 'Test Producto B', 'taxes_id': [(5, 0, 0)]},
+        ])
+        cls.env['salesperson.commission.rule'].create({
+            'salesperson_id': cls.salesperson.id,
+            'commission_percentage': 2.0,
+        })
+        cls.invoices = cls.env['account.move'].create([{
+            'move_type': 'out_invoice',
+            'partner_id': cls.partner.id,
+            'invoice_user_id': cls.salesperson.id,
+            'invoice_date': fields.Date.today(),
+            'invoice_line_ids': [(0, 0, {
+                'product_id': product.id,
+                'quantity': 1,
+                'price_unit': 100.0,
+                'tax_ids': [(5, 0, 0)],
+            }) for product in (cls.product_a, cls.product_b)],
+        } for _i in range(3)])
+        cls.invoices.action_post()
+
+    def test_recompute_in_batches(self):
+        self.assertEqual(self.invoices.commission_ids.mapped('base_amount'), [200.0] * 3)
+        rule = self.env['salesperson.commission.rule'].create({
+            'salesperson_id': self.salesperson.id,
+            'product_id': self.product_a.id,
+            'commission_percentage': 3.0,
+        })
+        wizard = self.env['commission.recompute'].create({
+            'rule_ids': [(6, 0, rule.ids)],
+            'max_moves': 2,
+        })
+
+        wizard.action_recompute()
+        self.assertEqual(wizard.state, 'partial')
+        self.assertEqual(wizard.move_count, 2)
+        while wizard.state == 'partial':
+            wizard.action_recompute()
+
+        self.assertEqual(wizard.move_count, 3)
+        self.assertEqual(wizard.updated_count, 3)
+        self.assertEqual(wizard.created_count, 3)
+        for invoice in self.invoices:
+            amounts = {
+                comm.commission_percentage: (comm.base_amount, comm.invoice_commission)
+                for comm in invoice.commission_ids
+            }
+            self.assertEqual(amounts, {2.0: (100.0, 1.0), 3.0: (100.0, 1.5)})
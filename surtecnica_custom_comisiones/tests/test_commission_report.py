@@ -0,0 +1,58 @@
+import random
+
+from odoo.tests import tagged
+
+from .common import CommissionTestCommon
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionReport(CommissionTestCommon):
+    """Análisis pre-agregado: totales, refresco tras los lotes y fecha visible."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = random.Random(0)
+        catalog = cls._generate_catalog(rng, 2, 5)
+        cls.invoices = cls._create_invoices(rng, catalog, 4, 2)
+        cls.invoices.action_post()
+
+    def _report_total(self):
+        self.env.flush_all()
+        self.env.invalidate_all()
+        groups = self.env['salesperson.commission.report'].read_group(
+            [('salesperson_id', 'in', self.invoices.commission_ids.salesperson_id.ids)],
+            ['commission_amount:sum'], [])
+        return groups[0]['commission_amount'] or 0.0
+
+    def test_report_matches_commissions(self):
+        self.env['salesperson.commission.report']._refresh()
+        self.assertAlmostEqual(
+            self._report_total(), sum(self.invoices.commission_ids.mapped('commission_amount')))
+
+    def test_recompute_refreshes_report(self):
+        self.env['salesperson.commission.report']._refresh()
+        before = self._report_total()
+        rules = self.env['salesperson.commission.rule'].search([
+            ('salesperson_id', 'in', self.invoices.commission_ids.salesperson_id.ids)])
+        rules.write({'commission_percentage': 0.0})
+        date = self.invoices[0].invoice_date
+        self.env['account.move']._recompute_commissions(
+            date, date, rule_ids=rules.ids, commit=False)
+        # Por qué: Sin refresco manual el análisis ya refleja el recálculo
+        self.assertNotAlmostEqual(before, 0.0)
+        self.assertAlmostEqual(self._report_total(), 0.0)
+
+    def test_open_report_shows_refresh_time(self):
+        Report = self.env['salesperson.commission.report']
+        Report._refresh()
+        self.assertTrue(Report._get_refreshed_at())
+        action = Report.action_open_report()
+        self.assertEqual(action['res_model'], 'salesperson.commission.report')
+        self.assertIn('datos al', action['name'])
+
+    def test_commission_list_has_no_pivot(self):
+        action = self.env['ir.actions.act_window']._for_xml_id(
+            'surtecnica_custom_comisiones.salesperson_commission_action')
+        self.assertNotIn('pivot', action['view_mode'])
+        self.assertNotIn('graph', action['view_mode'])
@@ -0,0 +1,171 @@
+import base64
+import csv
+import io
+import unittest
+
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+
+from .common import CommissionTestCommon
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionRuleImport(CommissionTestCommon):
+    """Importación masiva de reglas: parseo, referencias y upsert por clave."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.salesperson = cls.env['res.users'].with_context(no_reset_password=True).create({
+            'name': 'Test Vendedor Import',
+            'login': 'test_commission_import',
+            'company_id': cls.env.company.id,
+            'company_ids': [(6, 0, cls.env.company.ids)],
+        })
+        cls.partner, cls.partner_xmlid = cls.env['res.partner'].create([
+            {'name': 'Test Cliente Import', 'ref': 'TEST-IMP-1'},
+            {'name': 'Test Cliente Import XML'},
+        ])
+        cls.env['ir.model.data'].create({
+            'module': 'test_commission_import',
+            'name': 'partner_xmlid',
+            'model': 'res.partner',
+            'res_id': cls.partner_xmlid.id,
+        })
+        # Por qué: Misma clave natural en dos clientes → referencia ambigua
+        cls.env['res.partner'].create([
+            {'name': f'Test Cliente Duplicado {i}', 'ref': 'TEST-IMP-DUP'} for i in range(2)])
+        cls.category = cls.env['product.category'].create({'name': 'Test Categoría Import'})
+        cls.product = cls.env['product.product'].create({
+            'name': 'Test Producto Import',
+            'default_code': '1234',
+            'categ_id': cls.category.id,
+        })
+
+    def _import(self, rows, filename='reglas.csv', delimiter=','):
+        output = io.StringIO()
+        csv.writer(output, delimiter=delimiter).writerows(rows)
+        return self._import_data(output.getvalue().encode(), filename)
+
+    def _import_data(self, data, filename):
+        wizard = self.env['commission.rule.import'].create({
+            'file': base64.b64encode(data),
+            'filename': filename,
+        })
+        wizard.action_import()
+        return wizard
+
+    def _rules(self, **domain):
+        return self.env['salesperson.commission.rule'].with_context(active_test=False).search(
+            [('salesperson_id', '=', self.salesperson.id)]
+            + [(field, '=', value) for field, value in domain.items()])
+
+    def _counts(self, wizard):
+        return wizard.created_count, wizard.updated_count, wizard.unchanged_count
+
+    def test_csv_creates_updates_and_skips_unchanged(self):
+        header = ['salesperson_id', 'partner_id', 'commission_percentage']
+        row = ['test_commission_import', 'TEST-IMP-1']
+        self.assertEqual(self._counts(self._import([header, row + ['5']])), (1, 0, 0))
+        rule = self._rules(partner_id=self.partner.id)
+        self.assertEqual(rule.commission_percentage, 5.0)
+        self.assertEqual(rule.company_id, self.env.company)
+
+        self.assertEqual(self._counts(self._import([header, row + ['5']])), (0, 0, 1))
+        # Por qué: Separador ';' y coma decimal, como exporta Excel en español
+        wizard = self._import([header, row + ['7,5']], delimiter=';')
+        self.assertEqual(self._counts(wizard), (0, 1, 0))
+        self.assertEqual(self._rules(partner_id=self.partner.id), rule)
+        self.assertEqual(rule.commission_percentage, 7.5)
+
+    @unittest.skipIf(openpyxl is None, 'openpyxl no está instalado')
+    def test_xlsx(self):
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.append(['salesperson_id', 'product_id', 'commission_percentage'])
+        # Por qué: Las celdas numéricas llegan como float (1234.0 → '1234')
+        sheet.append(['test_commission_import', 1234.0, 3])
+        output = io.BytesIO()
+        workbook.save(output)
+        self._import_data(output.getvalue(), 'reglas.xlsx')
+        self.assertEqual(self._rules(product_id=self.product.id).commission_percentage, 3.0)
+
+    def test_external_id_and_natural_key(self):
+        self._import([
+            ['salesperson_id', 'partner_id', 'product_category_id', 'commission_percentage'],
+            ['test_commission_import', 'test_commission_import.partner_xmlid', '', '4'],
+            ['test_commission_import', 'TEST-IMP-1', self.category.complete_name, '6'],
+        ])
+        self.assertEqual(self._rules(partner_id=self.partner_xmlid.id).commission_percentage, 4.0)
+        rule = self._rules(partner_id=self.partner.id)
+        self.assertEqual(rule.product_category_id, self.category)
+        self.assertEqual(rule.commission_percentage, 6.0)
+
+    def test_errors_import_nothing(self):
+        with self.assertRaises(UserError) as error:
+            self._import([
+                ['salesperson_id', 'partner_id', 'zone_id', 'commission_percentage'],
+                ['test_commission_import', 'TEST-IMP-1', '', '5'],
+                ['test_commission_import', 'TEST-IMP-DUP', '', '5'],
+                ['test_commission_import', '', 'Test Zona Inexistente', '5'],
+                ['test_commission_import', '', '', 'abc'],
+            ])
+        message = str(error.exception)
+        self.assertIn('ambiguo', message)
+        self.assertIn('Test Zona Inexistente', message)
+        self.assertIn('abc', message)
+        # Por qué: Todo o nada — la fila válida tampoco se importa
+        self.assertFalse(self._rules())
+
+    def test_global_rule_matched_with_coalesce(self):
+        rule = self.env['salesperson.commission.rule'].create({
+            'salesperson_id': self.salesperson.id,
+            'partner_id': self.partner.id,
+            'company_id': False,
+            'commission_percentage': 3.0,
+        })
+        # Por qué: company_id vacío = regla global; NULL no es igual a NULL
+        # en SQL, la clave se compara con COALESCE
+        wizard = self._import([
+            ['salesperson_id', 'partner_id', 'company_id', 'commission_percentage'],
+            ['test_commission_import', 'TEST-IMP-1', '', '8'],
+        ])
+        self.assertEqual(self._counts(wizard), (0, 1, 0))
+        self.assertEqual(self._rules(), rule)
+        self.assertEqual(rule.commission_percentage, 8.0)
+
+    def test_archived_rule_is_reactivated(self):
+        rule = self.env['salesperson.commission.rule'].create({
+            'salesperson_id': self.salesperson.id,
+            'partner_id': self.partner.id,
+            'commission_percentage': 3.0,
+            'active': False,
+        })
+        wizard = self._import([
+            ['salesperson_id', 'partner_id', 'commission_percentage'],
+            ['test_commission_import', 'TEST-IMP-1', '3'],
+        ])
+        self.assertEqual(self._counts(wizard), (0, 1, 0))
+        self.assertEqual(self._rules(), rule)
+        self.assertTrue(rule.active)
+
+    def test_rule_index_cache_cleared(self):
+        Rule = self.env['salesperson.commission.rule']
+        Rule.create({
+            'salesperson_id': self.salesperson.id,
+            'partner_id': self.partner.id,
+            'commission_percentage': 3.0,
+        })
+        args = (self.salesperson, self.partner, self.product, self.category,
+                self.env['commission.zone'])
+        self.assertEqual(Rule._get_commission_percentage(*args)[1], 3.0)
+        self._import([
+            ['salesperson_id', 'partner_id', 'commission_percentage'],
+            ['test_commission_import', 'TEST-IMP-1', '9'],
+        ])
+        self.assertEqual(Rule._get_commission_percentage(*args)[1], 9.0)
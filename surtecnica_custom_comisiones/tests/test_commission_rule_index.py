@@ -0,0 +1,162 @@
+import itertools
+
+from odoo.tests import tagged
+
+from .common import CommissionTestCommon
+
+_RULE_FIELDS = ('partner_id', 'zone_id', 'product_id', 'product_category_id')
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionRuleIndex(CommissionTestCommon):
+    """El índice compilado de reglas resuelve igual que la búsqueda ordenada.
+
+    Las reglas cubren las 16 combinaciones valor/comodín (porcentaje = 1 +
+    máscara, así el porcentaje delata qué combinación ganó), reglas globales
+    que comparten clave con una de la compañía y una regla archivada.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        country = cls.env.company.country_id or cls.env.ref('base.ar')
+        cls.salesperson = cls.env['res.users'].with_context(no_reset_password=True).create({
+            'name': 'Test Vendedor Índice',
+            'login': 'test_commission_rule_index',
+            'company_id': cls.env.company.id,
+            'company_ids': [(6, 0, cls.env.company.ids)],
+        })
+        cls.zones = cls.env['commission.zone'].create([
+            {'name': f'Test Zona Índice {i}', 'country_id': country.id} for i in range(2)])
+        cls.categories = cls.env['product.category'].create([
+            {'name': f'Test Categoría Índice {i}'} for i in range(2)])
+        cls.products = cls.env['product.product'].create([
+            {'name': f'Test Producto Índice {i}', 'categ_id': categ.id}
+            for i, categ in enumerate(cls.categories)])
+        cls.customer = cls.env['res.partner'].create({
+            'name': 'Test Cliente Índice', 'is_company': True})
+        cls.contact = cls.env['res.partner'].create({
+            'name': 'Test Contacto Índice', 'parent_id': cls.customer.id})
+        cls.other = cls.env['res.partner'].create({'name': 'Test Otro Cliente Índice'})
+
+        values = (cls.customer.id, cls.zones[0].id, cls.products[0].id, cls.categories[0].id)
+        vals_list = []
+        for mask in range(16):
+            vals = {'salesperson_id': cls.salesperson.id, 'commission_percentage': 1.0 + mask}
+            for bit, field_name, value in zip((8, 4, 2, 1), _RULE_FIELDS, values):
+                if mask & bit:
+                    vals[field_name] = value
+            vals_list.append(vals)
+        base = {'salesperson_id': cls.salesperson.id}
+        vals_list += [
+            # Por qué: Misma clave que la regla de compañía "solo cliente" → pierde
+            dict(base, partner_id=cls.customer.id, company_id=False,
+                 commission_percentage=50.0),
+            dict(base, zone_id=cls.zones[1].id, company_id=False,
+                 commission_percentage=30.0),
+            dict(base, product_category_id=cls.categories[1].id,
+                 commission_percentage=20.0),
+            dict(base, partner_id=cls.customer.id, zone_id=cls.zones[1].id,
+                 product_id=cls.products[1].id,
+                 product_category_id=cls.categories[1].id,
+                 commission_percentage=99.0, active=False),
+        ]
+        cls.rules = cls.env['salesperson.commission.rule'].create(vals_list)
+
+    def _search_reference(self, partner, zone, product, category):
+        """Resolución previa al índice: una búsqueda con comodines por campo.
+
+        Mismo dominio que la búsqueda original; el orden "NOT NULL primero"
+        por partner > zona > producto > categoría se aplica explícitamente y,
+        a igual clave, gana la regla de la compañía.
+        """
+        Rule = self.env['salesperson.commission.rule']
+        rules = Rule.search([
+            ('salesperson_id', '=', self.salesperson.id),
+            ('company_id', 'in', [self.env.company.id, False]),
+            '|', ('partner_id', '=', partner.commercial_partner_id.id), ('partner_id', '=', False),
+            '|', ('zone_id', '=', zone.id), ('zone_id', '=', False),
+            '|', ('product_id', '=', product.id), ('product_id', '=', False),
+            '|', ('product_category_id', '=', category.id), ('product_category_id', '=', False),
+        ])
+        if not rules:
+            return Rule, 0.0
+        rule = max(rules, key=lambda r: (
+            bool(r.partner_id), bool(r.zone_id), bool(r.product_id),
+            bool(r.product_category_id), bool(r.company_id)))
+        return rule, rule.commission_percentage
+
+    def _lookup(self, partner, zone, product, category):
+        return self.env['salesperson.commission.rule']._get_commission_percentage(
+            self.salesperson, partner, product, category, zone)
+
+    def test_index_matches_search_grid(self):
+        Rule = self.env['salesperson.commission.rule']
+        zones = list(self.zones) + [self.env['commission.zone']]
+        grid = list(itertools.product(
+            self.customer | self.contact | self.other, zones,
+            self.products, self.categories))
+        keys = {
+            (self.salesperson.id, partner.commercial_partner_id.id, zone.id,
+             product.id, category.id): (partner, zone, product, category)
+            for partner, zone, product, category in grid
+        }
+        resolved = Rule._resolve_commission_percentages(list(keys))
+
+        for key, (partner, zone, product, category) in keys.items():
+            with self.subTest(partner=partner.name, zone=zone.name,
+                              product=product.name, category=category.name):
+                expected = self._search_reference(partner, zone, product, category)
+                self.assertEqual(self._lookup(partner, zone, product, category), expected)
+                self.assertEqual(resolved[key], (expected[0].id, expected[1]))
+
+    def test_specificity_order(self):
+        zone, product, category = self.zones[0], self.products[0], self.categories[0]
+        no_zone = self.env['commission.zone']
+        # Por qué: Cliente (8) le gana a zona + producto + categoría (7)
+        self.assertEqual(self._lookup(self.customer, zone, product, category)[1], 16.0)
+        self.assertEqual(self._lookup(self.other, zone, product, category)[1], 8.0)
+        self.assertEqual(
+            self._lookup(self.customer, no_zone, self.products[1], category)[1], 10.0)
+        # Por qué: Sin partner ni zona, producto (2) le gana a categoría (1)
+        self.assertEqual(
+            self._lookup(self.other, no_zone, product, self.categories[1])[1], 3.0)
+
+    def test_child_contact_uses_commercial_partner(self):
+        for zone, product, category in itertools.product(
+                self.zones, self.products, self.categories):
+            self.assertEqual(
+                self._lookup(self.contact, zone, product, category),
+                self._lookup(self.customer, zone, product, category))
+
+    def test_company_rule_beats_global_with_same_key(self):
+        rule, percentage = self._lookup(
+            self.customer, self.env['commission.zone'], self.products[1], self.categories[1])
+        self.assertEqual(percentage, 9.0)
+        self.assertEqual(rule.company_id, self.env.company)
+
+    def test_archived_rule_is_ignored(self):
+        rule, percentage = self._lookup(
+            self.customer, self.zones[1], self.products[1], self.categories[1])
+        self.assertEqual(percentage, 9.0)
+        self.assertTrue(rule.active)
+
+    def test_cache_invalidated_on_rule_changes(self):
+        args = (self.customer, self.zones[0], self.products[0], self.categories[0])
+        top = self.rules.filtered(lambda r: r.commission_percentage == 16.0)
+        archived = self.rules.filtered(lambda r: not r.active)
+        self.assertEqual(self._lookup(*args), (top, 16.0))
+
+        top.commission_percentage = 17.0
+        self.assertEqual(self._lookup(*args), (top, 17.0))
+        top.active = False
+        self.assertEqual(self._lookup(*args)[1], 15.0)
+        top.active = True
+        self.assertEqual(self._lookup(*args), (top, 17.0))
+        top.unlink()
+        self.assertEqual(self._lookup(*args)[1], 15.0)
+
+        archived.active = True
+        self.assertEqual(
+            self._lookup(self.customer, self.zones[1], self.products[1], self.categories[1]),
+            (archived, 99.0))
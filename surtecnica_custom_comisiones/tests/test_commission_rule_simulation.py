@@ -0,0 +1,103 @@
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import CommissionTestCommon
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionRuleSimulation(CommissionTestCommon):
+    """Simulador de reglas: cambios propuestos, compañía y moneda."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        company_2 = cls.company_data_2['company']
+        cls.salesperson = cls.env['res.users'].with_context(no_reset_password=True).create({
+            'name': 'Test Vendedor Simulación',
+            'login': 'test_commission_simulation',
+            'company_id': cls.env.company.id,
+            'company_ids': [(6, 0, (cls.env.company | company_2).ids)],
+        })
+        cls.rule = cls.env['salesperson.commission.rule'].create({
+            'salesperson_id': cls.salesperson.id,
+            'commission_percentage': 5.0,
+            'company_id': False,
+        })
+        cls.partners = cls.env['res.partner'].create([
+            {'name': f'Test Cliente Simulación {i}'} for i in range(2)])
+        cls.product = cls.env['product.product'].create({
+            'name': 'Test Producto Simulación', 'taxes_id': [(5, 0, 0)]})
+        cls.currency = cls.currency_data['currency']
+
+        invoices = (
+            cls._invoice(cls.partners[0], 100.0)
+            | cls._invoice(cls.partners[1], 300.0)
+            | cls._invoice(cls.partners[0], 1000.0, currency=cls.currency))
+        invoices.action_post()
+        # Por qué: Factura de otra compañía con la misma regla global → no
+        # debe sumarse a la simulación de la compañía actual
+        cls._invoice(cls.partners[0], 500.0, company_data=cls.company_data_2)\
+            .with_company(company_2).action_post()
+
+    @classmethod
+    def _invoice(cls, partner, price, currency=None, company_data=None):
+        company_data = company_data or cls.company_data
+        company = company_data['company']
+        return cls.env['account.move'].with_company(company).create({
+            'move_type': 'out_invoice',
+            'journal_id': company_data['default_journal_sale'].id,
+            'partner_id': partner.id,
+            'invoice_user_id': cls.salesperson.id,
+            'invoice_date': fields.Date.today(),
+            'currency_id': (currency or company.currency_id).id,
+            'invoice_line_ids': [(0, 0, {
+                'product_id': cls.product.id,
+                'quantity': 1,
+                'price_unit': price,
+                'tax_ids': [(5, 0, 0)],
+            })],
+        })
+
+    def _simulate(self, lines=()):
+        """Returns: dict {moneda: (actual, simulado)} del vendedor."""
+        today = fields.Date.today()
+        simulation = self.env['commission.rule.simulation'].create({
+            'date_from': today,
+            'date_to': today,
+            'salesperson_ids': [(6, 0, self.salesperson.ids)],
+            'line_ids': [(0, 0, dict(vals, salesperson_id=self.salesperson.id))
+                         for vals in lines],
+        })
+        simulation.action_simulate()
+        results = simulation.result_ids.filtered(lambda r: r.result_type == 'salesperson')
+        return {r.currency_id: (r.current_amount, r.simulated_amount) for r in results}
+
+    def test_no_changes_matches_current(self):
+        company_currency = self.env.company.currency_id
+        self.assertEqual(self._simulate(), {
+            company_currency: (20.0, 20.0),
+            self.currency: (50.0, 50.0),
+        })
+
+    def test_rule_line_applies_its_dimensions(self):
+        results = self._simulate([{
+            'rule_id': self.rule.id,
+            'partner_id': self.partners[0].id,
+            'commission_percentage': 10.0,
+        }])
+        # Por qué: La regla editada queda solo para el cliente 0 → el
+        # cliente 1 se queda sin regla
+        self.assertEqual(results, {
+            self.env.company.currency_id: (20.0, 10.0),
+            self.currency: (50.0, 100.0),
+        })
+
+    def test_removed_rule_and_new_rule(self):
+        results = self._simulate([
+            {'rule_id': self.rule.id, 'remove': True},
+            {'partner_id': self.partners[1].id, 'commission_percentage': 2.0},
+        ])
+        self.assertEqual(results, {
+            self.env.company.currency_id: (20.0, 6.0),
+            self.currency: (50.0, 0.0),
+        })
@@ -0,0 +1,104 @@
+from odoo.tests import tagged
+
+from .common import CommissionTestCommon
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionSalePreview(CommissionTestCommon):
+    """La comisión estimada del pedido es la que se genera al facturarlo.
+
+    El cliente comercial y la dirección de facturación difieren: la regla se
+    busca por el partner comercial y la zona por la dirección de facturación
+    (rango de CP), igual que en _generate_commissions.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        country = cls.env.company.country_id or cls.env.ref('base.ar')
+        cls.salesperson = cls.env['res.users'].with_context(no_reset_password=True).create({
+            'name': 'Test Vendedor Pedido',
+            'login': 'test_commission_sale_preview',
+            'company_id': cls.env.company.id,
+            'company_ids': [(6, 0, cls.env.company.ids)],
+        })
+        cls.zone = cls.env['commission.zone'].create({
+            'name': 'Test Zona Norte Pedido',
+            'country_id': country.id,
+            'zip_range_ids': [(0, 0, {'zip_from': '1600', 'zip_to': '1699'})],
+        })
+        cls.customer = cls.env['res.partner'].create({
+            'name': 'Test Cliente Pedido',
+            'is_company': True,
+            'country_id': country.id,
+            'zip': '5000',
+        })
+        cls.invoice_address = cls.env['res.partner'].create({
+            'name': 'Test Facturación Pedido',
+            'type': 'invoice',
+            'parent_id': cls.customer.id,
+            'country_id': country.id,
+            'zip': 'B1636ABC',
+        })
+        cls.other_customer = cls.env['res.partner'].create({
+            'name': 'Test Otro Cliente Pedido',
+            'country_id': country.id,
+            'zip': '5000',
+        })
+        cls.products = cls.env['product.product'].create([{
+            'name': f'Test Producto Pedido {i}',
+            'detailed_type': 'consu',
+            'invoice_policy': 'order',
+            'taxes_id': [(5, 0, 0)],
+        } for i in range(3)])
+        cls.env['salesperson.commission.rule'].create([
+            {'salesperson_id': cls.salesperson.id, 'partner_id': cls.customer.id,
+             'product_id': cls.products[0].id, 'commission_percentage': 6.0},
+            {'salesperson_id': cls.salesperson.id, 'zone_id': cls.zone.id,
+             'product_id': cls.products[1].id, 'commission_percentage': 4.0},
+        ])
+
+    def _order(self, partner, invoice_partner, prices):
+        return self.env['sale.order'].create({
+            'partner_id': partner.id,
+            'partner_invoice_id': invoice_partner.id,
+            'user_id': self.salesperson.id,
+            'order_line': [(0, 0, {
+                'product_id': product.id,
+                'product_uom_qty': 1,
+                'price_unit': price,
+                'tax_id': [(5, 0, 0)],
+            }) for product, price in zip(self.products, prices)],
+        })
+
+    def _invoice(self, order):
+        order.action_confirm()
+        invoice = order._create_invoices()
+        invoice.action_post()
+        self.assertEqual(invoice.partner_id, order.partner_invoice_id)
+        self.assertEqual(invoice.invoice_user_id, self.salesperson)
+        return invoice
+
+    def test_preview_matches_generated_commissions(self):
+        order = self._order(self.customer, self.invoice_address, (100.0, 200.0, 300.0))
+        lines = order.order_line
+        # Por qué: Regla del partner comercial, regla de la zona por CP de la
+        # dirección de facturación y una línea sin regla
+        self.assertEqual(lines.mapped('commission_percentage'), [6.0, 4.0, 0.0])
+        self.assertAlmostEqual(order.commission_preview_amount, 14.0)
+
+        invoice = self._invoice(order)
+        commissions = invoice.commission_ids
+        self.assertAlmostEqual(
+            sum(commissions.mapped('commission_amount')), order.commission_preview_amount)
+        self.assertEqual(
+            sorted(commissions.mapped('commission_percentage')),
+            sorted(p for p in lines.mapped('commission_percentage') if p))
+        self.assertEqual(commissions.zone_id, self.zone)
+
+    def test_preview_without_rules_generates_nothing(self):
+        # Por qué: Sin zona por CP ni regla del cliente → ninguna línea aplica
+        order = self._order(self.other_customer, self.other_customer, (100.0, 200.0, 300.0))
+        self.assertEqual(order.commission_preview_amount, 0.0)
+        invoice = self._invoice(order)
+        self.assertFalse(invoice.commission_ids)
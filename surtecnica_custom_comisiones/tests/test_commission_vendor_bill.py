@@ -0,0 +1,48 @@
+from odoo import fields
+from odoo.tests import tagged
+
+from .common import CommissionTestCommon
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionVendorBill(CommissionTestCommon):
+    """Asistente de facturación de comisiones al vendedor."""
+
+    def test_partner_grouping_keys_on_partner_id(self):
+        salesperson = self.env['res.users'].with_context(no_reset_password=True).create({
+            'name': 'Test Vendedor Bill',
+            'login': 'test_commission_vendor_bill',
+            'company_id': self.env.company.id,
+            'company_ids': [(6, 0, self.env.company.ids)],
+        })
+        self.env['salesperson.commission.rule'].create({
+            'salesperson_id': salesperson.id,
+            'commission_percentage': 5.0,
+        })
+        product = self.env['product.product'].create({
+            'name': 'Test Producto Bill', 'taxes_id': [(5, 0, 0)]})
+        # Por qué: Dos clientes distintos con el mismo nombre
+        partners = self.env['res.partner'].create([
+            {'name': 'Test Cliente Homónimo'}, {'name': 'Test Cliente Homónimo'}])
+        invoices = self.env['account.move'].create([{
+            'move_type': 'out_invoice',
+            'partner_id': partner.id,
+            'invoice_user_id': salesperson.id,
+            'invoice_date': fields.Date.today(),
+            'invoice_line_ids': [(0, 0, {
+                'product_id': product.id,
+                'quantity': 1,
+                'price_unit': price,
+                'tax_ids': [(5, 0, 0)],
+            })],
+        } for partner, price in zip(partners, (100.0, 300.0))])
+        invoices.action_post()
+
+        wizard = self._create_bill_wizard(
+            invoices.commission_ids, self.company_data['default_journal_purchase'],
+            line_grouping='partner')
+        wizard.action_create_bills()
+        bill = invoices.commission_ids.invoice_vendor_bill_id
+        self.assertEqual(len(bill), 1)
+        self.assertEqual(
+            sorted(bill.invoice_line_ids.mapped('price_unit')), [2.5, 7.5])
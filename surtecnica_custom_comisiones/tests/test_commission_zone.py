@@ -0,0 +1,135 @@
+import random
+
+from odoo.tests import tagged
+
+from .common import CommissionTestCommon
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionZoneBackfill(CommissionTestCommon):
+    """Backfill de zone_id en comisiones generadas sin zona guardada."""
+
+    def test_backfill_zone_ids(self):
+        rng = random.Random(0)
+        catalog = self._generate_catalog(rng, 1, 5)
+        invoices = self._create_invoices(rng, catalog, 3, 2)
+        invoices.action_post()
+        commissions = invoices.commission_ids
+        expected = {comm.id: comm.zone_id for comm in commissions}
+        self.assertTrue(any(expected.values()))
+
+        # Por qué: Simula comisiones generadas antes de guardar la zona
+        commissions.flush_recordset()
+        self.env.cr.execute(
+            "UPDATE salesperson_commission SET zone_id = NULL WHERE id IN %s",
+            (tuple(commissions.ids),))
+        commissions.invalidate_recordset(['zone_id'])
+
+        self.env['salesperson.commission']._backfill_zone_ids(chunk_size=2)
+        for comm in commissions:
+            self.assertEqual(comm.zone_id, expected[comm.id])
+
+
+@tagged('post_install', '-at_install')
+class TestCommissionZoneResolution(CommissionTestCommon):
+    """Zonas por CP (índice de intervalos) y prioridad manual > CP > provincia."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.country = cls.env.ref('base.ar')
+        cls.states = cls.env['res.country.state'].search(
+            [('country_id', '=', cls.country.id)], limit=3)
+        Zone = cls.env['commission.zone']
+        cls.wide, cls.narrow, cls.narrowest = Zone.create([{
+            'name': f'Test Zona CP {name}',
+            'country_id': cls.country.id,
+            'zip_range_ids': [(0, 0, {'zip_from': zip_from, 'zip_to': zip_to})],
+        } for name, zip_from, zip_to in (
+            ('Ancha', '1000', '1999'),
+            ('Angosta', '1600', '1699'),
+            ('Mínima', '1630', '1640'),
+        )])
+        cls.province = Zone.create({
+            'name': 'Test Zona Provincia',
+            'country_id': cls.country.id,
+            'state_id': cls.states[0].id,
+        })
+
+    def _lookup(self, zip_code):
+        zone_id = self.env['commission.zone']._lookup_zip_zone(self.country.id, zip_code)
+        return self.env['commission.zone'].browse(zone_id or [])
+
+    def _partner(self, **vals):
+        return self.env['res.partner'].create(dict(
+            {'name': 'Test Cliente Zona', 'country_id': self.country.id}, **vals))
+
+    def _resolve(self, partner):
+        return self.env['commission.zone']._resolve_zone(partner)
+
+    def test_overlapping_ranges_narrowest_wins(self):
+        expected = {
+            '999': False, '1000': self.wide, '1599': self.wide,
+            '1600': self.narrow, '1629': self.narrow, '1630': self.narrowest,
+            '1635': self.narrowest, '1640': self.narrowest, '1641': self.narrow,
+            '1699': self.narrow, '1700': self.wide, '1999': self.wide, '2000': False,
+        }
+        for zip_code, zone in expected.items():
+            with self.subTest(zip=zip_code):
+                self.assertEqual(self._lookup(zip_code), zone or self.env['commission.zone'])
+
+    def test_cpa_zip_codes(self):
+        self.assertEqual(self._lookup('B1636ABC'), self.narrowest)
+        self.assertEqual(self._lookup('C1650XYZ'), self.narrow)
+        self.assertFalse(self._lookup('ABCD'))
+        self.assertFalse(self._lookup(False))
+        self.assertFalse(
+            self.env['commission.zone']._lookup_zip_zone(False, '1636'))
+
+    def test_manual_beats_zip_beats_state(self):
+        partner = self._partner(
+            zip='1650', state_id=self.states[0].id, commission_zone_id=self.wide.id)
+        self.assertEqual(self._resolve(partner), self.wide)
+        partner.commission_zone_id = False
+        self.assertEqual(self._resolve(partner), self.narrow)
+        partner.zip = '5000'
+        self.assertEqual(self._resolve(partner), self.province)
+
+    def test_zone_with_ranges_counts_for_its_state(self):
+        Zone = self.env['commission.zone']
+        sub_zone = Zone.create({
+            'name': 'A Test Sub-zona Con Provincia',
+            'country_id': self.country.id,
+            'state_id': self.states[1].id,
+            'zip_range_ids': [(0, 0, {'zip_from': '3000', 'zip_to': '3099'})],
+        })
+        outside = self._partner(zip='3500', state_id=self.states[1].id)
+        # Por qué: Única zona de la provincia → cubre también fuera del rango
+        self.assertEqual(self._resolve(outside), sub_zone)
+
+        # Por qué: Una zona provincial sin rangos gana aunque vaya después por nombre
+        province = Zone.create({
+            'name': 'Z Test Provincia',
+            'country_id': self.country.id,
+            'state_id': self.states[1].id,
+        })
+        self.assertEqual(self._resolve(outside), province)
+        inside = self._partner(zip='3050', state_id=self.states[1].id)
+        self.assertEqual(self._resolve(inside), sub_zone)
+
+    def test_cache_invalidated_on_range_changes(self):
+        self.assertEqual(self._lookup('1650'), self.narrow)
+        self.narrow.zip_range_ids.zip_to = '1649'
+        self.assertEqual(self._lookup('1650'), self.wide)
+
+        self.narrow.zip_range_ids.create({
+            'zone_id': self.narrow.id, 'zip_from': '1650', 'zip_to': '1660'})
+        self.assertEqual(self._lookup('1655'), self.narrow)
+
+        self.narrowest.active = False
+        self.assertEqual(self._lookup('1635'), self.narrow)
+        self.narrowest.active = True
+        self.assertEqual(self._lookup('1635'), self.narrowest)
+
+        self.narrowest.zip_range_ids.unlink()
+        self.assertEqual(self._lookup('1635'), self.narrow)
@@ -1 +1,4 @@
 from . import commission_create_vendor_bill
+from . import commission_rule_simulation
+from . import commission_rule_import
+from . import commission_recompute
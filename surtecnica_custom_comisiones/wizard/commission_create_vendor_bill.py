@@ -2,6 +2,8 @@ from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 from collections import defaultdict
 
+from ..models.commission_perf_sample import instrumented
+
 
 class CommissionCreateVendorBill(models.TransientModel):
     """Wizard para crear facturas de proveedor desde comisiones seleccionadas.
@@ -23,6 +25,25 @@ class CommissionCreateVendorBill(models.TransientModel):
     commission_ids = fields.Many2many(
         'salesperson.commission', string='Comisiones',
     )
+    # Por qué: Con miles de porciones por vendedor, una línea por porción hace
+    # lento el posteo, el cálculo de impuestos y el PDF. El detalle por comisión
+    # queda igual en las comisiones vinculadas al bill (smart button).
+    line_grouping = fields.Selection([
+        ('detail', 'Una línea por porción'),
+        ('percentage', 'Por % de comisión y porción'),
+        ('partner', 'Por cliente y porción'),
+    ], string='Líneas de Factura', default='detail', required=True)
+    # Por qué: Selecciones muy grandes se procesan en tandas para no superar
+    # el timeout del worker. Cada tanda agrupa vendedores completos.
+    max_portions = fields.Integer(
+        string='Porciones por Ejecución', default=5000,
+        help='Cantidad aproximada de porciones a facturar por ejecución. '
+             'Si la selección es mayor, el asistente procesa una tanda y '
+             'permite continuar con el resto. 0 = sin límite.')
+    bill_ids = fields.Many2many(
+        'account.move', string='Facturas Creadas', readonly=True)
+    remaining_count = fields.Integer(
+        string='Comisiones Restantes', readonly=True)
 
     @api.model
     def default_get(self, fields_list):
@@ -33,13 +54,20 @@ class CommissionCreateVendorBill(models.TransientModel):
             res['commission_ids'] = [(6, 0, active_ids)]
         return res
 
+    @instrumented('commission.create.vendor.bill.action_create_bills',
+                  records=lambda self: len(self.commission_ids))
     def action_create_bills(self):
         """Crea facturas de proveedor agrupadas por vendedor.
 
-        Patrón: Agrupa comisiones por salesperson_id, crea una factura por
-        vendedor con líneas detalladas por cada porción devengada sin facturar.
+        Patrón: Bulk — precarga todos los datos relacionados, crea las facturas
+        de todos los vendedores de la tanda en un único create() y vincula las
+        porciones con un write agrupado por (factura, campo).
+
+        Si la selección supera max_portions, procesa una tanda de vendedores
+        completos y reabre el asistente con el resto. Es reanudable: las
+        porciones ya vinculadas a una factura no se vuelven a facturar.
 
-        Returns: action para ver las facturas creadas
+        Returns: action para ver las facturas creadas o para continuar
         """
         self.ensure_one()
         if not self.commission_ids:
@@ -48,71 +76,60 @@ class CommissionCreateVendorBill(models.TransientModel):
         product = self.env.ref(
             'surtecnica_custom_comisiones.product_commission')
 
-        # Por qué: Agrupar por vendedor para crear una factura por cada uno
-        grouped = defaultdict(lambda: self.env['salesperson.commission'])
-        for comm in self.commission_ids:
-            grouped[comm.salesperson_id] |= comm
-
-        bills = self.env['account.move']
+        portions = self._get_billable_portions()
+        batch, remaining = self._split_batch(portions)
 
-        for salesperson, comms in grouped.items():
+        vals_list = []
+        link_maps = []  # por factura: {portion_field: [commission_id]}
+        for salesperson in batch:
             lines_data = []
-            link_map = []  # [(commission, portion_field)]
-
-            for comm in comms:
-                # Porción facturación: devengada y sin factura de proveedor
-                if (comm.invoice_status == 'accrued'
-                        and not comm.invoice_vendor_bill_id):
-                    label = 'Facturación'
-                    name = (
-                        f"Comisión {comm.commission_percentage}% - "
-                        f"{comm.move_id.name} - "
-                        f"{comm.partner_id.name} ({label})"
-                    )
-                    lines_data.append((0, 0, {
-                        'product_id': product.id,
-                        'name': name,
-                        'quantity': 1,
-                        'price_unit': comm.invoice_commission,
-                    }))
-                    link_map.append((comm, 'invoice_vendor_bill_id'))
-
-                # Porción cobro: devengada y sin factura de proveedor
-                if (comm.collection_status == 'accrued'
-                        and not comm.collection_vendor_bill_id):
-                    label = 'Cobro'
-                    name = (
-                        f"Comisión {comm.commission_percentage}% - "
-                        f"{comm.move_id.name} - "
-                        f"{comm.partner_id.name} ({label})"
-                    )
-                    lines_data.append((0, 0, {
-                        'product_id': product.id,
-                        'name': name,
-                        'quantity': 1,
-                        'price_unit': comm.collection_commission,
-                    }))
-                    link_map.append((comm, 'collection_vendor_bill_id'))
-
-            if not lines_data:
-                continue
+            link_map = defaultdict(list)
+            for comm, field_name, _amount, _label in portions[salesperson]:
+                link_map[field_name].append(comm.id)
+            for name, amount in self._prepare_bill_lines(portions[salesperson]):
+                lines_data.append((0, 0, {
+                    'product_id': product.id,
+                    'name': name,
+                    'quantity': 1,
+                    'price_unit': amount,
+                }))
 
             # Por qué: partner_id del bill es el partner vinculado al vendedor
-            bill = self.env['account.move'].create({
+            vals_list.append({
                 'move_type': 'in_invoice',
                 'partner_id': salesperson.partner_id.id,
                 'journal_id': self.journal_id.id,
                 'invoice_date': fields.Date.today(),
                 'invoice_line_ids': lines_data,
             })
-
-            # Vincular cada comisión con la factura de proveedor creada
-            for comm, field_name in link_map:
-                comm.write({field_name: bill.id})
-
-            bills |= bill
-
-        if not bills:
+            link_maps.append(link_map)
+
+        bills = self.env['account.move'].create(vals_list)
+
+        # Vincular las comisiones con un write por (factura, porción)
+        Commission = self.env['salesperson.commission']
+        for bill, link_map in zip(bills, link_maps):
+            for field_name, commission_ids in link_map.items():
+                Commission.browse(commission_ids).write({field_name: bill.id})
+
+        all_bills = self.bill_ids | bills
+        if remaining:
+            # Por qué: Reabre el asistente solo con las comisiones pendientes
+            self.write({
+                'bill_ids': [(6, 0, all_bills.ids)],
+                'commission_ids': [(6, 0, remaining.ids)],
+                'remaining_count': len(remaining),
+            })
+            return {
+                'type': 'ir.actions.act_window',
+                'name': _('Crear Factura de Proveedor'),
+                'res_model': self._name,
+                'res_id': self.id,
+                'view_mode': 'form',
+                'target': 'new',
+            }
+
+        if not all_bills:
             raise UserError(_(
                 'No hay porciones devengadas sin facturar en las '
                 'comisiones seleccionadas.'
@@ -121,9 +138,96 @@ class CommissionCreateVendorBill(models.TransientModel):
         # Por qué: Retorna action para mostrar las facturas creadas
         action = self.env['ir.actions.act_window']._for_xml_id(
             'account.action_move_in_invoice_type')
-        if len(bills) == 1:
+        if len(all_bills) == 1:
             action['views'] = [(False, 'form')]
-            action['res_id'] = bills.id
+            action['res_id'] = all_bills.id
         else:
-            action['domain'] = [('id', 'in', bills.ids)]
+            action['domain'] = [('id', 'in', all_bills.ids)]
         return action
+
+    def _prepare_bill_lines(self, portions):
+        """Descripción y monto de cada línea de factura según line_grouping.
+
+        Returns: lista de (name, amount)
+        """
+        if self.line_grouping == 'detail':
+            return [
+                (f"Comisión {comm.commission_percentage}% - "
+                 f"{comm.move_id.name} - "
+                 f"{comm.partner_id.name} ({label})", amount)
+                for comm, _field, amount, label in portions
+            ]
+
+        # Por qué: dict conserva el orden de aparición → líneas estables
+        grouped = {}
+        for comm, _field, amount, label in portions:
+            if self.line_grouping == 'percentage':
+                key = (comm.commission_percentage, label)
+                prefix = f"Comisión {comm.commission_percentage}%"
+            else:
+                # Por qué: Agrupa por id del partner comercial — dos clientes
+                # con el mismo nombre no se mezclan; el nombre es solo etiqueta
+                partner = comm.partner_id.commercial_partner_id
+                key = (partner.id, label)
+                prefix = f"Comisión - {partner.name}"
+            line = grouped.setdefault(key, [prefix, label, 0.0, 0])
+            line[2] += amount
+            line[3] += 1
+        return [
+            (f"{prefix} ({label}) - {count} comprobante(s)", amount)
+            for prefix, label, amount, count in grouped.values()
+        ]
+
+    def _get_billable_portions(self):
+        """Porciones devengadas y sin factura de proveedor, por vendedor.
+
+        Por qué: Precarga en bloque factura, cliente y vendedor de todas las
+        comisiones para no leerlos fila por fila al armar las descripciones.
+
+        Returns: dict {salesperson: [(commission, portion_field, amount, label)]}
+        """
+        comms = self.commission_ids
+        comms.move_id.mapped('name')
+        comms.partner_id.commercial_partner_id.mapped('name')
+        comms.salesperson_id.partner_id
+
+        # Por qué: Agrupar por vendedor para crear una factura por cada uno
+        portions = defaultdict(list)
+        for comm in comms:
+            # Porción facturación: devengada y sin factura de proveedor
+            if (comm.invoice_status == 'accrued'
+                    and not comm.invoice_vendor_bill_id):
+                portions[comm.salesperson_id].append((
+                    comm, 'invoice_vendor_bill_id',
+                    comm.invoice_commission, 'Facturación'))
+            # Porción cobro: devengada y sin factura de proveedor
+            if (comm.collection_status == 'accrued'
+                    and not comm.collection_vendor_bill_id):
+                portions[comm.salesperson_id].append((
+                    comm, 'collection_vendor_bill_id',
+                    comm.collection_commission, 'Cobro'))
+        return portions
+
+    def _split_batch(self, portions):
+        """Separa los vendedores a procesar en esta ejecución del resto.
+
+        Por qué: Se cortan vendedores completos para mantener una sola
+        factura por vendedor dentro de cada tanda.
+
+        Returns: (lista de vendedores de la tanda, comisiones restantes)
+        """
+        salespeople = sorted(portions, key=lambda s: s.id)
+        if not self.max_portions:
+            return salespeople, self.env['salesperson.commission']
+
+        batch = []
+        count = 0
+        for salesperson in salespeople:
+            if batch and count + len(portions[salesperson]) > self.max_portions:
+                break
+            batch.append(salesperson)
+            count += len(portions[salesperson])
+
+        remaining = self.commission_ids.filtered(
+            lambda c: c.salesperson_id in salespeople[len(batch):])
+        return batch, remaining
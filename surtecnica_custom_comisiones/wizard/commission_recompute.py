@@ -0,0 +1,89 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from dateutil.relativedelta import relativedelta
+
+
+class CommissionRecompute(models.TransientModel):
+    """Recálculo de comisiones existentes tras cambiar reglas.
+
+    Patrón: Diff — delega en account.move._recompute_commissions, que
+    re-puntúa las líneas en bloque y solo escribe las comisiones que cambian.
+    Las facturas con comisiones ya facturadas al vendedor se informan aparte.
+
+    Por qué: Cada ejecución procesa a lo sumo max_moves facturas (una
+    transacción por clic, dentro del timeout del worker) y reabre el
+    asistente para continuar desde la última factura; los totales se acumulan.
+    """
+    _name = 'commission.recompute'
+    _description = 'Recálculo de Comisiones'
+
+    date_from = fields.Date(
+        string='Desde', required=True,
+        default=lambda self: fields.Date.context_today(self) - relativedelta(months=12))
+    date_to = fields.Date(
+        string='Hasta', required=True,
+        default=fields.Date.context_today)
+    salesperson_ids = fields.Many2many(
+        'res.users', string='Vendedores',
+        help='Dejar vacío (y sin reglas) para recalcular todos los vendedores')
+    rule_ids = fields.Many2many(
+        'salesperson.commission.rule', string='Reglas',
+        help='Recalcula todas las facturas de los vendedores de estas reglas')
+    max_moves = fields.Integer(
+        string='Facturas por Ejecución', default=2000,
+        help='Cantidad máxima de facturas a recalcular por ejecución. Si el '
+             'período tiene más, el asistente procesa una tanda y permite '
+             'continuar con el resto. 0 = sin límite.')
+    state = fields.Selection([
+        ('draft', 'Borrador'),
+        ('partial', 'En Curso'),
+        ('done', 'Recalculado'),
+    ], default='draft')
+    # Por qué: Keyset — la próxima ejecución sigue desde esta factura
+    last_move_id = fields.Integer(readonly=True)
+    move_count = fields.Integer(string='Facturas Revisadas', readonly=True)
+    created_count = fields.Integer(string='Creadas', readonly=True)
+    updated_count = fields.Integer(string='Actualizadas', readonly=True)
+    removed_count = fields.Integer(string='Eliminadas', readonly=True)
+    unchanged_count = fields.Integer(string='Sin Cambios', readonly=True)
+    skipped_move_ids = fields.Many2many(
+        'account.move', string='Facturas Omitidas (ya facturadas al vendedor)',
+        readonly=True)
+
+    @api.model
+    def default_get(self, fields_list):
+        res = super().default_get(fields_list)
+        # Por qué: Abierto desde la lista de reglas → precarga las seleccionadas
+        if self.env.context.get('active_model') == 'salesperson.commission.rule':
+            res['rule_ids'] = [(6, 0, self.env.context.get('active_ids', []))]
+        return res
+
+    def action_recompute(self):
+        """Recalcula una tanda y reabre el asistente con el resumen acumulado."""
+        self.ensure_one()
+        if self.date_from > self.date_to:
+            raise UserError(_('La fecha desde debe ser anterior a la fecha hasta.'))
+        result = self.env['account.move']._recompute_commissions(
+            self.date_from, self.date_to,
+            salesperson_ids=self.salesperson_ids.ids,
+            rule_ids=self.rule_ids.ids,
+            limit=self.max_moves or None,
+            start_after=self.last_move_id)
+        self.write({
+            'state': 'done' if result['done'] else 'partial',
+            'last_move_id': result['last_id'],
+            'move_count': self.move_count + result['moves'],
+            'created_count': self.created_count + result['created'],
+            'updated_count': self.updated_count + result['updated'],
+            'removed_count': self.removed_count + result['removed'],
+            'unchanged_count': self.unchanged_count + result['unchanged'],
+            'skipped_move_ids': [(4, move_id) for move_id in result['skipped_move_ids']],
+        })
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Recalcular Comisiones'),
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
@@ -0,0 +1,285 @@
+import base64
+import csv
+import io
+from collections import defaultdict
+
+from odoo import models, fields, _
+from odoo.exceptions import UserError
+
+from ..models.commission_perf_sample import instrumented
+
+# Por qué: Columnas = nombres técnicos de la regla (igual que el import
+# estándar). Cada referencia acepta un ID externo (modulo.nombre) o la clave
+# natural del modelo indicada acá.
+_REFERENCE_COLUMNS = {
+    'salesperson_id': ('res.users', 'login'),
+    'partner_id': ('res.partner', 'ref'),
+    'zone_id': ('commission.zone', 'name'),
+    'product_id': ('product.product', 'default_code'),
+    'product_category_id': ('product.category', 'complete_name'),
+    'company_id': ('res.company', 'name'),
+}
+# Por qué: Clave natural de la regla — mismas columnas que unique_rule
+_KEY_FIELDS = ('salesperson_id', 'partner_id', 'zone_id', 'product_id',
+               'product_category_id', 'company_id')
+_INSERT_CHUNK = 1000
+_MAX_ERRORS = 20
+
+
+class CommissionRuleImport(models.TransientModel):
+    """Importación masiva de reglas de comisión con upsert por clave natural.
+
+    Patrón: Set-based upsert — el archivo se parsea en memoria, las referencias
+    se resuelven con una query por columna y las reglas se cargan en una tabla
+    temporal. Un UPDATE y un INSERT ... SELECT aplican todos los cambios.
+    Si alguna fila tiene errores no se escribe nada.
+    """
+    _name = 'commission.rule.import'
+    _description = 'Importación de Reglas de Comisión'
+
+    file = fields.Binary(string='Archivo', required=True)
+    filename = fields.Char(string='Nombre de Archivo')
+    state = fields.Selection([
+        ('upload', 'Subir'),
+        ('done', 'Importado'),
+    ], default='upload')
+    created_count = fields.Integer(string='Creadas', readonly=True)
+    updated_count = fields.Integer(string='Actualizadas', readonly=True)
+    unchanged_count = fields.Integer(string='Sin Cambios', readonly=True)
+
+    @instrumented('commission.rule.import.action_import')
+    def action_import(self):
+        """Importa el archivo y reabre el asistente con el resumen."""
+        self.ensure_one()
+        RuleModel = self.env['salesperson.commission.rule']
+        RuleModel.check_access_rights('create')
+        RuleModel.check_access_rights('write')
+
+        header, rows = self._read_file()
+        rules = self._parse_rules(header, rows)
+        if not rules:
+            raise UserError(_('El archivo no contiene reglas.'))
+        created, updated = self._upsert_rules(rules)
+
+        self.write({
+            'state': 'done',
+            'created_count': created,
+            'updated_count': updated,
+            'unchanged_count': len(rules) - created - updated,
+        })
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Importar Reglas de Comisión'),
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def _read_file(self):
+        """Lee el CSV o XLSX.
+
+        Returns: (header, filas) — header en minúsculas, filas como listas
+        de str (vacías → '').
+        """
+        data = base64.b64decode(self.file)
+        if (self.filename or '').lower().endswith('.xlsx'):
+            # Por qué: openpyxl es opcional — solo se necesita para XLSX
+            try:
+                import openpyxl
+            except ImportError:
+                raise UserError(_(
+                    'Para importar archivos XLSX se necesita la librería '
+                    'openpyxl. Guarde el archivo como CSV o instálela.'))
+            workbook = openpyxl.load_workbook(
+                io.BytesIO(data), read_only=True, data_only=True)
+            raw_rows = workbook.active.iter_rows(values_only=True)
+        else:
+            text = data.decode('utf-8-sig')
+            try:
+                dialect = csv.Sniffer().sniff(text[:4096], delimiters=',;\t')
+            except csv.Error:
+                dialect = csv.excel
+            raw_rows = csv.reader(io.StringIO(text), dialect)
+
+        rows = [[self._cell_to_str(cell) for cell in row] for row in raw_rows]
+        rows = [row for row in rows if any(row)]
+        if not rows:
+            raise UserError(_('El archivo está vacío.'))
+        header = [col.lower() for col in rows[0]]
+        return header, rows[1:]
+
+    def _cell_to_str(self, cell):
+        # Por qué: XLSX devuelve números como float (123.0 → '123')
+        if cell is None:
+            return ''
+        if isinstance(cell, float) and cell.is_integer():
+            return str(int(cell))
+        return str(cell).strip()
+
+    def _parse_rules(self, header, rows):
+        """Valida filas y resuelve referencias en lote.
+
+        Returns: dict {clave natural: porcentaje}. Si la clave se repite en
+        el archivo gana la última fila.
+        """
+        if 'salesperson_id' not in header or 'commission_percentage' not in header:
+            raise UserError(_(
+                'El archivo debe tener las columnas salesperson_id y '
+                'commission_percentage.'))
+        columns = {name: header.index(name) for name in header}
+
+        def value(row, column):
+            position = columns.get(column)
+            return row[position] if position is not None and position < len(row) else ''
+
+        errors = []
+        references = {}
+        for column, (model, key_field) in _REFERENCE_COLUMNS.items():
+            if column not in columns:
+                continue
+            values = {value(row, column) for row in rows} - {''}
+            references[column], column_errors = self._resolve_references(
+                column, model, key_field, values)
+            errors.extend(column_errors)
+
+        # Por qué: Sin columna company_id las reglas van a la compañía actual
+        # (mismo default que el formulario); con la columna vacía son globales
+        default_company_id = (
+            False if 'company_id' in columns else self.env.company.id)
+        rules = {}
+        for line_number, row in enumerate(rows, start=2):
+            raw_percentage = value(row, 'commission_percentage').replace(',', '.')
+            try:
+                percentage = round(float(raw_percentage), 2)
+            except ValueError:
+                errors.append(_('Fila %(line)s: porcentaje inválido "%(value)s".',
+                                line=line_number, value=raw_percentage))
+                continue
+            key = []
+            for column in _KEY_FIELDS:
+                raw = value(row, column)
+                if column == 'company_id' and column not in columns:
+                    key.append(default_company_id)
+                else:
+                    key.append(references.get(column, {}).get(raw, False) if raw else False)
+            if not key[0]:
+                errors.append(_('Fila %(line)s: falta el vendedor.', line=line_number))
+                continue
+            rules[tuple(key)] = percentage
+
+        if errors:
+            raise UserError('\n'.join(errors[:_MAX_ERRORS]))
+        return rules
+
+    def _resolve_references(self, column, model, key_field, values):
+        """Resuelve valores de una columna a ids con dos queries como máximo.
+
+        1. IDs externos (modulo.nombre) en ir_model_data
+        2. El resto por la clave natural del modelo (ej. login del usuario)
+
+        Returns: ({valor: id}, [errores])
+        """
+        resolved = {}
+        xmlids = {tuple(val.split('.', 1)) for val in values if '.' in val}
+        if xmlids:
+            self.env.cr.execute("""
+                SELECT module, name, res_id
+                  FROM ir_model_data
+                 WHERE model = %s AND (module, name) IN %s
+            """, (model, tuple(xmlids)))
+            for module, name, res_id in self.env.cr.fetchall():
+                resolved[f'{module}.{name}'] = res_id
+
+        pending = values - set(resolved)
+        matches = defaultdict(set)
+        if pending:
+            for record in self.env[model].search_read(
+                    [(key_field, 'in', list(pending))], [key_field]):
+                matches[record[key_field]].add(record['id'])
+
+        errors = []
+        for val in sorted(pending):
+            ids = matches.get(val)
+            if not ids:
+                errors.append(_('%(column)s: no se encontró "%(value)s".',
+                                column=column, value=val))
+            elif len(ids) > 1:
+                errors.append(_('%(column)s: "%(value)s" es ambiguo.',
+                                column=column, value=val))
+            else:
+                resolved[val] = ids.pop()
+        return resolved, errors
+
+    def _upsert_rules(self, rules):
+        """Inserta o actualiza reglas por clave natural con SQL set-based.
+
+        La clave se compara con COALESCE(campo, 0) — unique_rule no evita
+        duplicados con NULL y así el join puede usar hash. Las reglas
+        archivadas que coinciden se reactivan.
+
+        Returns: (creadas, actualizadas)
+        """
+        RuleModel = self.env['salesperson.commission.rule']
+        RuleModel.flush_model()
+        cr = self.env.cr
+        cr.execute("DROP TABLE IF EXISTS commission_rule_import_tmp")
+        cr.execute("""
+            CREATE TEMP TABLE commission_rule_import_tmp (
+                id serial PRIMARY KEY,
+                salesperson_id integer,
+                partner_id integer,
+                zone_id integer,
+                product_id integer,
+                product_category_id integer,
+                company_id integer,
+                commission_percentage numeric
+            ) ON COMMIT DROP
+        """)
+        values = [key + (percentage,) for key, percentage in rules.items()]
+        for start in range(0, len(values), _INSERT_CHUNK):
+            chunk = values[start:start + _INSERT_CHUNK]
+            cr.execute(
+                "INSERT INTO commission_rule_import_tmp (%s, commission_percentage) VALUES %s" % (
+                    ', '.join(_KEY_FIELDS), ', '.join(['%s'] * len(chunk))),
+                [tuple(v or None for v in row[:-1]) + (row[-1],) for row in chunk])
+        cr.execute("ANALYZE commission_rule_import_tmp")
+
+        match = ' AND '.join(
+            f'COALESCE(r.{field}, 0) = COALESCE(t.{field}, 0)' for field in _KEY_FIELDS)
+        cr.execute(f"""
+            UPDATE salesperson_commission_rule r
+               SET commission_percentage = t.commission_percentage,
+                   active = TRUE,
+                   write_uid = %s,
+                   write_date = NOW() AT TIME ZONE 'UTC'
+              FROM commission_rule_import_tmp t
+             WHERE {match}
+               AND (r.commission_percentage <> t.commission_percentage OR NOT r.active)
+         RETURNING t.id
+        """, (self.env.uid,))
+        updated = len({row[0] for row in cr.fetchall()})
+
+        cr.execute(f"""
+            INSERT INTO salesperson_commission_rule (
+                {', '.join(_KEY_FIELDS)}, commission_percentage, active,
+                zone_country_id, zone_state_id,
+                create_uid, create_date, write_uid, write_date)
+            SELECT {', '.join('t.' + field for field in _KEY_FIELDS)},
+                   t.commission_percentage, TRUE,
+                   z.country_id, z.state_id,
+                   %s, NOW() AT TIME ZONE 'UTC', %s, NOW() AT TIME ZONE 'UTC'
+              FROM commission_rule_import_tmp t
+         LEFT JOIN commission_zone z ON z.id = t.zone_id
+             WHERE NOT EXISTS (
+                    SELECT 1 FROM salesperson_commission_rule r WHERE {match})
+         RETURNING id
+        """, (self.env.uid, self.env.uid))
+        created = len(cr.fetchall())
+        cr.execute("DROP TABLE commission_rule_import_tmp")
+
+        # Por qué: El SQL directo no pasa por create/write → invalidar a mano
+        # el cache del ORM y los índices de reglas compilados
+        RuleModel.invalidate_model()
+        self.env.registry.clear_cache()
+        return created, updated
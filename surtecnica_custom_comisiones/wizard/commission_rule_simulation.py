@@ -0,0 +1,269 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from dateutil.relativedelta import relativedelta
+from collections import defaultdict
+
+
+class CommissionRuleSimulation(models.TransientModel):
+    """Simulador de cambios de reglas sobre facturas históricas (dry-run).
+
+    Aplica un conjunto de reglas propuesto (reglas actuales + cambios) a las
+    líneas de facturas/NC confirmadas del período y compara contra los totales
+    de las comisiones existentes (activas y archivadas). Nunca escribe comisiones.
+
+    Por qué: Una sola compañía por simulación (las reglas son por compañía) y
+    totales por moneda del comprobante — sumar pesos y dólares en un mismo
+    total no significa nada.
+
+    Patrón: Bulk scoring — las líneas se leen con una sola query SQL y se
+    puntúan en memoria contra índices de reglas compilados por vendedor.
+    """
+    _name = 'commission.rule.simulation'
+    _description = 'Simulación de Reglas de Comisión'
+
+    date_from = fields.Date(
+        string='Desde', required=True,
+        default=lambda self: fields.Date.context_today(self) - relativedelta(months=12))
+    date_to = fields.Date(
+        string='Hasta', required=True,
+        default=fields.Date.context_today)
+    company_id = fields.Many2one(
+        'res.company', string='Compañía', required=True,
+        default=lambda self: self.env.company)
+    salesperson_ids = fields.Many2many(
+        'res.users', string='Vendedores',
+        help='Dejar vacío para simular todos los vendedores')
+    line_ids = fields.One2many(
+        'commission.rule.simulation.line', 'simulation_id',
+        string='Cambios Propuestos')
+    result_ids = fields.One2many(
+        'commission.rule.simulation.result', 'simulation_id',
+        string='Resultados', readonly=True)
+
+    def action_simulate(self):
+        """Corre la simulación y reabre el asistente con los resultados."""
+        self.ensure_one()
+        if self.date_from > self.date_to:
+            raise UserError(_('La fecha desde debe ser anterior a la fecha hasta.'))
+
+        proposed = self._get_proposed_rule_rows()
+        salesperson_ids = self.salesperson_ids.ids or None
+        rows = self.env['account.move']._read_commission_line_data(
+            self.date_from, self.date_to, salesperson_ids=salesperson_ids,
+            company_id=self.company_id.id)
+
+        RuleModel = self.env['salesperson.commission.rule']
+        indexes = {}
+
+        def get_index(company_id, salesperson_id):
+            key = (company_id, salesperson_id)
+            if key not in indexes:
+                indexes[key] = RuleModel._compile_rule_index([
+                    row for row in proposed.get(salesperson_id, [])
+                    if row[1] in (company_id, False)
+                ])
+            return indexes[key]
+
+        amounts, move_info = self.env['account.move']._score_commission_lines(
+            rows, get_index)
+
+        currencies = self._get_move_currencies(list(move_info))
+        simulated_by_sp = defaultdict(float)
+        simulated_by_rule = defaultdict(float)
+        for (move_id, rule_id, _pct), (_base, commission) in amounts.items():
+            salesperson_id = move_info[move_id][1]
+            currency_id = currencies[move_id]
+            simulated_by_sp[(salesperson_id, currency_id)] += commission
+            simulated_by_rule[(salesperson_id, rule_id, currency_id)] += commission
+
+        current_by_sp, current_by_rule = self._get_current_totals()
+
+        new_rule_labels = {
+            -line.id: line._get_label() for line in self.line_ids if not line.rule_id
+        }
+        results = []
+        for key in set(simulated_by_sp) | set(current_by_sp):
+            salesperson_id, currency_id = key
+            results.append({
+                'result_type': 'salesperson',
+                'salesperson_id': salesperson_id,
+                'currency_id': currency_id,
+                'current_amount': current_by_sp.get(key, 0.0),
+                'simulated_amount': simulated_by_sp.get(key, 0.0),
+            })
+        for key in set(simulated_by_rule) | set(current_by_rule):
+            salesperson_id, rule_id, currency_id = key
+            results.append({
+                'result_type': 'rule',
+                'salesperson_id': salesperson_id,
+                'currency_id': currency_id,
+                # Por qué: Reglas nuevas propuestas usan id negativo (no existen en DB)
+                'rule_id': rule_id if rule_id and rule_id > 0 else False,
+                'rule_label': new_rule_labels.get(rule_id, False),
+                'current_amount': current_by_rule.get(key, 0.0),
+                'simulated_amount': simulated_by_rule.get(key, 0.0),
+            })
+
+        self.result_ids = [(5, 0, 0)] + [(0, 0, vals) for vals in results]
+        return {
+            'type': 'ir.actions.act_window',
+            'name': _('Simulación de Reglas'),
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
+    def _get_move_currencies(self, move_ids):
+        """Moneda de cada comprobante. Returns: dict {move_id: currency_id}"""
+        if not move_ids:
+            return {}
+        self.env.cr.execute(
+            "SELECT id, currency_id FROM account_move WHERE id IN %s",
+            (tuple(move_ids),))
+        return dict(self.env.cr.fetchall())
+
+    def _get_proposed_rule_rows(self):
+        """Reglas actuales con los cambios propuestos aplicados.
+
+        Por qué: Una línea con regla existente reemplaza la regla entera con
+        las dimensiones de la línea (vendedor, cliente, zona, producto,
+        categoría y %), no solo el porcentaje — es lo que el usuario editó.
+
+        Returns: dict {salesperson_id: [filas de _compile_rule_index]}
+        """
+        domain = []
+        if self.salesperson_ids:
+            domain = [('salesperson_id', 'in', self.salesperson_ids.ids)]
+        rules = self.env['salesperson.commission.rule'].with_context(
+            active_test=True).search(domain)
+
+        changes = {line.rule_id.id: line for line in self.line_ids if line.rule_id}
+        proposed = defaultdict(list)
+        for rule in rules:
+            line = changes.get(rule.id)
+            if line and line.remove:
+                continue
+            if line:
+                proposed[line.salesperson_id.id].append((
+                    rule.id, rule.company_id.id, line.partner_id.id, line.zone_id.id,
+                    line.product_id.id, line.product_category_id.id,
+                    line.commission_percentage))
+                continue
+            proposed[rule.salesperson_id.id].append((
+                rule.id, rule.company_id.id, rule.partner_id.id, rule.zone_id.id,
+                rule.product_id.id, rule.product_category_id.id,
+                rule.commission_percentage))
+
+        for line in self.line_ids.filtered(lambda l: not l.rule_id and not l.remove):
+            proposed[line.salesperson_id.id].append((
+                -line.id, self.company_id.id, line.partner_id.commercial_partner_id.id,
+                line.zone_id.id, line.product_id.id, line.product_category_id.id,
+                line.commission_percentage))
+        return proposed
+
+    def _get_current_totals(self):
+        """Totales de comisiones existentes del período, por vendedor y por regla.
+
+        Por qué: Lee salesperson_commission_all — las comisiones archivadas
+        también son parte de lo que hoy se paga con las reglas actuales.
+
+        Returns: dict {(salesperson_id, currency_id): monto} y
+        dict {(salesperson_id, rule_id, currency_id): monto}
+        """
+        query = """
+            SELECT salesperson_id, rule_id, currency_id, SUM(commission_amount)
+              FROM salesperson_commission_all
+             WHERE date >= %(date_from)s
+               AND date <= %(date_to)s
+               AND company_id = %(company_id)s
+               AND move_type IN ('out_invoice', 'out_refund')
+        """
+        params = {
+            'date_from': self.date_from,
+            'date_to': self.date_to,
+            'company_id': self.company_id.id,
+        }
+        if self.salesperson_ids:
+            query += " AND salesperson_id IN %(salesperson_ids)s"
+            params['salesperson_ids'] = tuple(self.salesperson_ids.ids)
+        query += " GROUP BY salesperson_id, rule_id, currency_id"
+        self.env['salesperson.commission'].flush_model()
+        self.env.cr.execute(query, params)
+
+        by_salesperson = defaultdict(float)
+        by_rule = {}
+        for salesperson_id, rule_id, currency_id, amount in self.env.cr.fetchall():
+            amount = float(amount or 0.0)
+            by_salesperson[(salesperson_id, currency_id)] += amount
+            by_rule[(salesperson_id, rule_id or False, currency_id)] = amount
+        return by_salesperson, by_rule
+
+
+class CommissionRuleSimulationLine(models.TransientModel):
+    """Cambio propuesto: modificar/quitar una regla existente o agregar una nueva."""
+    _name = 'commission.rule.simulation.line'
+    _description = 'Cambio Propuesto de Regla de Comisión'
+
+    simulation_id = fields.Many2one(
+        'commission.rule.simulation', required=True, ondelete='cascade')
+    rule_id = fields.Many2one(
+        'salesperson.commission.rule', string='Regla Existente',
+        help='Dejar vacío para proponer una regla nueva')
+    salesperson_id = fields.Many2one('res.users', string='Vendedor', required=True)
+    partner_id = fields.Many2one('res.partner', string='Cliente')
+    zone_id = fields.Many2one('commission.zone', string='Zona')
+    product_id = fields.Many2one('product.product', string='Producto')
+    product_category_id = fields.Many2one(
+        'product.category', string='Categoría de Producto')
+    commission_percentage = fields.Float(
+        string='Comisión Propuesta (%)', digits=(5, 2))
+    remove = fields.Boolean(
+        string='Quitar', help='Simular la regla existente como archivada')
+
+    @api.onchange('rule_id')
+    def _onchange_rule_id(self):
+        # Por qué: Al elegir una regla existente se copian sus dimensiones;
+        # editarlas simula la regla modificada
+        if self.rule_id:
+            self.salesperson_id = self.rule_id.salesperson_id
+            self.partner_id = self.rule_id.partner_id
+            self.zone_id = self.rule_id.zone_id
+            self.product_id = self.rule_id.product_id
+            self.product_category_id = self.rule_id.product_category_id
+            self.commission_percentage = self.rule_id.commission_percentage
+
+    def _get_label(self):
+        self.ensure_one()
+        parts = [self.partner_id.name, self.zone_id.name,
+                 self.product_id.display_name, self.product_category_id.display_name]
+        detail = ' / '.join(p for p in parts if p) or _('Default')
+        return _('Nueva: %(detail)s (%(pct)s%%)',
+                 detail=detail, pct=self.commission_percentage)
+
+
+class CommissionRuleSimulationResult(models.TransientModel):
+    """Resultado de la simulación: actual vs simulado por vendedor o regla."""
+    _name = 'commission.rule.simulation.result'
+    _description = 'Resultado de Simulación de Reglas'
+    _order = 'result_type desc, salesperson_id, id'
+
+    simulation_id = fields.Many2one(
+        'commission.rule.simulation', required=True, ondelete='cascade')
+    result_type = fields.Selection([
+        ('salesperson', 'Vendedor'),
+        ('rule', 'Regla'),
+    ], string='Nivel', required=True)
+    salesperson_id = fields.Many2one('res.users', string='Vendedor')
+    rule_id = fields.Many2one('salesperson.commission.rule', string='Regla')
+    rule_label = fields.Char(string='Regla Propuesta')
+    currency_id = fields.Many2one('res.currency', string='Moneda')
+    current_amount = fields.Monetary(string='Comisión Actual')
+    simulated_amount = fields.Monetary(string='Comisión Simulada')
+    delta_amount = fields.Monetary(
+        string='Diferencia', compute='_compute_delta_amount', store=True)
+
+    @api.depends('current_amount', 'simulated_amount')
+    def _compute_delta_amount(self):
+        for rec in self:
+            rec.delta_amount = rec.simulated_amount - rec.current_amount